@@ -1,11 +1,14 @@
-from fastapi import APIRouter, status, Depends
+from fastapi import APIRouter, Request, Response, status, Depends
 from app.schemas.user_schema import UserCreate, UserResponse, UserLogin
 from app.schemas.token_schema import TokenWithUser
 from app.services.auth_service import auth_service
-from app.controllers.deps import get_current_user
+from app.core.tokens import get_key_ring
+from app.controllers.deps import get_current_user, require_admin
+from app.dao.user_dao import user_cache
 from app.models.user_model import User
 
 router = APIRouter()
+jwks_router = APIRouter()
 
 @router.post("/signup", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
 async def signup(user_in: UserCreate):
@@ -13,9 +16,22 @@ async def signup(user_in: UserCreate):
     return await auth_service.register(user_in)
 
 @router.post("/login", response_model=TokenWithUser)
-async def login(user_in: UserLogin):
-    return await auth_service.login(user_in)
+async def login(user_in: UserLogin, request: Request):
+    # Behind a proxy, run uvicorn with --forwarded-allow-ips so this is the real client
+    client_ip = request.client.host if request.client else "unknown"
+    return await auth_service.login(user_in, client_ip)
 
 @router.get("/me", response_model=UserResponse)
 async def get_me(current_user: User = Depends(get_current_user)):
-    return UserResponse.model_validate(current_user)
\ No newline at end of file
+    return UserResponse.model_validate(current_user)
+
+# ADMIN ONLY → AUTH USER-CACHE HIT/MISS COUNTERS (per worker process)
+@router.get("/cache-stats")
+async def get_user_cache_stats(current_user: User = Depends(require_admin)):
+    return user_cache.stats()
+
+# PUBLIC KEYS FOR VERIFYING ACCESS TOKENS (RS256 / EdDSA; empty for HS*)
+@jwks_router.get("/.well-known/jwks.json", tags=["Auth"])
+async def get_jwks(response: Response):
+    response.headers["Cache-Control"] = "public, max-age=300"
+    return get_key_ring().jwks
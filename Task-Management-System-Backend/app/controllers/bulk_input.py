@@ -0,0 +1,97 @@
+import json
+from typing import AsyncIterator, Type, TypeVar, Union
+
+from fastapi import HTTPException, Request, status
+from pydantic import BaseModel, ValidationError
+
+from app.core.config import settings
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+NDJSON_MEDIA_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+
+
+def _item_error(exc: ValueError) -> ValueError:
+    # Keep per-item error messages short (first validation error only)
+    if isinstance(exc, ValidationError):
+        err = exc.errors()[0]
+        loc = ".".join(str(part) for part in err["loc"])
+        return ValueError(f"{loc}: {err['msg']}" if loc else err["msg"])
+    return ValueError(f"Invalid JSON: {exc}")
+
+
+async def _ndjson_lines(request: Request, max_line: int) -> AsyncIterator[Union[bytes, ValueError]]:
+    """
+    Non-blank lines of the body as they arrive. A line longer than max_line
+    bytes is dropped (the rest of it is skipped as it arrives, not buffered)
+    and reported as a ValueError in its place.
+    """
+    too_long = ValueError(f"Line longer than {max_line} bytes")
+    buffer = bytearray()
+    skipping = False   # inside a line already reported as too long
+
+    async for chunk in request.stream():
+        searched = len(buffer)   # bytes already searched hold no newline
+        buffer += chunk
+        start = 0
+        while True:
+            end = buffer.find(b"\n", searched)
+            if end == -1:
+                break
+            if skipping:
+                skipping = False
+            elif end - start > max_line:
+                yield too_long
+            elif buffer[start:end].strip():
+                yield bytes(buffer[start:end])
+            start = searched = end + 1
+        del buffer[:start]
+
+        if len(buffer) > max_line:
+            if not skipping:
+                yield too_long
+                skipping = True
+            buffer.clear()
+
+    if buffer.strip() and not skipping:
+        yield bytes(buffer)
+
+
+async def iter_bulk_items(
+    request: Request, model: Type[ModelT]
+) -> AsyncIterator[Union[ModelT, ValueError]]:
+    """
+    Yield request items validated as `model`, or a ValueError per invalid item.
+    NDJSON bodies are decoded line by line as they arrive, so large imports are
+    never buffered whole (nor is any line beyond BULK_MAX_LINE_BYTES); any
+    other body must be a JSON array.
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+
+    if content_type in NDJSON_MEDIA_TYPES:
+        async for line in _ndjson_lines(request, settings.BULK_MAX_LINE_BYTES):
+            if isinstance(line, ValueError):
+                yield line
+                continue
+            try:
+                yield model.model_validate_json(line)
+            except ValueError as exc:
+                yield _item_error(exc)
+        return
+
+    try:
+        payload = json.loads(await request.body())
+    except ValueError:
+        payload = None
+
+    if not isinstance(payload, list):
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Body must be a JSON array or NDJSON (application/x-ndjson)"
+        )
+
+    for obj in payload:
+        try:
+            yield model.model_validate(obj)
+        except ValueError as exc:
+            yield _item_error(exc)
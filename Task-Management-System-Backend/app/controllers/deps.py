@@ -1,39 +1,46 @@
-from fastapi import Depends, HTTPException, status
+from typing import Callable, Optional, Union
+
+from fastapi import Depends, HTTPException, Query, Response, status
 from fastapi.security import OAuth2PasswordBearer
-from jose import jwt, JWTError
 
 from app.core.config import settings
+from app.core.tokens import TokenError, decode_token
 from app.dao.user_dao import user_dao
-from app.models.user_model import User
+from app.database.database import db
+from app.models.user_model import User, TokenUser
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
+oauth2_scheme_optional = OAuth2PasswordBearer(tokenUrl="/auth/login", auto_error=False)
 
 
 # ================= AUTHENTICATION =================
-async def get_current_user(token: str = Depends(oauth2_scheme)) -> User:
+credentials_exception = HTTPException(
+    status_code=status.HTTP_401_UNAUTHORIZED,
+    detail="Invalid authentication",
+    headers={"WWW-Authenticate": "Bearer"},
+)
 
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Invalid authentication",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
 
-    try:
-        payload = jwt.decode(
-            token,
-            settings.SECRET_KEY,
-            algorithms=[settings.ALGORITHM]
-        )
+def decode_access_token(token: str) -> dict:
 
-        user_id = payload.get("sub")
+    try:
+        payload = decode_token(token)
 
-        if user_id is None:
-            raise credentials_exception
+    except TokenError:
+        raise credentials_exception
 
-    except JWTError:
+    if payload.get("sub") is None:
         raise credentials_exception
 
-    user = await user_dao.get_by_id(int(user_id))
+    return payload
+
+
+async def get_current_user(token: str = Depends(oauth2_scheme)) -> User:
+
+    payload = decode_access_token(token)
+    db.bind_session(payload["sub"])
+
+    user = await user_dao.get_cached_by_id(int(payload["sub"]))
 
     if user is None:
         raise credentials_exception
@@ -41,10 +48,36 @@ async def get_current_user(token: str = Depends(oauth2_scheme)) -> User:
     return user
 
 
+# Browsers' EventSource cannot send headers, so streaming endpoints also
+# accept the token as ?access_token=
+async def get_current_user_for_stream(
+    header_token: Optional[str] = Depends(oauth2_scheme_optional),
+    access_token: Optional[str] = Query(None),
+) -> User:
+
+    token = header_token or access_token
+
+    if not token:
+        raise credentials_exception
+
+    return await get_current_user(token)
+
+
 # ================= ADMIN GUARD =================
 async def require_admin(
-    current_user: User = Depends(get_current_user)
-) -> User:
+    token: str = Depends(oauth2_scheme)
+) -> Union[User, TokenUser]:
+
+    payload = decode_access_token(token)
+    db.bind_session(payload["sub"])
+
+    # Trusting the signed role claim skips the user lookup entirely
+    if settings.AUTH_TRUST_ROLE_CLAIM:
+        current_user = TokenUser(id=int(payload["sub"]), role=payload.get("role") or "")
+    else:
+        current_user = await user_dao.get_cached_by_id(int(payload["sub"]))
+        if current_user is None:
+            raise credentials_exception
 
     if current_user.role.upper() not in ["ADMIN", "MANAGER"]:
         raise HTTPException(
@@ -67,3 +100,39 @@ async def require_employee(
         )
 
     return current_user
+
+
+# ================= PAGINATION =================
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class PageParams:
+    """Keyset pagination: `after` is the cursor returned by the previous page."""
+
+    def __init__(
+        self,
+        limit: int = Query(settings.DEFAULT_PAGE_SIZE, ge=1, le=settings.MAX_PAGE_SIZE),
+        after: Optional[int] = Query(None, ge=1),
+    ):
+        self.limit = limit
+        self.after = after
+
+
+class SearchPageParams(PageParams):
+    """PageParams for ranked results: `after` is an opaque "score:id" cursor."""
+
+    def __init__(
+        self,
+        limit: int = Query(settings.DEFAULT_PAGE_SIZE, ge=1, le=settings.MAX_PAGE_SIZE),
+        after: Optional[str] = Query(None, max_length=64),
+    ):
+        self.limit = limit
+        self.after = after
+
+
+def set_next_cursor(
+    response: Response, rows: list, page: PageParams, cursor: Optional[Callable] = None
+) -> None:
+    # A full page means there may be more rows; the client passes this back as `after`
+    if len(rows) == page.limit:
+        response.headers[NEXT_CURSOR_HEADER] = cursor(rows[-1]) if cursor else str(rows[-1]["id"])
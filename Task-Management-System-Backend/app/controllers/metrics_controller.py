@@ -0,0 +1,80 @@
+import asyncio
+import hmac
+import ipaddress
+
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import PlainTextResponse
+
+from app.core.config import settings
+from app.core.metrics import registry, read_snapshots, GaugeFunc
+from app.core.security import password_hasher
+from app.core.tokens import verified_tokens
+from app.dao.user_dao import user_cache, unknown_emails, user_loader, user_loader_primary
+from app.services.auth_service import auth_service
+from app.database.database import db
+from app.services.task_events import task_event_hub
+
+router = APIRouter()
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _pool(key: str):
+    return lambda: db.stats()[key]
+
+
+# Point-in-time state owned by other modules, read on each scrape
+for name, help_text, fn, kind in [
+    ("db_pool_size", "Open primary pool connections", _pool("pool_size"), "gauge"),
+    ("db_pool_in_use", "Primary pool connections checked out", _pool("in_use"), "gauge"),
+    ("db_pool_max_size", "Primary pool size limit", _pool("pool_max_size"), "gauge"),
+    ("db_replicas_down", "Read replicas currently marked down", _pool("replicas_down"), "gauge"),
+    ("db_primary_reads_total", "Reads served by the primary", _pool("primary_reads"), "counter"),
+    ("db_replica_reads_total", "Reads served by a replica", _pool("replica_reads"), "counter"),
+    ("db_replica_failovers_total", "Replica reads retried on the primary", _pool("replica_failovers"), "counter"),
+    ("password_hash_in_flight", "bcrypt operations queued or running", lambda: password_hasher.in_flight, "gauge"),
+    ("password_hash_rejected_total", "bcrypt operations refused with 503", lambda: password_hasher.rejected, "counter"),
+    ("user_cache_hits_total", "Auth user cache hits", lambda: user_cache.hits, "counter"),
+    ("user_cache_misses_total", "Auth user cache misses", lambda: user_cache.misses, "counter"),
+    ("verified_token_cache_hits_total", "Bearer tokens accepted without a signature check", lambda: verified_tokens.hits, "counter"),
+    ("verified_token_cache_misses_total", "Bearer tokens parsed and signature-checked", lambda: verified_tokens.misses, "counter"),
+    ("user_loader_loads_total", "UserDAO.get_by_id calls through the batching loaders",
+     lambda: user_loader.loads + user_loader_primary.loads, "counter"),
+    ("user_loader_coalesced_total", "User lookups that joined a pending or in-flight one",
+     lambda: user_loader.coalesced + user_loader_primary.coalesced, "counter"),
+    ("user_loader_batches_total", "Batched user queries issued",
+     lambda: user_loader.batches + user_loader_primary.batches, "counter"),
+    ("login_unknown_email_cache_hits_total", "Logins for a remembered unknown email (no DB lookup)", lambda: unknown_emails.hits, "counter"),
+    ("login_dummy_verifies_total", "bcrypt verifies spent on unknown-email logins", lambda: auth_service.dummy_verifies, "counter"),
+    ("login_dummy_verifies_skipped_total", "Unknown-email logins answered without bcrypt (budget spent)", lambda: auth_service.dummy_verifies_skipped, "counter"),
+    ("task_event_subscribers", "Connected /tasks/events clients", task_event_hub.subscriber_count, "gauge"),
+]:
+    registry.register(GaugeFunc(name, help_text, fn, kind))
+
+
+ALLOWED_NETWORKS = [
+    ipaddress.ip_network(n.strip(), strict=False)
+    for n in settings.METRICS_ALLOW_FROM.split(",") if n.strip()
+]
+
+
+def require_metrics_access(request: Request) -> None:
+    # Scrapers on an allowed network, or anyone with METRICS_TOKEN
+    if settings.METRICS_TOKEN:
+        scheme, _, token = request.headers.get("authorization", "").partition(" ")
+        if scheme.lower() == "bearer" and hmac.compare_digest(token.encode(), settings.METRICS_TOKEN.encode()):
+            return
+
+    try:
+        client = ipaddress.ip_address(request.client.host) if request.client else None
+    except ValueError:
+        client = None   # e.g. "testclient"
+    if client is None or not any(client in network for network in ALLOWED_NETWORKS):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not allowed")
+
+
+# PROMETHEUS SCRAPE TARGET (every worker, summed, when METRICS_DIR is set)
+@router.get("/metrics", include_in_schema=False, dependencies=[Depends(require_metrics_access)])
+async def metrics():
+    snapshots = await asyncio.to_thread(read_snapshots) if settings.METRICS_DIR else []
+    return PlainTextResponse(registry.render(snapshots), media_type=PROMETHEUS_CONTENT_TYPE)
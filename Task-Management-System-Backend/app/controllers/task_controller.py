@@ -1,13 +1,40 @@
-from fastapi import APIRouter, status, Body, Depends, HTTPException
-from typing import List
+from fastapi import APIRouter, status, Body, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from typing import List, Literal, Optional
 
-from app.schemas.task_schema import TaskCreate, TaskResponse, TaskUpdate
+from app.schemas.task_schema import (
+    TaskCreate,
+    TaskResponse,
+    TaskUpdate,
+    TaskFilter,
+    TaskListFilter,
+    TaskStatusUpdateItem,
+    BulkResult,
+    TaskAutoAssignItem,
+    AutoAssignResult,
+    TaskStats,
+    AssigneeTaskStats,
+)
 from app.models.enums.TaskStatus import TaskStatus
 from app.models.user_model import User
 from app.dependencies import task_service
 
 # IMPORT ADMIN GUARD
-from app.controllers.deps import get_current_user, require_admin
+from app.controllers.deps import (
+    get_current_user,
+    get_current_user_for_stream,
+    require_admin,
+    PageParams,
+    SearchPageParams,
+    set_next_cursor,
+)
+from app.controllers.conditional import make_etag, is_not_modified, not_modified, set_etag
+from app.services.task_events import task_event_hub, sse_stream
+from app.services.task_versions import task_versions
+from app.services.task_service import search_cursor
+from app.controllers.bulk_input import iter_bulk_items
+from app.core.config import settings
+from app.core.serialization import RowListResponse
 
 router = APIRouter()
 
@@ -21,31 +48,181 @@ async def create_task(
     return await task_service.create_task(task_in)
 
 
+# ADMIN ONLY → BULK CREATE (JSON array or streamed NDJSON of TaskCreate)
+@router.post("/bulk", response_model=BulkResult)
+async def create_tasks_bulk(
+    request: Request,
+    current_user: User = Depends(require_admin)
+):
+    return await task_service.create_tasks_bulk(iter_bulk_items(request, TaskCreate))
+
+
+# ADMIN ONLY → AUTO-ASSIGN (JSON array or NDJSON of unassigned tasks)
+# Each task goes to the least-loaded employee, weighing open tasks by how soon
+# they are due; employee_ids restricts the candidates.
+@router.post("/auto-assign", response_model=AutoAssignResult)
+async def auto_assign_tasks(
+    request: Request,
+    employee_ids: Optional[List[int]] = Query(None),
+    current_user: User = Depends(require_admin)
+):
+    return await task_service.auto_assign_tasks(
+        iter_bulk_items(request, TaskAutoAssignItem), employee_ids
+    )
+
+
+# BULK STATUS UPDATE (JSON array or NDJSON of {"id", "status"})
+# Admins may update any task; everyone else only tasks assigned to them.
+@router.patch("/bulk/status", response_model=BulkResult)
+async def update_status_bulk(
+    request: Request,
+    current_user: User = Depends(get_current_user)
+):
+    is_admin = current_user.role.upper() in ["ADMIN", "MANAGER"]
+    return await task_service.update_status_bulk(
+        iter_bulk_items(request, TaskStatusUpdateItem),
+        assigned_user=None if is_admin else current_user.id
+    )
+
+
 # ADMIN ONLY → VIEW ALL TASKS
 @router.get("/", response_model=List[TaskResponse])
 async def get_tasks(
+    request: Request,
+    filters: TaskListFilter = Depends(),
+    page: PageParams = Depends(),
     current_user: User = Depends(require_admin)   # ADMIN ONLY
 ):
-    return await task_service.get_all_tasks()
+    # Unchanged since the client's copy → 304 without running the listing query
+    version = await task_versions.all_tasks()
+    etag = make_etag("tasks", version, request.url.query) if version else None
+    if etag and is_not_modified(request, etag):
+        return not_modified(etag)
+
+    rows = await task_service.get_all_tasks(filters, page.limit, page.after)
+    response = RowListResponse(rows, TaskResponse)
+    set_next_cursor(response, rows, page)
+    set_etag(response, etag)
+    return response
 
 # EMPLOYEE → VIEW OWN TASKS
 @router.get("/my-tasks", response_model=List[TaskResponse])
 async def get_my_tasks(
+    request: Request,
+    filters: TaskFilter = Depends(),
+    page: PageParams = Depends(),
+    current_user: User = Depends(get_current_user)
+):
+    version = await task_versions.user_tasks(current_user.id)
+    etag = make_etag("my-tasks", current_user.id, version, request.url.query) if version else None
+    if etag and is_not_modified(request, etag):
+        return not_modified(etag)
+
+    rows = await task_service.get_user_task(current_user.id, filters, page.limit, page.after)
+    response = RowListResponse(rows, TaskResponse)
+    set_next_cursor(response, rows, page)
+    set_etag(response, etag)
+    return response
+
+
+
+# SEARCH TITLES/DESCRIPTIONS, best match first
+# Admins search every task (optionally one assignee's); others only their own.
+@router.get("/search", response_model=List[TaskResponse])
+async def search_tasks(
+    q: str = Query(..., min_length=1, max_length=200),
+    mode: Literal["fts", "fuzzy"] = "fts",
+    assigned_to_id: Optional[int] = None,
+    page: SearchPageParams = Depends(),
     current_user: User = Depends(get_current_user)
 ):
-    return await task_service.get_user_task(current_user.id)
+    if current_user.role.upper() not in ["ADMIN", "MANAGER"]:
+        assigned_to_id = current_user.id
 
+    rows = await task_service.search_tasks(
+        q, mode == "fuzzy", assigned_to_id, page.limit, page.after
+    )
+    response = RowListResponse(rows, TaskResponse)
+    set_next_cursor(response, rows, page, cursor=search_cursor)
+    return response
+
+
+# ADMIN ONLY → EXPORT ALL MATCHING TASKS (streamed, constant memory)
+EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv; charset=utf-8"}
+
+
+@router.get("/export")
+async def export_tasks(
+    format: Literal["ndjson", "csv"] = "ndjson",
+    filters: TaskListFilter = Depends(),
+    current_user: User = Depends(require_admin)
+):
+    return StreamingResponse(
+        task_service.export_tasks(filters, format),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="tasks.{format}"'},
+    )
+
+
+# ADMIN ONLY → DASHBOARD STATISTICS (per status / assignee, overdue / due soon, completion over time)
+@router.get("/stats", response_model=TaskStats)
+async def get_task_stats(
+    bucket: Literal["day", "week", "month"] = "week",
+    periods: int = Query(12, ge=1, le=366),
+    current_user: User = Depends(require_admin)
+):
+    return await task_service.get_stats(bucket, periods)
+
+
+# OWN COUNTERS (total, overdue, due soon, per status) without downloading the tasks
+@router.get("/my-stats", response_model=AssigneeTaskStats)
+async def get_my_task_stats(
+    current_user: User = Depends(get_current_user)
+):
+    return await task_service.get_user_stats(current_user.id)
+
+
+# LIVE CHANGE FEED (Server-Sent Events): admins get every change, employees their own tasks
+@router.get("/events")
+async def task_events(
+    current_user: User = Depends(get_current_user_for_stream)
+):
+    if not settings.TASK_EVENTS_ENABLED:
+        # Nothing would ever be published to the stream
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Live task events are disabled"
+        )
+
+    return StreamingResponse(
+        sse_stream(
+            task_event_hub,
+            current_user.id,
+            is_admin=current_user.role.upper() in ["ADMIN", "MANAGER"]
+        ),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 # GET SINGLE TASK (AUTHENTICATED) (Remove)
 @router.get("/{task_id}", response_model=TaskResponse)
 async def get_task(
     task_id: int,
+    request: Request,
+    response: Response,
+    include_archived: bool = False,
     current_user: User = Depends(get_current_user)
 ):
-    task = await task_service.get_task(task_id)
+    version = await task_versions.all_tasks()
+    etag = make_etag("task", task_id, include_archived, version) if version else None
+    if etag and is_not_modified(request, etag):
+        return not_modified(etag)
+
+    task = await task_service.get_task(task_id, include_archived)
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
+    set_etag(response, etag)
     return task
 
 
@@ -1,19 +1,36 @@
-from fastapi import APIRouter, status, Depends
+from fastapi import APIRouter, status, Depends, Request, Response
 from typing import List
 
 from app.schemas.user_schema import UserCreate, UserResponse
 from app.services.user_service import user_service
-from app.controllers.deps import require_admin
+from app.controllers.deps import require_admin, PageParams, set_next_cursor
+from app.controllers.conditional import make_etag, is_not_modified, not_modified, set_etag
+from app.core.config import settings
+from app.core.serialization import RowListResponse
 from app.models.user_model import User
 
 router = APIRouter()
 
 # GET ALL USERS (ADMIN ONLY)
 @router.get("/", response_model=List[UserResponse])
-async def get_all_users(current_user: User = Depends(require_admin)):
-    return await user_service.get_all_users()
+async def get_all_users(
+    page: PageParams = Depends(),
+    current_user: User = Depends(require_admin)
+):
+    rows = await user_service.get_all_users(page.limit, page.after)
+    response = RowListResponse(rows, UserResponse)
+    set_next_cursor(response, rows, page)
+    return response
 
 # GET USER BY ID
 @router.get("/{user_id}", response_model=UserResponse)
-async def get_user(user_id: int):
-    return await user_service.get_user_by_id(user_id)
+async def get_user(user_id: int, request: Request, response: Response):
+    user = await user_service.get_user_by_id(user_id, cached=True)
+
+    if settings.ETAGS_ENABLED:
+        etag = make_etag("user", user.id, user.email, user.role, user.created_at)
+        if is_not_modified(request, etag):
+            return not_modified(etag)
+        set_etag(response, etag)
+
+    return user
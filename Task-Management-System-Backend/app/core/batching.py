@@ -0,0 +1,105 @@
+import asyncio
+import contextvars
+from typing import Awaitable, Callable, Dict, Generic, Hashable, List, Optional, Set, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class BatchLoader(Generic[K, V]):
+    """
+    DataLoader-style coalescing: load(key) calls made within `window` seconds
+    of each other (0 = the rest of the current event-loop iteration) are
+    resolved by one batch_fn(keys) call, which returns {key: value}; missing
+    keys resolve to None. A key already pending or in flight joins that lookup
+    instead of starting another.
+
+    Batches run in an empty context, so they never borrow a caller's
+    connection() block or read-routing state; callers that need either must
+    not use the loader. State is bound to one event loop and reset if used
+    from another.
+    """
+
+    def __init__(
+        self,
+        batch_fn: Callable[[List[K]], Awaitable[Dict[K, V]]],
+        window: float = 0.0,
+        max_batch_size: int = 500,
+    ):
+        self.batch_fn = batch_fn
+        self.window = window
+        self.max_batch_size = max_batch_size
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pending: Dict[K, asyncio.Future] = {}     # waiting for the next dispatch
+        self._in_flight: Dict[K, asyncio.Future] = {}   # batch query running
+        self._timer: Optional[asyncio.Handle] = None
+        self._tasks: Set[asyncio.Task] = set()
+
+        self.loads = 0
+        self.coalesced = 0   # loads that joined a pending or in-flight lookup
+        self.batches = 0
+
+    async def load(self, key: K) -> Optional[V]:
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop, self._pending, self._in_flight, self._timer = loop, {}, {}, None
+
+        self.loads += 1
+        future = self._in_flight.get(key) or self._pending.get(key)
+        if future is not None:
+            self.coalesced += 1
+        else:
+            future = self._pending[key] = loop.create_future()
+            # Nobody may be left awaiting (all cancelled): don't log the error as unretrieved
+            future.add_done_callback(lambda f: f.cancelled() or f.exception())
+
+            if len(self._pending) >= self.max_batch_size:
+                self._dispatch()
+            elif self._timer is None:
+                empty = contextvars.Context()
+                if self.window > 0:
+                    self._timer = loop.call_later(self.window, self._dispatch, context=empty)
+                else:
+                    self._timer = loop.call_soon(self._dispatch, context=empty)
+
+        # One cancelled caller must not cancel the lookup for the others
+        return await asyncio.shield(future)
+
+    def _dispatch(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch, self._pending = self._pending, {}
+        if not batch:
+            return
+
+        self._in_flight.update(batch)
+        self.batches += 1
+        task = self._loop.create_task(self._run(batch), context=contextvars.Context())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: Dict[K, asyncio.Future]) -> None:
+        try:
+            results = await self.batch_fn(list(batch))
+        except asyncio.CancelledError:
+            for future in batch.values():
+                future.cancel()
+            raise
+        except Exception as exc:
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(exc)
+        else:
+            for key, future in batch.items():
+                if not future.done():
+                    future.set_result(results.get(key))
+        finally:
+            for key, future in batch.items():
+                if self._in_flight.get(key) is future:
+                    del self._in_flight[key]
+
+    def stats(self) -> dict:
+        return {"loads": self.loads, "coalesced": self.coalesced, "batches": self.batches}
@@ -1,13 +1,140 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pathlib import Path
+from typing import Optional
 
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
 
 class Settings(BaseSettings):
     DATABASE_URL: str
     SECRET_KEY: str
-    ALGORITHM: str = "HS256"
+    ALGORITHM: str = "HS256"               # HS256/384/512 with SECRET_KEY, or RS256 / EdDSA
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    # RS256 / EdDSA: directory of <kid>.pem keys (see app/core/tokens.py)
+    JWT_KEYS_DIR: Optional[str] = None
+    JWT_ACTIVE_KID: Optional[str] = None      # required once JWT_KEYS_DIR holds more than one signing key
+    # Verified tokens remembered until exp, so repeats skip signature checks
+    JWT_VERIFIED_CACHE_SIZE: int = 10000
+
+    # asyncpg connection pool (per worker process)
+    DB_POOL_MIN_SIZE: int = 2
+    DB_POOL_MAX_SIZE: int = 10
+    # python -m app.serve: total connections all workers may open on one server;
+    # when set, it replaces DB_POOL_MAX_SIZE with an even per-worker share
+    DB_CONNECTION_BUDGET: Optional[int] = None
+    DB_COMMAND_TIMEOUT: Optional[float] = 30
+    DB_STATEMENT_CACHE_SIZE: int = 256
+    DB_MAX_INACTIVE_CONNECTION_LIFETIME: float = 300
+    # Run the hot read queries once on each new connection (fills the statement cache)
+    DB_WARM_STATEMENTS: bool = True
+
+    # Read replicas: comma-separated DSNs; empty means every read hits the primary
+    DATABASE_REPLICA_URLS: str = ""
+    DB_REPLICA_ROUTING: str = "round_robin"           # "round_robin" or "least_busy"
+    DB_REPLICA_RETRY_SECONDS: float = 30              # how long a failed replica is skipped
+    # After a write, that user's reads go to the primary for this long
+    DB_READ_YOUR_WRITES_SECONDS: float = 5
+
+    # Dedicated LISTEN connection liveness check
+    DB_LISTENER_PING_SECONDS: float = 10
+
+    # Apply pending migrations/*.sql when the app starts
+    RUN_MIGRATIONS_ON_STARTUP: bool = False
+
+    # Authenticated-user cache (per process)
+    USER_CACHE_TTL_SECONDS: float = 60
+    USER_CACHE_MAX_SIZE: int = 10000
+    # User lookups by id (auth cache misses, GET /user/{id}) issued within this
+    # window are coalesced into one query (0 = same event-loop iteration)
+    USER_LOADER_WINDOW_MS: float = 1
+    USER_LOADER_MAX_BATCH: int = 500
+    # Let require_admin trust the role claim in the JWT instead of loading the user
+    AUTH_TRUST_ROLE_CLAIM: bool = False
+
+    # POST /auth/login throttling: token buckets per client IP and per email,
+    # checked before any DB or bcrypt work
+    LOGIN_RATE_LIMIT_ENABLED: bool = True
+    LOGIN_RATE_LIMIT_BACKEND: str = "memory"   # "memory" (per process) or "postgres" (shared, migration 007)
+    LOGIN_RATE_LIMIT_MAX_KEYS: int = 100000    # memory backend: least recently used buckets dropped beyond this
+    LOGIN_IP_PER_MINUTE: float = 30
+    LOGIN_IP_BURST: int = 20
+    LOGIN_EMAIL_PER_MINUTE: float = 5
+    LOGIN_EMAIL_BURST: int = 10
+    # Emails with no account are remembered this long, so repeats skip the DB lookup
+    LOGIN_UNKNOWN_EMAIL_TTL_SECONDS: float = 60
+    LOGIN_UNKNOWN_EMAIL_CACHE_SIZE: int = 100000
+    # Failed lookups still spend one bcrypt verify (same timing as a wrong
+    # password), but at most this many per second per process
+    LOGIN_DUMMY_VERIFY_PER_SECOND: float = 5
+
+    # Password hashing: bcrypt runs off the event loop on a bounded pool
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_EXECUTOR: str = "thread"        # "thread" or "process"
+    PASSWORD_HASH_WORKERS: Optional[int] = None   # defaults to the CPU count
+    PASSWORD_HASH_MAX_QUEUE: int = 256            # in-flight jobs before answering 503
+
+    # Listing endpoints (keyset pagination)
+    DEFAULT_PAGE_SIZE: int = 100
+    MAX_PAGE_SIZE: int = 500
+
+    # GET /tasks/stats is cached this long (cleared by any task mutation)
+    TASK_STATS_CACHE_SECONDS: float = 10
+
+    # /tasks/events change feed (Server-Sent Events)
+    TASK_EVENTS_ENABLED: bool = True
+    TASK_EVENTS_QUEUE_SIZE: int = 100         # per connection; overflow forces a resync
+    TASK_EVENTS_HEARTBEAT_SECONDS: float = 15
+
+    # ETag / If-None-Match on task and user reads (task ETags need TASK_EVENTS_ENABLED)
+    ETAGS_ENABLED: bool = True
+
+    # Bulk task endpoints: rows validated and written per round-trip
+    BULK_BATCH_SIZE: int = 1000
+    # Longest accepted NDJSON line; longer ones fail as items without being buffered
+    BULK_MAX_LINE_BYTES: int = 1_048_576
+
+    # POST /tasks/auto-assign: open tasks due within the horizon weigh up to 2x
+    AUTO_ASSIGN_DUE_HORIZON_DAYS: float = 7
+    AUTO_ASSIGN_MAX_TASKS: int = 50000
+
+    # python -m app.serve (production launcher)
+    SERVER_HOST: str = "0.0.0.0"
+    SERVER_PORT: int = 8000
+    SERVER_WORKERS: Optional[int] = None        # default: CPU cores available to the process
+    # On SIGTERM, in-flight requests get this long to finish before being cancelled
+    GRACEFUL_SHUTDOWN_SECONDS: float = 30
+
+    # GET /metrics (Prometheus text format) and request/query timing
+    METRICS_ENABLED: bool = True
+    # /metrics answers only these client networks (comma-separated CIDRs) or a
+    # request carrying "Authorization: Bearer <METRICS_TOKEN>"
+    METRICS_ALLOW_FROM: str = "127.0.0.1/32,::1/128"
+    METRICS_TOKEN: Optional[str] = None
+    # Directory where each worker publishes its metrics so any worker's /metrics
+    # covers them all; python -m app.serve uses a temporary one with --workers > 1
+    METRICS_DIR: Optional[str] = None
+    METRICS_SNAPSHOT_SECONDS: float = 5
+    # Queries slower than this are logged with their queries.py name (0 = off)
+    SLOW_QUERY_MS: float = 200
+
+    # Archival: Completed tasks untouched this long move to tasks_archive (migration 006)
+    ARCHIVE_ENABLED: bool = True
+    ARCHIVE_AFTER_DAYS: float = 90
+    ARCHIVE_INTERVAL_SECONDS: float = 3600
+    ARCHIVE_BATCH_SIZE: int = 1000          # tasks moved per transaction
+
+    # Due-date reminders (migration 008): open tasks due within DUE_SOON_HOURS get
+    # a "due_soon" reminder, then an "overdue" one once the due date passes
+    DUE_REMINDERS_ENABLED: bool = True
+    DUE_SOON_HOURS: float = 24                # also the due_soon window of /tasks/stats
+    DUE_REMINDER_INTERVAL_SECONDS: float = 60
+    DUE_REMINDER_BATCH_SIZE: int = 500        # reminders claimed and delivered per transaction
+    DUE_REMINDER_MAX_BATCHES: int = 20        # per run; the rest waits for the next run
+    # "log" (stdout), "file" (NDJSON appended to DUE_REMINDER_FILE) or "package.module:factory"
+    DUE_REMINDER_NOTIFIER: str = "log"
+    DUE_REMINDER_FILE: str = "due_reminders.ndjson"
+
+    # GET /tasks/export: rows fetched from the server-side cursor (and encoded) per chunk
+    TASK_EXPORT_PREFETCH: int = 1000
 
     model_config = SettingsConfigDict(
         env_file=BASE_DIR / ".env",
@@ -0,0 +1,124 @@
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+Headers = List[Tuple[bytes, bytes]]
+
+DEFAULT_METHODS = ("GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS")
+
+
+class CORSMiddleware:
+    """
+    Pure ASGI CORS handling (one layer, no per-request task or body wrapping).
+
+    - Every OPTIONS request is answered here without entering routing: allowed
+      origins get the preflight headers (with Max-Age), other origins a 400, and
+      requests without an Origin the headers of the first allowed origin.
+    - Other requests from an allowed origin get Allow-Origin/Credentials/Expose
+      headers on whatever response the app sends, error responses included.
+
+    Header blocks are built once per allowed origin. allow_headers=("*",) echoes
+    the preflight's Access-Control-Request-Headers.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        allow_origins: Sequence[str],
+        allow_methods: Sequence[str] = DEFAULT_METHODS,
+        allow_headers: Sequence[str] = ("*",),
+        expose_headers: Sequence[str] = (),
+        allow_credentials: bool = True,
+        max_age: int = 86400,
+    ):
+        self.app = app
+        self.echo_request_headers = "*" in allow_headers
+
+        common: Headers = [(b"access-control-allow-credentials", b"true")] if allow_credentials else []
+
+        simple: Headers = list(common)
+        if expose_headers:
+            simple.append((b"access-control-expose-headers", ", ".join(expose_headers).encode()))
+
+        preflight: Headers = common + [
+            (b"access-control-allow-methods", ", ".join(allow_methods).encode()),
+            (b"access-control-max-age", str(max_age).encode()),
+            (b"vary", b"Origin"),
+            (b"content-type", b"text/plain; charset=utf-8"),
+            (b"content-length", b"2"),
+        ]
+        if not self.echo_request_headers:
+            preflight.append((b"access-control-allow-headers", ", ".join(allow_headers).encode()))
+
+        self._simple: Dict[bytes, Headers] = {}
+        self._preflight: Dict[bytes, Headers] = {}
+        for origin in allow_origins:
+            allow_origin = [(b"access-control-allow-origin", origin.encode())]
+            self._simple[origin.encode()] = allow_origin + simple
+            self._preflight[origin.encode()] = allow_origin + preflight
+
+        self._default_preflight = self._preflight[allow_origins[0].encode()] if allow_origins else preflight
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        origin: Optional[bytes] = None
+        request_headers: Optional[bytes] = None
+        for name, value in scope["headers"]:
+            if name == b"origin":
+                origin = value
+            elif name == b"access-control-request-headers":
+                request_headers = value
+
+        if scope["method"] == "OPTIONS":
+            await self._preflight_response(send, origin, request_headers)
+            return
+
+        cors_headers = self._simple.get(origin) if origin is not None else None
+        if cors_headers is None:
+            # Same-origin / non-browser, or an origin the browser will block anyway
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_cors(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                message["headers"] = _add_vary_origin(list(message.get("headers", ()))) + cors_headers
+            await send(message)
+
+        await self.app(scope, receive, send_with_cors)
+
+    async def _preflight_response(self, send: Send, origin: Optional[bytes], request_headers: Optional[bytes]) -> None:
+        if origin is None:
+            headers = self._default_preflight
+        else:
+            headers = self._preflight.get(origin)
+            if headers is None:
+                body = b"Disallowed CORS origin"
+                await send({
+                    "type": "http.response.start",
+                    "status": 400,
+                    "headers": [
+                        (b"content-type", b"text/plain; charset=utf-8"),
+                        (b"content-length", str(len(body)).encode()),
+                        (b"vary", b"Origin"),
+                    ],
+                })
+                await send({"type": "http.response.body", "body": body})
+                return
+
+        if self.echo_request_headers and request_headers:
+            headers = headers + [(b"access-control-allow-headers", request_headers)]
+
+        await send({"type": "http.response.start", "status": 200, "headers": headers})
+        await send({"type": "http.response.body", "body": b"OK"})
+
+
+def _add_vary_origin(headers: Headers) -> Headers:
+    for i, (name, value) in enumerate(headers):
+        if name.lower() == b"vary":
+            headers[i] = (name, value + b", Origin")
+            return headers
+    headers.append((b"vary", b"Origin"))
+    return headers
@@ -0,0 +1,294 @@
+"""
+In-process metrics rendered in the Prometheus text format (GET /metrics).
+
+Deliberately small: counters, histograms and callback gauges keyed by label
+tuples, updated from the event loop only (no locks). Every worker process
+keeps its own numbers. A scrape reaches whichever worker accepts it, so with
+several workers (python -m app.serve) each one also writes a snapshot to
+METRICS_DIR every METRICS_SNAPSHOT_SECONDS, and /metrics answers with its own
+live numbers plus the other workers' latest snapshots, summed (gauges
+included). Without METRICS_DIR the numbers are only those of the answering
+process, which is meaningful with a single worker only.
+"""
+import asyncio
+import logging
+import os
+import time
+from bisect import bisect_left
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import orjson
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.database import queries
+
+logger = logging.getLogger("app.database.slow_queries")
+
+HTTP_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DB_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+Labels = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _label_text(names: Sequence[str], values: Labels, extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        self.values: Dict[Labels, float] = {}
+
+    def inc(self, labels: Labels = (), amount: float = 1) -> None:
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def collect(self) -> Dict[Labels, float]:
+        return dict(self.values)
+
+    @staticmethod
+    def merge(a: float, b: float) -> float:
+        return a + b
+
+    def samples(self, values: Dict[Labels, float]) -> List[str]:
+        return [f"{self.name}{_label_text(self.labelnames, k)} {v}" for k, v in values.items()]
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = HTTP_BUCKETS):
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # labels -> [per-bucket counts (+Inf last), sum]
+        self.values: Dict[Labels, list] = {}
+
+    def observe(self, labels: Labels, value: float) -> None:
+        entry = self.values.get(labels)
+        if entry is None:
+            entry = self.values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+        entry[0][bisect_left(self.buckets, value)] += 1
+        entry[1] += value
+
+    def collect(self) -> Dict[Labels, list]:
+        return {labels: [list(counts), total] for labels, (counts, total) in self.values.items()}
+
+    @staticmethod
+    def merge(a: list, b: list) -> list:
+        return [[x + y for x, y in zip(a[0], b[0])], a[1] + b[1]]
+
+    def samples(self, values: Dict[Labels, list]) -> List[str]:
+        lines = []
+        for labels, (counts, total) in values.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                le_label = f'le="{le}"'
+                lines.append(f"{self.name}_bucket{_label_text(self.labelnames, labels, le_label)} {cumulative}")
+            lines.append(f"{self.name}_sum{_label_text(self.labelnames, labels)} {total}")
+            lines.append(f"{self.name}_count{_label_text(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+class GaugeFunc:
+    """Value read from a callback at scrape time (kind="counter" for running totals kept elsewhere)."""
+
+    def __init__(self, name: str, help: str, fn: Callable[[], float], kind: str = "gauge"):
+        self.name, self.help, self.fn, self.kind = name, help, fn, kind
+
+    def collect(self) -> Dict[Labels, float]:
+        return {(): self.fn()}
+
+    @staticmethod
+    def merge(a: float, b: float) -> float:
+        return a + b
+
+    def samples(self, values: Dict[Labels, float]) -> List[str]:
+        return [f"{self.name} {v}" for v in values.values()]
+
+
+class Registry:
+    def __init__(self):
+        self.metrics: list = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def snapshot(self) -> dict:
+        """This process's values, JSON-ready: {name: [[labels, value], ...]}."""
+        return {m.name: [[list(k), v] for k, v in m.collect().items()] for m in self.metrics}
+
+    def render(self, snapshots: Iterable[dict] = ()) -> str:
+        """Text format of this process's values plus those in `snapshots`, summed."""
+        snapshots = list(snapshots)
+        lines = []
+        for m in self.metrics:
+            values = m.collect()
+            for snapshot in snapshots:
+                for labels, value in snapshot.get(m.name, ()):
+                    labels = tuple(labels)
+                    values[labels] = m.merge(values[labels], value) if labels in values else value
+            lines.append(f"# HELP {m.name} {m.help}")
+            lines.append(f"# TYPE {m.name} {m.kind}")
+            lines.extend(m.samples(values))
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+# ================= HTTP =================
+http_requests = registry.register(Counter(
+    "http_requests_total", "HTTP requests by route template and status", ("method", "route", "status")
+))
+http_duration = registry.register(Histogram(
+    "http_request_duration_seconds", "Time until the response headers were sent", ("method", "route")
+))
+
+# ================= DATABASE =================
+db_query_duration = registry.register(Histogram(
+    "db_query_duration_seconds", "Query latency by queries.py constant name", ("query",), DB_BUCKETS
+))
+db_query_rows = registry.register(Counter(
+    "db_query_rows_total", "Rows returned or affected by query name", ("query",)
+))
+db_query_errors = registry.register(Counter(
+    "db_query_errors_total", "Queries that raised, by query name", ("query",)
+))
+db_pool_acquire_wait = registry.register(Histogram(
+    "db_pool_acquire_wait_seconds", "Time spent waiting for a primary pool connection", (), DB_BUCKETS
+))
+db_listener_restarts = registry.register(Counter(
+    "db_listener_restarts_total", "LISTEN connections re-opened after a failure, by channel", ("channel",)
+))
+db_listener_callback_errors = registry.register(Counter(
+    "db_listener_callback_errors_total", "NOTIFY payloads whose handler raised, by channel", ("channel",)
+))
+
+# ================= AUTH =================
+rate_limit_decisions = registry.register(Counter(
+    "rate_limit_decisions_total", "Rate limiter checks by scope and result (allowed/rejected)", ("scope", "result")
+))
+
+# ================= BACKGROUND JOBS =================
+scheduled_job_runs = registry.register(Counter(
+    "scheduled_job_runs_total", "Scheduled job runs by job and result (ok/skipped/failed)", ("job", "result")
+))
+due_reminders_sent = registry.register(Counter(
+    "due_reminders_sent_total", "Due-date reminders delivered by kind (due_soon/overdue)", ("kind",)
+))
+
+# ================= WORKER SNAPSHOTS (METRICS_DIR) =================
+def _snapshot_path(pid: Optional[int] = None) -> Path:
+    return Path(settings.METRICS_DIR) / f"{pid or os.getpid()}.json"
+
+
+def _write_file(path: Path, data: bytes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)   # readers never see a half-written snapshot
+
+
+async def write_snapshot() -> None:
+    """Scheduled job: publish this worker's values for the others' scrapes."""
+    data = orjson.dumps(registry.snapshot())   # collected on the event loop
+    await asyncio.to_thread(_write_file, _snapshot_path(), data)
+
+
+def remove_snapshot() -> None:
+    try:
+        _snapshot_path().unlink()
+    except FileNotFoundError:
+        pass
+
+
+def read_snapshots() -> List[dict]:
+    """The other workers' snapshots; files not refreshed lately (dead workers) are skipped."""
+    own = _snapshot_path()
+    oldest = time.time() - 3 * settings.METRICS_SNAPSHOT_SECONDS
+    snapshots = []
+    for path in Path(settings.METRICS_DIR).glob("*.json"):
+        try:
+            if path == own or path.stat().st_mtime < oldest:
+                continue
+            snapshots.append(orjson.loads(path.read_bytes()))
+        except (OSError, orjson.JSONDecodeError):
+            continue   # removed or replaced while reading
+    return snapshots
+
+
+# SQL text -> constant name in queries.py ("other" for anything else)
+QUERY_NAMES: Dict[str, str] = {
+    value: name for name, value in vars(queries).items()
+    if name.endswith("_SQL") and isinstance(value, str)
+}
+
+
+def query_name(query: str) -> str:
+    return QUERY_NAMES.get(query, "other")
+
+
+def observe_query(query: str, seconds: float, rows: int, failed: bool = False) -> None:
+    name = query_name(query)
+    labels = (name,)
+    db_query_duration.observe(labels, seconds)
+    if failed:
+        db_query_errors.inc(labels)
+    else:
+        db_query_rows.inc(labels, rows)
+
+    if settings.SLOW_QUERY_MS and seconds * 1000 >= settings.SLOW_QUERY_MS:
+        logger.warning("slow query %s: %.1f ms, %d rows%s", name, seconds * 1000, rows, " (failed)" if failed else "")
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI request timing. Routes are labelled by their path template
+    (e.g. /tasks/{task_id}) so cardinality stays bounded; requests that match
+    no route are labelled "unmatched". Streaming responses (SSE, exports) are
+    timed to their first byte, not to the end of the stream.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status: Optional[int] = None
+
+        async def send_timed(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                self._record(scope, status, time.perf_counter() - start)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_timed)
+        finally:
+            if status is None:   # raised before responding: the error handler answers 500
+                self._record(scope, 500, time.perf_counter() - start)
+
+    @staticmethod
+    def _record(scope: Scope, status: int, seconds: float) -> None:
+        route = scope.get("route")
+        template = getattr(route, "path", None) or "unmatched"
+        method = scope["method"]
+        http_requests.inc((method, template, str(status)))
+        http_duration.observe((method, template), seconds)
@@ -0,0 +1,58 @@
+import time
+from collections import OrderedDict
+from typing import Tuple
+
+from app.core.metrics import rate_limit_decisions
+
+
+class RateLimitBackend:
+    """
+    Token-bucket storage. take() refills the bucket for `key` at `rate` tokens
+    per second up to `burst`, then takes one token. It returns 0 when a token
+    was taken, else the seconds until one will be available.
+    """
+
+    async def take(self, key: str, rate: float, burst: float) -> float:
+        raise NotImplementedError
+
+
+class MemoryRateLimitBackend(RateLimitBackend):
+    """Per-process buckets; the least recently used are dropped past max_keys."""
+
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()   # key -> (tokens, at)
+
+    async def take(self, key: str, rate: float, burst: float) -> float:
+        return self.take_now(key, rate, burst)
+
+    def take_now(self, key: str, rate: float, burst: float) -> float:
+        now = time.monotonic()
+        tokens, at = self._buckets.pop(key, (burst, now))
+        tokens = min(burst, tokens + (now - at) * rate)
+
+        wait = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            wait = (1 - tokens) / rate
+
+        self._buckets[key] = (tokens, now)
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return wait
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+class RateLimiter:
+    """Limits per (scope, key) on one backend; decisions are counted per scope on /metrics."""
+
+    def __init__(self, backend: RateLimitBackend):
+        self.backend = backend
+
+    async def hit(self, scope: str, key: str, per_minute: float, burst: int) -> float:
+        wait = await self.backend.take(f"{scope}:{key}", per_minute / 60, burst)
+        rate_limit_decisions.inc((scope, "rejected" if wait else "allowed"))
+        return wait
@@ -1,10 +1,22 @@
-from datetime import datetime, timedelta
-from typing import Any, Union
-from jose import jwt
+import asyncio
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Optional, Tuple, Union
+from fastapi import HTTPException, status
 from passlib.context import CryptContext
 from app.core.config import settings
+from app.core.tokens import encode_token
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Pinning min/max to the configured cost makes needs_update() flag every hash
+# made with a different cost, so logins can transparently rehash them.
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__max_rounds=settings.BCRYPT_ROUNDS,
+)
 
 def truncate_password(password: str) -> str:
     password_bytes = password.encode('utf-8')
@@ -13,17 +25,75 @@ def truncate_password(password: str) -> str:
     return password
 
 def create_access_token(subject: Union[str, Any], role: str) -> str:
-    expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    expire = int(time.time()) + settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
     to_encode = {"exp": expire, "sub": str(subject), "role": role}
-    encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
-    return encoded_jwt
+    return encode_token(to_encode)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     # Always truncate before verifying
     safe_password = truncate_password(plain_password)
     return pwd_context.verify(safe_password, hashed_password)
 
+def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    # Returns (valid, new_hash); new_hash is set when the stored hash uses an outdated cost
+    safe_password = truncate_password(plain_password)
+    return pwd_context.verify_and_update(safe_password, hashed_password)
+
 def get_password_hash(password: str) -> str:
     # Always truncate before hashing
     safe_password = truncate_password(password)
-    return pwd_context.hash(safe_password)
\ No newline at end of file
+    return pwd_context.hash(safe_password)
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt on a bounded worker pool so it never blocks the event loop.
+    Once PASSWORD_HASH_MAX_QUEUE jobs are in flight new requests fail fast with 503.
+    """
+
+    def __init__(self):
+        self._executor: Optional[Executor] = None
+        self.in_flight = 0
+        self.rejected = 0
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            workers = settings.PASSWORD_HASH_WORKERS or os.cpu_count() or 1
+            if settings.PASSWORD_HASH_EXECUTOR == "process":
+                self._executor = ProcessPoolExecutor(max_workers=workers)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        return self._executor
+
+    async def _run(self, fn, *args):
+        if self.in_flight >= settings.PASSWORD_HASH_MAX_QUEUE:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Authentication is busy, please retry",
+                headers={"Retry-After": "1"},
+            )
+
+        self.in_flight += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), fn, *args)
+        finally:
+            self.in_flight -= 1
+
+    async def hash(self, password: str) -> str:
+        return await self._run(get_password_hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run(verify_password, plain_password, hashed_password)
+
+    async def verify_and_update(self, plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        return await self._run(verify_and_update_password, plain_password, hashed_password)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+password_hasher = PasswordHasher()
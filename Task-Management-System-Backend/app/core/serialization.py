@@ -0,0 +1,64 @@
+import csv
+import io
+from datetime import datetime
+from functools import lru_cache
+from typing import Iterable, Optional, Tuple, Type
+
+import orjson
+from fastapi import Response
+from pydantic import BaseModel
+
+
+@lru_cache(maxsize=None)
+def row_fields(model: Type[BaseModel]) -> Tuple[str, ...]:
+    return tuple(model.model_fields)
+
+
+def dump_rows(rows: Iterable, fields: Tuple[str, ...]) -> bytes:
+    """Encode rows (asyncpg Records or dicts) as a JSON array of `fields` objects."""
+    return orjson.dumps([{f: row[f] for f in fields} for row in rows])
+
+
+def dump_ndjson(rows: Iterable, fields: Tuple[str, ...]) -> bytes:
+    """One JSON object per line, same shape as dump_rows items."""
+    return b"".join(orjson.dumps({f: row[f] for f in fields}) + b"\n" for row in rows)
+
+
+def _csv_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.isoformat()   # same text as the JSON endpoints
+    return value
+
+
+def dump_csv(rows: Iterable, fields: Tuple[str, ...], header: bool = False) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(fields)
+    writer.writerows([_csv_value(row[f]) for f in fields] for row in rows)
+    return buffer.getvalue().encode()
+
+
+class RowListResponse(Response):
+    """
+    JSON array built straight from database rows.
+
+    List endpoints return this instead of model instances so each row is
+    encoded once by orjson, skipping per-row model construction and
+    FastAPI's response_model validation. Only the fields of `model` are
+    emitted, in its order, so the output matches `List[model]` on the wire;
+    `model` stays the route's response_model for the OpenAPI schema.
+    """
+
+    media_type = "application/json"
+
+    def __init__(
+        self,
+        rows: Iterable,
+        model: Type[BaseModel],
+        status_code: int = 200,
+        headers: Optional[dict] = None,
+    ):
+        super().__init__(dump_rows(rows, row_fields(model)), status_code, headers)
@@ -0,0 +1,200 @@
+"""
+Access-token signing and verification (compact JWS).
+
+ALGORITHM selects the signing scheme:
+
+- HS256 / HS384 / HS512: shared SECRET_KEY, as before. Nothing is published.
+- RS256 / EdDSA: private keys are read once from JWT_KEYS_DIR, where each
+  `<kid>.pem` file is one key and the file name is its `kid`. The active key
+  signs: JWT_ACTIVE_KID, which must be set as soon as there is more than one
+  private key. Every key in the directory verifies and is published on
+  /.well-known/jwks.json. To rotate, publish first and activate later: deploy
+  the new file everywhere with JWT_ACTIVE_KID still naming the old key, then
+  point JWT_ACTIVE_KID at the new one, and delete the old file once
+  ACCESS_TOKEN_EXPIRE_MINUTES have passed. Otherwise instances not yet
+  restarted would reject tokens signed with a key they have never loaded.
+
+Verified tokens are remembered, keyed by a SHA-256 of the token, in a bounded
+per-process LRU until their `exp`. A client repeating the same bearer token
+skips the parse and signature check.
+"""
+import base64
+import hashlib
+import hmac
+import time
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import orjson
+from cryptography.exceptions import InvalidSignature
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ed25519, padding, rsa
+
+from app.core.cache import TTLCache
+from app.core.config import BASE_DIR, settings
+
+HMAC_HASHES = {"HS256": hashlib.sha256, "HS384": hashlib.sha384, "HS512": hashlib.sha512}
+ASYMMETRIC_ALGORITHMS = ("RS256", "EdDSA")
+
+
+class TokenError(Exception):
+    """Malformed, badly signed, expired or unknown-key token."""
+
+
+def _b64encode(data: bytes) -> bytes:
+    return base64.urlsafe_b64encode(data).rstrip(b"=")
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+def _int_b64(value: int) -> str:
+    return _b64encode(value.to_bytes((value.bit_length() + 7) // 8, "big")).decode()
+
+
+# ================= KEYS =================
+class SigningKey:
+    """One key and its kid. `private` is None for verify-only (public) keys."""
+
+    def __init__(self, kid: Optional[str], alg: str, private=None, public=None, secret: bytes = b""):
+        self.kid, self.alg = kid, alg
+        self.private, self.public, self.secret = private, public, secret
+
+        header = {"alg": alg, "typ": "JWT"}
+        if kid is not None:
+            header["kid"] = kid
+        # The encoded header never changes, so tokens are signed as header + payload
+        self.encoded_header = _b64encode(orjson.dumps(header))
+
+    def sign(self, signing_input: bytes) -> bytes:
+        if self.alg in HMAC_HASHES:
+            return hmac.new(self.secret, signing_input, HMAC_HASHES[self.alg]).digest()
+        if self.alg == "RS256":
+            return self.private.sign(signing_input, padding.PKCS1v15(), hashes.SHA256())
+        return self.private.sign(signing_input)
+
+    def verify(self, signature: bytes, signing_input: bytes) -> bool:
+        if self.alg in HMAC_HASHES:
+            return hmac.compare_digest(signature, self.sign(signing_input))
+        try:
+            if self.alg == "RS256":
+                self.public.verify(signature, signing_input, padding.PKCS1v15(), hashes.SHA256())
+            else:
+                self.public.verify(signature, signing_input)
+        except InvalidSignature:
+            return False
+        return True
+
+    def jwk(self) -> dict:
+        if self.alg == "RS256":
+            numbers = self.public.public_numbers()
+            key = {"kty": "RSA", "n": _int_b64(numbers.n), "e": _int_b64(numbers.e)}
+        else:
+            raw = self.public.public_bytes(serialization.Encoding.Raw, serialization.PublicFormat.Raw)
+            key = {"kty": "OKP", "crv": "Ed25519", "x": _b64encode(raw).decode()}
+        return {**key, "kid": self.kid, "alg": self.alg, "use": "sig"}
+
+
+def load_pem_key(kid: str, path: Path) -> SigningKey:
+    data = path.read_bytes()
+    try:
+        private = serialization.load_pem_private_key(data, password=None)
+        public = private.public_key()
+    except ValueError:
+        private, public = None, serialization.load_pem_public_key(data)
+
+    if isinstance(public, rsa.RSAPublicKey):
+        alg = "RS256"
+    elif isinstance(public, ed25519.Ed25519PublicKey):
+        alg = "EdDSA"
+    else:
+        raise ValueError(f"{path.name}: only RSA and Ed25519 keys are supported")
+    return SigningKey(kid, alg, private, public)
+
+
+class KeyRing:
+    """The active signing key plus every key accepted for verification, by kid."""
+
+    def __init__(self, active: SigningKey, keys: List[SigningKey]):
+        self.active = active
+        self.by_kid: Dict[Optional[str], SigningKey] = {k.kid: k for k in keys}
+        # Served as-is by the JWKS endpoint
+        self.jwks = {"keys": [k.jwk() for k in keys if k.alg in ASYMMETRIC_ALGORITHMS]}
+
+    @classmethod
+    def from_settings(cls) -> "KeyRing":
+        alg = settings.ALGORITHM
+        if alg in HMAC_HASHES:
+            key = SigningKey(None, alg, secret=settings.SECRET_KEY.encode())
+            return cls(key, [key])
+
+        if alg not in ASYMMETRIC_ALGORITHMS:
+            raise ValueError(f"Unsupported ALGORITHM {alg!r}")
+        if not settings.JWT_KEYS_DIR:
+            raise ValueError(f"ALGORITHM={alg} needs JWT_KEYS_DIR")
+
+        directory = BASE_DIR / settings.JWT_KEYS_DIR
+        keys = [load_pem_key(path.stem, path) for path in sorted(directory.glob("*.pem"))]
+        signers = [k for k in keys if k.private is not None and k.alg == alg]
+        if settings.JWT_ACTIVE_KID:
+            signers = [k for k in signers if k.kid == settings.JWT_ACTIVE_KID]
+        elif len(signers) > 1:
+            # A newly added key must not start signing before every instance has loaded it
+            raise ValueError(
+                f"{len(signers)} {alg} private keys in {directory}: set JWT_ACTIVE_KID to the one that signs"
+            )
+        if not signers:
+            raise ValueError(f"No {alg} private key {settings.JWT_ACTIVE_KID or ''} in {directory}")
+        return cls(signers[0], keys)
+
+
+@lru_cache(maxsize=None)
+def get_key_ring() -> KeyRing:
+    return KeyRing.from_settings()
+
+
+# ================= TOKENS =================
+# sha256(token) -> verified payload, kept until the token's exp
+verified_tokens = TTLCache(settings.JWT_VERIFIED_CACHE_SIZE, settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60)
+
+
+def encode_token(claims: dict) -> str:
+    key = get_key_ring().active
+    signing_input = key.encoded_header + b"." + _b64encode(orjson.dumps(claims))
+    return (signing_input + b"." + _b64encode(key.sign(signing_input))).decode()
+
+
+def decode_token(token: str) -> dict:
+    """Verified claims of `token`; raises TokenError."""
+    cache_key = hashlib.sha256(token.encode()).digest()
+    payload = verified_tokens.get(cache_key)
+    if payload is not None:
+        return payload
+
+    try:
+        encoded_header, encoded_payload, encoded_signature = token.split(".")
+        header = orjson.loads(_b64decode(encoded_header))
+        key = get_key_ring().by_kid.get(header.get("kid"))
+        signature = _b64decode(encoded_signature)
+    except (ValueError, TypeError, AttributeError, orjson.JSONDecodeError):
+        raise TokenError("Malformed token")
+
+    # alg must be the key's own: a token cannot pick a weaker check
+    if key is None or header.get("alg") != key.alg:
+        raise TokenError("Unknown signing key")
+    if not key.verify(signature, f"{encoded_header}.{encoded_payload}".encode()):
+        raise TokenError("Bad signature")
+
+    try:
+        payload = orjson.loads(_b64decode(encoded_payload))
+        exp = payload["exp"]
+        remaining = exp - time.time()
+    except (ValueError, TypeError, KeyError, orjson.JSONDecodeError):
+        raise TokenError("Malformed claims")
+    if remaining <= 0:
+        raise TokenError("Token expired")
+
+    verified_tokens.set(cache_key, payload, ttl=remaining)
+    return payload
@@ -8,5 +8,11 @@ class BaseDAO:
     async def fetch_all(self, query, *args):
         return await db.fetch_all(query, *args)
 
+    async def read_one(self, query, *args):
+        return await db.read_one(query, *args)
+
+    async def read_all(self, query, *args):
+        return await db.read_all(query, *args)
+
     async def execute(self, query, *args):
         return await db.execute(query, *args)
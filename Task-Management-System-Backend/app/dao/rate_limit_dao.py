@@ -0,0 +1,24 @@
+import time
+
+from app.core.rate_limit import RateLimitBackend
+from app.database.database import db
+from app.database.queries import TAKE_RATE_LIMIT_TOKEN_SQL, DELETE_FULL_RATE_LIMIT_BUCKETS_SQL
+
+# How often one worker sweeps out refilled buckets
+CLEANUP_INTERVAL_SECONDS = 300
+
+
+class RateLimitDAO(RateLimitBackend):
+    """Buckets shared by every worker and instance (rate_limit_buckets, migration 007)."""
+
+    def __init__(self):
+        self._next_cleanup = 0.0
+
+    async def take(self, key: str, rate: float, burst: float) -> float:
+        row = await db.fetch_one(TAKE_RATE_LIMIT_TOKEN_SQL, key, rate, burst)
+
+        if time.monotonic() >= self._next_cleanup:
+            self._next_cleanup = time.monotonic() + CLEANUP_INTERVAL_SECONDS
+            await db.execute(DELETE_FULL_RATE_LIMIT_BUCKETS_SQL)
+
+        return 0.0 if row["allowed"] else (1 - row["tokens"]) / rate
@@ -1,17 +1,50 @@
-from typing import Optional, List
-from datetime import datetime, timezone
+from typing import AsyncIterator, Optional, List, Set, Tuple
+from asyncpg import Record
+from datetime import datetime, timedelta, timezone
 
 from app.database.database import db
-from app.schemas.task_schema import TaskCreate, TaskUpdate, TaskResponse
+from app.models.enums.TaskStatus import TaskStatus
+from app.models.task_model import DueReminder, Task
+from app.schemas.task_schema import (
+    TaskCreate, TaskUpdate, TaskFilter, TaskListFilter, TaskStatusUpdateItem, TaskAutoAssignItem
+)
 from app.database.queries import (
     CREATE_TASK_SQL,
+    CREATE_TASK_FOR_EMPLOYEE_SQL,
     GET_ALL_TASKS_SQL,
+    EXPORT_TASKS_SQL,
+    SEARCH_TASKS_SQL,
+    SEARCH_TASKS_FUZZY_SQL,
     GET_TASK_BY_ID_SQL,
     UPDATE_TASK_SQL,
+    UPDATE_TASK_STATUS_SQL,
     GET_TASKS_BY_USER_SQL,
     DELETE_TASK_SQL,
+    BULK_UPDATE_TASK_STATUS_SQL,
+    GET_TASK_COUNTS_SQL,
+    GET_USER_TASK_COUNTS_SQL,
+    GET_TASKS_VERSION_SQL,
+    GET_USER_TASKS_VERSION_SQL,
+    GET_TASK_COMPLETION_BUCKETS_SQL,
+    GET_ALL_TASKS_WITH_ARCHIVE_SQL,
+    GET_TASKS_BY_USER_WITH_ARCHIVE_SQL,
+    GET_TASK_BY_ID_WITH_ARCHIVE_SQL,
+    EXPORT_TASKS_WITH_ARCHIVE_SQL,
+    GET_ARCHIVE_OLDEST_SQL,
+    ARCHIVE_TASKS_BATCH_SQL,
+    SET_ARCHIVING_SQL,
+    NOTIFY_TASKS_ARCHIVED_SQL,
+    ARCHIVE_PARTITION_DDL,
+    GET_EMPLOYEE_LOADS_SQL,
+    CREATE_TASKS_UNNEST_SQL,
+    CLAIM_DUE_REMINDERS_SQL,
 )
 
+# pg_advisory_lock key for archiver runs (see app/database/migrations.py for 720_001)
+ARCHIVE_LOCK_ID = 720_002
+# ... and for due-date reminder runs (taken by the scheduler)
+DUE_REMINDER_LOCK_ID = 720_003
+
 class TaskDAO:
 
     def _to_naive(self, dt):
@@ -19,14 +52,26 @@ class TaskDAO:
             return dt.replace(tzinfo=None)
         return dt
 
-    async def create(self, task_in: TaskCreate) -> TaskResponse:
+    def _task_or_none(self, row) -> Optional[Task]:
+        # Checked mutations return one row whose task columns are NULL when
+        # nothing was written; the extra diagnostic columns are ignored here
+        if row["id"] is None:
+            return None
+        return Task.from_row(row)
+
+    async def create(self, task_in: TaskCreate) -> Tuple[Optional[Task], Optional[str]]:
+        """
+        Insert the task only if the assignee is an employee.
+        Returns (task, assignee_role); task is None when the check failed and
+        assignee_role is None when the assignee does not exist.
+        """
 
         now = datetime.now(timezone.utc).replace(tzinfo=None)
 
         due_date = self._to_naive(task_in.due_date)
 
         row = await db.fetch_one(
-            CREATE_TASK_SQL,
+            CREATE_TASK_FOR_EMPLOYEE_SQL,
             task_in.title,
             task_in.description,
             task_in.assigned_to_id,   # 🔥 employee id
@@ -36,17 +81,125 @@ class TaskDAO:
             now
         )
 
-        return TaskResponse(**dict(row))
+        return self._task_or_none(row), row["assignee_role"]
+
+    def transaction(self):
+        return db.transaction()
+
+    async def create_many(self, tasks: List[TaskCreate]) -> List[Task]:
+        # Pipelined inserts on one connection; rows come back in input order
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+
+        rows = await db.fetch_many(
+            CREATE_TASK_SQL,
+            [
+                (
+                    t.title,
+                    t.description,
+                    t.assigned_to_id,
+                    self._to_naive(t.due_date),
+                    t.status,
+                    now,
+                    now
+                )
+                for t in tasks
+            ]
+        )
+
+        return [Task.from_row(r) for r in rows]
+
+    async def get_employee_loads(
+        self, now: datetime, horizon_seconds: float, employee_ids: Optional[List[int]] = None
+    ) -> List[Record]:
+        # Read-only; slightly stale loads (a replica) only nudge the balance
+        return await db.read_all(GET_EMPLOYEE_LOADS_SQL, now, horizon_seconds, employee_ids)
+
+    async def insert_pending(
+        self, tasks: List[TaskAutoAssignItem], assignees: List[int], now: datetime
+    ) -> List[int]:
+        # One statement for the whole batch; ids in input order
+        rows = await db.fetch_all(
+            CREATE_TASKS_UNNEST_SQL,
+            [t.title for t in tasks],
+            [t.description for t in tasks],
+            assignees,
+            [self._to_naive(t.due_date) for t in tasks],
+            now
+        )
+        return sorted(r["id"] for r in rows)
+
+    async def update_status_many(
+        self, items: List[TaskStatusUpdateItem], assigned_user: Optional[int] = None
+    ) -> Set[int]:
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+
+        rows = await db.fetch_all(
+            BULK_UPDATE_TASK_STATUS_SQL,
+            [i.id for i in items],
+            [i.status.value for i in items],
+            assigned_user,
+            now
+        )
+
+        return {r["id"] for r in rows}
+
+    async def get_all(
+        self, filters: TaskListFilter, limit: int, after: Optional[int] = None
+    ) -> List[Record]:
+        # Raw rows: list endpoints serialize them directly (see RowListResponse)
+        return await db.read_all(
+            GET_ALL_TASKS_WITH_ARCHIVE_SQL if filters.include_archived else GET_ALL_TASKS_SQL,
+            after,
+            filters.status,
+            filters.assigned_to_id,
+            self._to_naive(filters.due_after),
+            self._to_naive(filters.due_before),
+            limit
+        )
+
+    def iter_all(self, filters: TaskListFilter, batch_size: int) -> AsyncIterator[List[Record]]:
+        """Every matching task in id order, in batches from a server-side cursor."""
+        return db.read_batches(
+            EXPORT_TASKS_WITH_ARCHIVE_SQL if filters.include_archived else EXPORT_TASKS_SQL,
+            filters.status,
+            filters.assigned_to_id,
+            self._to_naive(filters.due_after),
+            self._to_naive(filters.due_before),
+            batch_size=batch_size
+        )
 
-    async def get_all(self) -> List[TaskResponse]:
-        rows = await db.fetch_all(GET_ALL_TASKS_SQL)
-        return [TaskResponse(**dict(r)) for r in rows]
+    async def search(
+        self,
+        q: str,
+        fuzzy: bool,
+        assigned_user: Optional[int],
+        limit: int,
+        after: Optional[Tuple[float, int]] = None
+    ) -> List[Record]:
+        """Ranked matches (best first) with a `score` column; `after` is the last (score, id) seen."""
+        after_score, after_id = after or (None, None)
+        return await db.read_all(
+            SEARCH_TASKS_FUZZY_SQL if fuzzy else SEARCH_TASKS_SQL,
+            q,
+            assigned_user,
+            after_score,
+            after_id,
+            limit
+        )
 
-    async def get_by_id(self, task_id: int) -> Optional[TaskResponse]:
-        row = await db.fetch_one(GET_TASK_BY_ID_SQL, task_id)
-        return TaskResponse(**dict(row)) if row else None
+    async def get_by_id(self, task_id: int, include_archived: bool = False) -> Optional[Task]:
+        row = await db.read_one(
+            GET_TASK_BY_ID_WITH_ARCHIVE_SQL if include_archived else GET_TASK_BY_ID_SQL, task_id
+        )
+        return Task.from_row(row) if row else None
 
-    async def update(self, task_id: int, task_update: TaskUpdate) -> Optional[TaskResponse]:
+    async def update(
+        self, task_id: int, task_update: TaskUpdate
+    ) -> Tuple[Optional[Task], bool, Optional[str]]:
+        """
+        Update in one statement, refusing reassignment to a non-employee.
+        Returns (task, task_exists, assignee_role); task is None when nothing was updated.
+        """
 
         now = datetime.now(timezone.utc).replace(tzinfo=None)
         due_date = self._to_naive(task_update.due_date)
@@ -62,13 +215,93 @@ class TaskDAO:
         task_id                      
         )
 
-        return TaskResponse(**dict(row)) if row else None
+        return self._task_or_none(row), row["task_exists"], row["assignee_role"]
+
+    async def update_status(
+        self, task_id: int, user_id: int, status: TaskStatus
+    ) -> Tuple[Optional[Task], bool]:
+        """
+        Change status only if the task is assigned to user_id.
+        Returns (task, task_exists); task is None when nothing was updated.
+        """
+
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+
+        row = await db.fetch_one(UPDATE_TASK_STATUS_SQL, status, now, task_id, user_id)
+
+        return self._task_or_none(row), row["task_exists"]
+
+    async def get_task_by_user_id(
+        self, user_id: int, filters: TaskFilter, limit: int, after: Optional[int] = None
+    ) -> List[Record]:
+        return await db.read_all(
+            GET_TASKS_BY_USER_WITH_ARCHIVE_SQL if filters.include_archived else GET_TASKS_BY_USER_SQL,
+            user_id,
+            after,
+            filters.status,
+            self._to_naive(filters.due_after),
+            self._to_naive(filters.due_before),
+            limit
+        )
+
+    async def get_version_seed(self, user_id: Optional[int] = None):
+        """(max_updated_at, total) of all tasks, or of one user's tasks."""
+        # From the primary: the seed is cached until the next change event, so a
+        # lagging replica's answer would keep serving 304 for stale data
+        if user_id is None:
+            return await db.read_one_primary(GET_TASKS_VERSION_SQL)
+        return await db.read_one_primary(GET_USER_TASKS_VERSION_SQL, user_id)
+
+    async def get_counts(self, due_soon: timedelta):
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        return await db.read_all(GET_TASK_COUNTS_SQL, now, now + due_soon)
+
+    async def get_user_counts(self, user_id: int, due_soon: timedelta):
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        return await db.read_all(GET_USER_TASK_COUNTS_SQL, now, now + due_soon, user_id)
+
+    async def get_completion_buckets(self, bucket: str, periods: int):
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        return await db.read_all(GET_TASK_COMPLETION_BUCKETS_SQL, bucket, now, periods)
+
+    async def delete(self, task_id: int) -> bool:
+        row = await db.fetch_one(DELETE_TASK_SQL, task_id)
+        return row is not None
+
+    # ================= ARCHIVAL =================
+    def archive_lock(self):
+        """Async context manager yielding True if this session may run the archiver."""
+        return db.advisory_lock(ARCHIVE_LOCK_ID)
+
+    async def get_archive_oldest(self, cutoff: datetime) -> Optional[datetime]:
+        row = await db.fetch_one(GET_ARCHIVE_OLDEST_SQL, cutoff)
+        return row["oldest"]
+
+    async def ensure_archive_partitions(self, start: datetime, end: datetime) -> None:
+        """Create the monthly tasks_archive partitions covering [start, end]."""
+        month = start.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        while month <= end:
+            next_month = (month + timedelta(days=32)).replace(day=1)
+            await db.execute(ARCHIVE_PARTITION_DDL.format(
+                name=f"tasks_archive_{month:%Y_%m}", start=month.date(), end=next_month.date()
+            ))
+            month = next_month
+
+    async def archive_batch(self, cutoff: datetime, limit: int) -> int:
+        """Move up to `limit` archivable tasks in one transaction; returns how many moved."""
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        async with db.transaction():
+            await db.execute(SET_ARCHIVING_SQL)
+            row = await db.fetch_one(ARCHIVE_TASKS_BATCH_SQL, cutoff, limit, now)
+        return row["moved"]
+
+    async def notify_archived(self, count: int) -> None:
+        await db.execute(NOTIFY_TASKS_ARCHIVED_SQL, count)
 
-    async def get_task_by_user_id(self, user_id: int) -> List[TaskResponse]:
-        rows = await db.fetch_all(GET_TASKS_BY_USER_SQL, user_id)
-        return [TaskResponse(**dict(r)) for r in rows]
+    async def claim_due_reminders(self, now: datetime, due_soon_until: datetime, limit: int) -> List[DueReminder]:
+        # Call inside transaction(): the claim only sticks if it commits
+        rows = await db.fetch_all(CLAIM_DUE_REMINDERS_SQL, now, due_soon_until, limit)
+        return [DueReminder.from_row(r) for r in rows]
 
-    async def delete(self, task_id: int) -> None:
-        await db.execute(DELETE_TASK_SQL, task_id)
 
 task_dao = TaskDAO()
@@ -1,29 +1,125 @@
-from typing import Optional , List
+from typing import Optional , List, Dict
 from datetime import datetime
+from asyncpg import Record
+from app.core.batching import BatchLoader
+from app.core.cache import TTLCache
+from app.core.config import settings
 from app.database.database import db
-from app.models.user_model import User
-from app.database.queries import CREATE_USER_SQL, GET_USER_BY_EMAIL_SQL, GET_USER_BY_ID_SQL, GET_ALL_USERS_SQL
+from app.models.user_model import User, UserCredentials
+from app.database.queries import (
+    CREATE_USER_SQL,
+    GET_USER_BY_EMAIL_SQL,
+    GET_USER_BY_ID_SQL,
+    GET_USERS_BY_IDS_SQL,
+    GET_ALL_USERS_SQL,
+    GET_USER_ROLES_BY_IDS_SQL,
+    UPDATE_USER_PASSWORD_SQL,
+)
+
+
+# Shared by every UserDAO instance so writes through any of them invalidate it
+user_cache = TTLCache(settings.USER_CACHE_MAX_SIZE, settings.USER_CACHE_TTL_SECONDS)
+
+# Emails that had no account at their last login attempt (negative cache).
+# Kept in step across workers by the users_created channel (migration 009):
+# entries are only made while this process is listening on it.
+unknown_emails = TTLCache(settings.LOGIN_UNKNOWN_EMAIL_CACHE_SIZE, settings.LOGIN_UNKNOWN_EMAIL_TTL_SECONDS)
+
+USERS_CREATED_CHANNEL = "users_created"
+_users_created_listening = False
+_users_created_seen = 0   # a miss read before a users_created notification is not cached
+
+
+def on_user_created(email: str) -> None:
+    global _users_created_seen
+    _users_created_seen += 1
+    unknown_emails.pop(email)
+
+
+def on_users_created_connect() -> None:
+    # Notifications sent while disconnected are lost: start over
+    global _users_created_listening
+    unknown_emails.clear()
+    _users_created_listening = True
+
+
+def on_users_created_disconnect() -> None:
+    global _users_created_listening
+    _users_created_listening = False
+    unknown_emails.clear()
+
+
+async def _load_users(user_ids: List[int]) -> Dict[int, User]:
+    rows = await db.read_all(GET_USERS_BY_IDS_SQL, user_ids)
+    return {row["id"]: User.from_row(row) for row in rows}
+
+
+async def _load_users_primary(user_ids: List[int]) -> Dict[int, User]:
+    # A plain read: must not renew the caller's read-your-writes window
+    rows = await db.read_all_primary(GET_USERS_BY_IDS_SQL, user_ids)
+    return {row["id"]: User.from_row(row) for row in rows}
+
+
+# get_by_id coalescing; callers that must see their own recent writes share the primary one
+_loader_window = settings.USER_LOADER_WINDOW_MS / 1000
+user_loader = BatchLoader(_load_users, _loader_window, settings.USER_LOADER_MAX_BATCH)
+user_loader_primary = BatchLoader(_load_users_primary, _loader_window, settings.USER_LOADER_MAX_BATCH)
 
 
 class UserDAO:
     async def create(self, email: str, password_hash: str, role: str) -> User:
         now = datetime.now()
         row = await db.fetch_one(CREATE_USER_SQL, email, password_hash, role, now, now)
-        return User(**dict(row))
+        user = User.from_row(row)
+        user_cache.pop(user.id)
+        unknown_emails.pop(email)
+        return user
+
+    async def update_password(self, user_id: int, password_hash: str) -> None:
+        await db.execute(UPDATE_USER_PASSWORD_SQL, password_hash, datetime.now(), user_id)
+        user_cache.pop(user_id)
 
-    async def get_by_email(self, email: str) -> Optional[User]:
-        row = await db.fetch_one(GET_USER_BY_EMAIL_SQL, email)
-        if row: return User(**dict(row))
+    async def get_by_email(self, email: str) -> Optional[UserCredentials]:
+        row = await db.read_one(GET_USER_BY_EMAIL_SQL, email)
+        if row: return UserCredentials.from_row(row)
         return None
         
+    async def get_for_login(self, email: str) -> Optional[UserCredentials]:
+        """get_by_email that remembers misses for a while (login hot path)."""
+        if unknown_emails.get(email):
+            return None
+        seen = _users_created_seen
+        user = await self.get_by_email(email)
+        if user is None and _users_created_listening and seen == _users_created_seen:
+            unknown_emails.set(email, True)
+        return user
+
     async def get_by_id(self, user_id: int) -> Optional[User]:
-        row = await db.fetch_one(GET_USER_BY_ID_SQL, user_id)
-        if row: return User(**dict(row))
-        return None
+        # Inside a connection()/transaction() block the read must use that connection
+        if db.has_bound_connection():
+            row = await db.read_one(GET_USER_BY_ID_SQL, user_id)
+            if row: return User.from_row(row)
+            return None
+
+        loader = user_loader_primary if db.must_read_primary() else user_loader
+        return await loader.load(user_id)
+
+    async def get_cached_by_id(self, user_id: int) -> Optional[User]:
+        """get_by_id served from the per-process user cache (auth hot path)."""
+        user = user_cache.get(user_id)
+        if user is None:
+            user = await self.get_by_id(user_id)
+            if user is not None:
+                user_cache.set(user_id, user)
+        return user
     
-    async def get_all(self) -> List[User]:
-        rows = await db.fetch_all(GET_ALL_USERS_SQL)
-        return [User(**dict(row)) for row in rows]
+    async def get_roles_by_ids(self, user_ids: List[int]) -> Dict[int, str]:
+        rows = await db.read_all(GET_USER_ROLES_BY_IDS_SQL, list(user_ids))
+        return {row["id"]: row["role"] for row in rows}
+
+    async def get_all(self, limit: int, after: Optional[int] = None) -> List[Record]:
+        # Raw rows: serialized straight through UserResponse's fields
+        return await db.read_all(GET_ALL_USERS_SQL, after, limit)
 
 
-user_dao = UserDAO()
\ No newline at end of file
+user_dao = UserDAO()
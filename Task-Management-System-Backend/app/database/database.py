@@ -1,33 +1,458 @@
+import asyncio
+import logging
+import time
 import asyncpg
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import AsyncIterator, Callable, Dict, List, Optional
+
+from app.core.cache import TTLCache
 from app.core.config import settings
+from app.core.metrics import (
+    db_listener_callback_errors,
+    db_listener_restarts,
+    db_pool_acquire_wait,
+    observe_query,
+)
+from app.database import queries
+
+listener_logger = logging.getLogger("app.database.listener")
+
+# Connection bound to the current task by connection()/transaction(), if any.
+# Do not start concurrent tasks inside such a block: they would share it.
+_task_conn: ContextVar[Optional[asyncpg.Connection]] = ContextVar("_task_conn", default=None)
+
+# Read-your-writes: who is making the current request, and when it last wrote
+_session_key: ContextVar[Optional[str]] = ContextVar("_session_key", default=None)
+_wrote_at: ContextVar[Optional[float]] = ContextVar("_wrote_at", default=None)
+
+# Connection-level failures: a replica read is retried on the primary,
+# the LISTEN connection reconnects
+CONNECTION_ERRORS = (
+    OSError,
+    asyncio.TimeoutError,
+    asyncpg.PostgresConnectionError,
+    asyncpg.CannotConnectNowError,
+    asyncpg.InterfaceError,
+)
+
+# Hot read queries run once on each new pool connection, with arguments that
+# match nothing, so their prepared statements are already in the connection's
+# statement cache when the first request arrives
+WARM_QUERIES = [
+    (queries.GET_USER_BY_ID_SQL, (0,)),
+    (queries.GET_USERS_BY_IDS_SQL, ([],)),
+    (queries.GET_USER_BY_EMAIL_SQL, ("",)),
+    (queries.GET_TASK_BY_ID_SQL, (0,)),
+    (queries.GET_TASKS_BY_USER_SQL, (0, None, None, None, None, 0)),
+    (queries.GET_ALL_TASKS_SQL, (None, None, None, None, None, 0)),
+    (queries.GET_ALL_USERS_SQL, (None, 0)),
+]
+
 
 class Database:
     def __init__(self):
         self.pool = None
+        self.replicas: List[asyncpg.Pool] = []
+        self._replica_down_until: Dict[int, float] = {}
+        self._next_replica = 0
+        self._recent_writers = TTLCache(100_000, settings.DB_READ_YOUR_WRITES_SECONDS)
+
+        # LISTEN channels (channel, on_notify, on_connect, on_disconnect), all
+        # on one connection
+        self._listeners: List[tuple] = []
+        self._listen_conn: Optional[asyncpg.Connection] = None
+        self._listener_tasks: List[asyncio.Task] = []
+
+        # Read routing counters
+        self.primary_reads = 0
+        self.replica_reads = 0
+        self.replica_failovers = 0
+
+        # Pool acquire wait time (seconds)
+        self.acquire_count = 0
+        self.acquire_wait_total = 0.0
+        self.acquire_wait_max = 0.0
+
+    async def _create_pool(self, dsn: str) -> asyncpg.Pool:
+        return await asyncpg.create_pool(
+            dsn=dsn,
+            min_size=settings.DB_POOL_MIN_SIZE,
+            max_size=settings.DB_POOL_MAX_SIZE,
+            command_timeout=settings.DB_COMMAND_TIMEOUT,
+            statement_cache_size=settings.DB_STATEMENT_CACHE_SIZE,
+            max_inactive_connection_lifetime=settings.DB_MAX_INACTIVE_CONNECTION_LIFETIME,
+            init=self._init_connection,
+        )
 
     async def connect(self):
         if not self.pool:
-            self.pool = await asyncpg.create_pool(
-                dsn=settings.DATABASE_URL
-            )
+            self.pool = await self._create_pool(settings.DATABASE_URL)
             print("DB Connected")
 
+            for dsn in filter(None, (d.strip() for d in settings.DATABASE_REPLICA_URLS.split(","))):
+                try:
+                    self.replicas.append(await self._create_pool(dsn))
+                except CONNECTION_ERRORS as exc:
+                    # The primary can serve everything; carry on without this replica
+                    print(f"DB replica unavailable, skipped: {exc}")
+            if self.replicas:
+                print(f"DB Replicas Connected: {len(self.replicas)}")
+
     async def disconnect(self):
+        for task in self._listener_tasks:
+            task.cancel()
+        await asyncio.gather(*self._listener_tasks, return_exceptions=True)
+        self._listener_tasks = []
+        self._listeners = []
+
+        for replica in self.replicas:
+            await replica.close()
+        self.replicas = []
         if self.pool:
             await self.pool.close()
+            self.pool = None
             print("DB Disconnected")
 
-    async def fetch_one(self, query, *args):
+    async def _init_connection(self, conn: asyncpg.Connection):
+        if not settings.DB_WARM_STATEMENTS:
+            return
+        for query, args in WARM_QUERIES:
+            try:
+                await conn.fetch(query, *args)
+            except asyncpg.PostgresError:
+                # e.g. table not created yet (migrations pending): prepared lazily later
+                pass
+
+    # ================= CONNECTIONS =================
+    @asynccontextmanager
+    async def _acquire(self):
+        start = time.perf_counter()
         async with self.pool.acquire() as conn:
-            return await conn.fetchrow(query, *args)
+            waited = time.perf_counter() - start
+            self.acquire_count += 1
+            self.acquire_wait_total += waited
+            self.acquire_wait_max = max(self.acquire_wait_max, waited)
+            db_pool_acquire_wait.observe((), waited)
+            yield conn
+
+    @asynccontextmanager
+    async def connection(self):
+        """
+        Share one pooled connection between every fetch_one/fetch_all/execute
+        inside the block instead of acquiring one per call.
+        """
+        conn = _task_conn.get()
+        if conn is not None:
+            yield conn
+            return
+
+        async with self._acquire() as conn:
+            token = _task_conn.set(conn)
+            try:
+                yield conn
+            finally:
+                _task_conn.reset(token)
+
+    @asynccontextmanager
+    async def transaction(self):
+        """Like connection(), inside one transaction. Nested blocks become savepoints."""
+        async with self.connection() as conn:
+            async with conn.transaction():
+                yield conn
+
+    @asynccontextmanager
+    async def advisory_lock(self, key: int):
+        """
+        Try to take session advisory lock `key` for the block, without waiting.
+        Yields whether it was acquired. Like connection(), every query inside the
+        block runs on the connection holding the lock.
+        """
+        async with self.connection() as conn:
+            locked = await self._call(conn, "fetchval", queries.TRY_ADVISORY_LOCK_SQL, key)
+            try:
+                yield locked
+            finally:
+                if locked:
+                    await self._call(conn, "fetchval", queries.ADVISORY_UNLOCK_SQL, key)
+
+    # ================= LISTEN / NOTIFY =================
+    def listen(
+        self,
+        channel: str,
+        on_notify: Callable[[str], None],
+        on_connect: Optional[Callable[[], None]] = None,
+        on_disconnect: Optional[Callable[[], None]] = None,
+    ) -> None:
+        """
+        Deliver NOTIFY payloads on `channel` to on_notify. Every channel shares
+        one dedicated primary connection (outside the pool), so a worker holds
+        exactly one LISTEN connection however many channels it follows. The
+        connection is re-opened if it drops; notifications sent while it was
+        down are lost, which is what on_connect/on_disconnect are for.
+        """
+        self._listeners.append((channel, on_notify, on_connect, on_disconnect))
+        if not self._listener_tasks:
+            self._listener_tasks.append(asyncio.create_task(self._listen_forever()))
+        elif self._listen_conn is not None:
+            # Already listening: add the channel to the live connection
+            self._listener_tasks.append(
+                asyncio.create_task(self._join(self._listen_conn, channel, on_notify, on_connect))
+            )
+
+    def _callback(self, channel: str, on_notify: Callable[[str], None]):
+        return lambda _conn, _pid, _channel, payload: self._deliver(channel, on_notify, payload)
+
+    @staticmethod
+    def _deliver(channel: str, on_notify: Callable[[str], None], payload: str) -> None:
+        # A failing handler loses this payload only, never the listener
+        try:
+            on_notify(payload)
+        except Exception:
+            db_listener_callback_errors.inc((channel,))
+            listener_logger.exception("DB listener handler on %s failed", channel)
+
+    async def _join(self, conn, channel, on_notify, on_connect) -> None:
+        try:
+            await conn.add_listener(channel, self._callback(channel, on_notify))
+        except Exception:
+            listener_logger.exception("DB listener could not add %s; reconnecting", channel)
+            conn.terminate()   # the next ping fails and every channel is re-added
+            return
+        print(f"DB Listening on {channel}")
+        if on_connect:
+            on_connect()
+
+    async def _listen_forever(self):
+        delay = 1.0
+
+        while True:
+            conn = None
+            try:
+                conn = await asyncpg.connect(dsn=settings.DATABASE_URL)
+                # Iterates the live list: channels added meanwhile are picked up here
+                for channel, on_notify, _, _ in self._listeners:
+                    await conn.add_listener(channel, self._callback(channel, on_notify))
+                self._listen_conn = conn
+                print(f"DB Listening on {', '.join(channel for channel, *_ in self._listeners)}")
+
+                for _, _, on_connect, _ in self._listeners:
+                    if on_connect:
+                        on_connect()
+                delay = 1.0
+
+                # A periodic round-trip also detects half-open TCP connections
+                while True:
+                    await asyncio.sleep(settings.DB_LISTENER_PING_SECONDS)
+                    await conn.execute("SELECT 1")
+
+            except Exception as exc:
+                # Anything but cancellation reconnects: a dead listener would
+                # silently stop change events, ETag version updates and login
+                # cache invalidation
+                self._listen_conn = None
+                if isinstance(exc, CONNECTION_ERRORS):
+                    print(f"DB listener lost: {exc}; retrying in {delay:.0f}s")
+                else:
+                    listener_logger.exception("DB listener failed; retrying in %.0fs", delay)
+
+                for channel, _, _, on_disconnect in self._listeners:
+                    db_listener_restarts.inc((channel,))
+                    if on_disconnect:
+                        try:
+                            on_disconnect()
+                        except Exception:
+                            listener_logger.exception("DB listener on_disconnect for %s failed", channel)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 30.0)
+
+            finally:
+                self._listen_conn = None
+                if conn is not None and not conn.is_closed():
+                    try:
+                        await conn.close()
+                    except Exception:
+                        conn.terminate()
+
+    # ================= READ ROUTING =================
+    def bind_session(self, key) -> None:
+        """Identify who is making the current request (for read-your-writes)."""
+        _session_key.set(str(key))
+
+    def _note_write(self) -> None:
+        _wrote_at.set(time.monotonic())
+        key = _session_key.get()
+        if key is not None:
+            self._recent_writers.set(key, True)
+
+    def has_bound_connection(self) -> bool:
+        """True inside connection()/transaction(): reads there use that connection."""
+        return _task_conn.get() is not None
+
+    def must_read_primary(self) -> bool:
+        wrote_at = _wrote_at.get()
+        if wrote_at is not None and time.monotonic() - wrote_at < settings.DB_READ_YOUR_WRITES_SECONDS:
+            return True
+        key = _session_key.get()
+        return key is not None and self._recent_writers.get(key) is not None
+
+    def _replica_order(self) -> List[int]:
+        """Healthy replicas, in the order a read tries them before the primary."""
+        now = time.monotonic()
+        healthy = [i for i in range(len(self.replicas)) if self._replica_down_until.get(i, 0) <= now]
+        if not healthy:
+            return []
+
+        # Rotate so that ties (and plain round robin) spread across replicas
+        self._next_replica = (self._next_replica + 1) % len(healthy)
+        healthy = healthy[self._next_replica:] + healthy[:self._next_replica]
+
+        if settings.DB_REPLICA_ROUTING == "least_busy":
+            # Stable: equally busy replicas keep their rotated order
+            healthy.sort(key=lambda i: self.replicas[i].get_size() - self.replicas[i].get_idle_size())
+        return healthy
+
+    def _mark_replica_down(self, index: int) -> None:
+        self._replica_down_until[index] = time.monotonic() + settings.DB_REPLICA_RETRY_SECONDS
+        self.replica_failovers += 1
+
+    async def _read(self, method: str, query, *args):
+        # Reads inside connection()/transaction() stay on that primary connection
+        if self.replicas and _task_conn.get() is None and not self.must_read_primary():
+            for index in self._replica_order():
+                try:
+                    async with self.replicas[index].acquire() as conn:
+                        result = await self._call(conn, method, query, *args)
+                    self.replica_reads += 1
+                    return result
+                except CONNECTION_ERRORS:
+                    self._mark_replica_down(index)
+
+        self.primary_reads += 1
+        async with self.connection() as conn:
+            return await self._call(conn, method, query, *args)
+
+    async def read_one(self, query, *args):
+        """fetch_one for read-only queries; may be served by a replica."""
+        return await self._read("fetchrow", query, *args)
+
+    async def read_all(self, query, *args):
+        """fetch_all for read-only queries; may be served by a replica."""
+        return await self._read("fetch", query, *args)
+
+    async def _read_primary(self, method: str, query, *args):
+        self.primary_reads += 1
+        async with self.connection() as conn:
+            return await self._call(conn, method, query, *args)
+
+    async def read_one_primary(self, query, *args):
+        """read_one that always uses the primary, without counting as a write."""
+        return await self._read_primary("fetchrow", query, *args)
+
+    async def read_all_primary(self, query, *args):
+        """read_all that always uses the primary, without counting as a write."""
+        return await self._read_primary("fetch", query, *args)
+
+    async def read_batches(self, query, *args, batch_size: int) -> AsyncIterator[List[asyncpg.Record]]:
+        """
+        Stream a read-only query as lists of at most batch_size rows from a
+        server-side cursor, so memory does not grow with the result. Runs on its
+        own connection in a read-only REPEATABLE READ transaction (one consistent
+        snapshot); may be served by a replica. Failover only happens before the
+        first batch, since later ones would duplicate what the caller has sent.
+        """
+        if self.replicas and not self.must_read_primary():
+            for index in self._replica_order():
+                started = False
+                try:
+                    async for rows in self._cursor_batches(self.replicas[index].acquire(), query, args, batch_size):
+                        started = True
+                        yield rows
+                    self.replica_reads += 1
+                    return
+                except CONNECTION_ERRORS:
+                    if started:
+                        raise
+                    self._mark_replica_down(index)
+
+        self.primary_reads += 1
+        async for rows in self._cursor_batches(self._acquire(), query, args, batch_size):
+            yield rows
+
+    async def _cursor_batches(self, acquire, query, args, batch_size: int):
+        async with acquire as conn:
+            async with conn.transaction(isolation="repeatable_read", readonly=True):
+                cursor = await conn.cursor(query, *args)
+                while True:
+                    start = time.perf_counter()
+                    rows = await cursor.fetch(batch_size)
+                    observe_query(query, time.perf_counter() - start, len(rows))
+                    if not rows:
+                        return
+                    yield rows
+
+    def stats(self) -> dict:
+        size = self.pool.get_size() if self.pool else 0
+        idle = self.pool.get_idle_size() if self.pool else 0
+        return {
+            "pool_size": size,
+            "pool_max_size": self.pool.get_max_size() if self.pool else 0,
+            "in_use": size - idle,
+            "idle": idle,
+            "acquire_count": self.acquire_count,
+            "acquire_wait_avg_ms": (self.acquire_wait_total / self.acquire_count * 1000) if self.acquire_count else 0.0,
+            "acquire_wait_max_ms": self.acquire_wait_max * 1000,
+            "replicas": len(self.replicas),
+            "replicas_down": sum(1 for t in self._replica_down_until.values() if t > time.monotonic()),
+            "primary_reads": self.primary_reads,
+            "replica_reads": self.replica_reads,
+            "replica_failovers": self.replica_failovers,
+        }
+
+    # ================= QUERIES =================
+    @staticmethod
+    async def _call(conn: asyncpg.Connection, method: str, query, *args):
+        """Run conn.<method>(query, *args), recording latency and row count under the query's name."""
+        start = time.perf_counter()
+        try:
+            result = await getattr(conn, method)(query, *args)
+        except Exception:
+            observe_query(query, time.perf_counter() - start, 0, failed=True)
+            raise
+
+        if method == "execute":
+            # Status tag such as "UPDATE 3"
+            tail = result.rsplit(" ", 1)[-1]
+            rows = int(tail) if tail.isdigit() else 0
+        elif method in ("fetchrow", "fetchval"):
+            rows = int(result is not None)
+        else:
+            rows = len(result)
+        observe_query(query, time.perf_counter() - start, rows)
+        return result
+
+    # These always run on the primary and count as writes for read-your-writes;
+    # use read_one/read_all for plain reads.
+    async def fetch_one(self, query, *args):
+        self._note_write()
+        async with self.connection() as conn:
+            return await self._call(conn, "fetchrow", query, *args)
 
     async def fetch_all(self, query, *args):
-        async with self.pool.acquire() as conn:
-            return await conn.fetch(query, *args)
+        self._note_write()
+        async with self.connection() as conn:
+            return await self._call(conn, "fetch", query, *args)
+
+    async def fetch_many(self, query, args):
+        # One pipelined statement per argument tuple; returns the rows of all of them
+        self._note_write()
+        async with self.connection() as conn:
+            return await self._call(conn, "fetchmany", query, args)
 
     async def execute(self, query, *args):
-        async with self.pool.acquire() as conn:
-            return await conn.execute(query, *args)
+        self._note_write()
+        async with self.connection() as conn:
+            return await self._call(conn, "execute", query, *args)
 
 
 db = Database()
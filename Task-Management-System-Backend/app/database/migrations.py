@@ -0,0 +1,159 @@
+"""
+Versioned schema migrations.
+
+Migrations are the ordered `NNN_name.sql` files in `migrations/`. Each pending
+file runs in its own transaction and is recorded in `schema_version`. A Postgres
+advisory lock keeps concurrent runners (e.g. several workers starting at once)
+from applying the same file twice.
+
+    python -m app.database.migrations            # apply pending migrations
+    python -m app.database.migrations status     # list applied / pending
+    python -m app.database.migrations check      # EXPLAIN hot queries, verify index use
+"""
+import argparse
+import asyncio
+import json
+import re
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import List, Set, Tuple
+
+import asyncpg
+
+from app.core.config import BASE_DIR, settings
+from app.database import queries
+
+MIGRATIONS_DIR = BASE_DIR / "migrations"
+MIGRATION_LOCK_ID = 720_001   # pg_advisory_lock key, any constant unique to this app
+
+_FILENAME_RE = re.compile(r"^(\d+)_(\w+)\.sql$")
+
+CREATE_SCHEMA_VERSION_SQL = """
+CREATE TABLE IF NOT EXISTS schema_version (
+    version    INTEGER PRIMARY KEY,
+    name       TEXT NOT NULL,
+    applied_at TIMESTAMP NOT NULL DEFAULT now()
+);
+"""
+
+GET_APPLIED_VERSIONS_SQL = "SELECT version FROM schema_version;"
+
+INSERT_SCHEMA_VERSION_SQL = "INSERT INTO schema_version (version, name) VALUES ($1, $2);"
+
+# (query constant in queries.py, sample arguments, indexes any of which the plan must use)
+PLAN_CHECKS = [
+    ("GET_TASKS_BY_USER_SQL", (1, None, None, None, None, 50), {"ix_tasks_assigned_user_id"}),
+    ("GET_ALL_TASKS_SQL", (None, None, None, None, None, 50), {"tasks_pkey"}),
+    ("GET_TASK_BY_ID_SQL", (1,), {"tasks_pkey"}),
+    ("GET_USER_BY_EMAIL_SQL", ("user@example.com",), {"users_email_key"}),
+    ("GET_USER_BY_ID_SQL", (1,), {"users_pkey"}),
+    ("GET_ALL_USERS_SQL", (None, 50), {"users_pkey"}),
+    ("SEARCH_TASKS_SQL", ("report", None, None, None, 50), {"ix_tasks_search_vector"}),
+    ("GET_USER_TASK_COUNTS_SQL", (datetime(2000, 1, 1), datetime(2000, 1, 2), 1), {"ix_tasks_assigned_user_id"}),
+    ("CLAIM_DUE_REMINDERS_SQL", (datetime(2000, 1, 1), datetime(2000, 1, 2), 500), {"ix_task_due_reminders_due_date"}),
+]
+
+
+def load_migrations(directory: Path = MIGRATIONS_DIR) -> List[Tuple[int, str, Path]]:
+    migrations = []
+    for path in sorted(directory.glob("*.sql")):
+        match = _FILENAME_RE.match(path.name)
+        if not match:
+            raise ValueError(f"Migration file name must look like 001_name.sql: {path.name}")
+        migrations.append((int(match.group(1)), match.group(2), path))
+
+    migrations.sort()
+    versions = [m[0] for m in migrations]
+    if len(versions) != len(set(versions)):
+        raise ValueError("Duplicate migration version numbers in " + str(directory))
+    return migrations
+
+
+async def get_applied_versions(conn: asyncpg.Connection) -> Set[int]:
+    await conn.execute(CREATE_SCHEMA_VERSION_SQL)
+    rows = await conn.fetch(GET_APPLIED_VERSIONS_SQL)
+    return {r["version"] for r in rows}
+
+
+async def run_migrations(conn: asyncpg.Connection) -> List[str]:
+    """Apply every pending migration in order. Returns the file names applied."""
+    applied = []
+
+    await conn.execute("SELECT pg_advisory_lock($1);", MIGRATION_LOCK_ID)
+    try:
+        done = await get_applied_versions(conn)
+
+        for version, name, path in load_migrations():
+            if version in done:
+                continue
+
+            async with conn.transaction():
+                await conn.execute(path.read_text())
+                await conn.execute(INSERT_SCHEMA_VERSION_SQL, version, name)
+
+            applied.append(path.name)
+            print(f"Applied migration {path.name}")
+
+    finally:
+        await conn.execute("SELECT pg_advisory_unlock($1);", MIGRATION_LOCK_ID)
+
+    return applied
+
+
+def _indexes_in_plan(plan: dict) -> Set[str]:
+    found = {plan["Index Name"]} if "Index Name" in plan else set()
+    for child in plan.get("Plans", []):
+        found |= _indexes_in_plan(child)
+    return found
+
+
+async def check_query_plans(conn: asyncpg.Connection) -> List[Tuple[str, bool, Set[str]]]:
+    """
+    EXPLAIN each query in PLAN_CHECKS and report whether it uses the expected index.
+    Sequential scans are disabled for the check so tiny development tables give
+    the same answer as production-sized ones.
+    """
+    results = []
+
+    async with conn.transaction():
+        await conn.execute("SET LOCAL enable_seqscan = off;")
+
+        for name, args, expected in PLAN_CHECKS:
+            query = getattr(queries, name).strip().rstrip(";")
+            plan = await conn.fetchval("EXPLAIN (FORMAT JSON) " + query, *args)
+            used = _indexes_in_plan(json.loads(plan)[0]["Plan"])
+            results.append((name, bool(used & expected), used))
+
+    return results
+
+
+async def _main(command: str) -> int:
+    conn = await asyncpg.connect(dsn=settings.DATABASE_URL)
+    try:
+        if command == "upgrade":
+            applied = await run_migrations(conn)
+            print(f"{len(applied)} migration(s) applied" if applied else "Schema is up to date")
+
+        elif command == "status":
+            done = await get_applied_versions(conn)
+            for version, name, path in load_migrations():
+                print(f"[{'x' if version in done else ' '}] {path.name}")
+
+        elif command == "check":
+            failed = 0
+            for name, ok, used in await check_query_plans(conn):
+                failed += not ok
+                print(f"{'OK  ' if ok else 'FAIL'} {name}: {', '.join(sorted(used)) or 'no index'}")
+            return 1 if failed else 0
+
+    finally:
+        await conn.close()
+
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Database schema migrations")
+    parser.add_argument("command", nargs="?", default="upgrade", choices=["upgrade", "status", "check"])
+    sys.exit(asyncio.run(_main(parser.parse_args().command)))
@@ -15,14 +15,42 @@ VALUES ($1,$2,$3,$4,$5,$6,$7)
 RETURNING id, title, description,assigned_user AS assigned_to_id, due_date, status, created_at, updated_at;
 """
 
+# Listing queries are keyset-paginated on id (newest first): pass the last id
+# of the previous page as the cursor, NULL for the first page. Optional
+# filters are NULL when unused so a single prepared statement covers them all.
 GET_TASKS_BY_USER_SQL = """
 SELECT id, title, description,assigned_user AS assigned_to_id, due_date, status, created_at, updated_at
-FROM tasks WHERE assigned_user = $1 ORDER BY id DESC;
+FROM tasks
+WHERE assigned_user = $1
+  AND ($2::int IS NULL OR id < $2)
+  AND ($3::text IS NULL OR status = $3)
+  AND ($4::timestamp IS NULL OR due_date >= $4)
+  AND ($5::timestamp IS NULL OR due_date < $5)
+ORDER BY id DESC
+LIMIT $6;
 """
 
 GET_ALL_TASKS_SQL = """
 SELECT id, title, description,assigned_user AS assigned_to_id, due_date, status, created_at, updated_at
-FROM tasks ORDER BY id DESC;
+FROM tasks
+WHERE ($1::int IS NULL OR id < $1)
+  AND ($2::text IS NULL OR status = $2)
+  AND ($3::int IS NULL OR assigned_user = $3)
+  AND ($4::timestamp IS NULL OR due_date >= $4)
+  AND ($5::timestamp IS NULL OR due_date < $5)
+ORDER BY id DESC
+LIMIT $6;
+"""
+
+# Export: same filters as GET_ALL_TASKS_SQL, no paging, read through a cursor
+EXPORT_TASKS_SQL = """
+SELECT id, title, description,assigned_user AS assigned_to_id, due_date, status, created_at, updated_at
+FROM tasks
+WHERE ($1::text IS NULL OR status = $1)
+  AND ($2::int IS NULL OR assigned_user = $2)
+  AND ($3::timestamp IS NULL OR due_date >= $3)
+  AND ($4::timestamp IS NULL OR due_date < $4)
+ORDER BY id;
 """
 
 GET_TASK_BY_ID_SQL = """
@@ -30,36 +58,451 @@ SELECT id, title, description,assigned_user AS assigned_to_id, due_date, status,
 FROM tasks WHERE id=$1;
 """
 
+# --- include_archived variants (migration 006) ---
+# Same parameters as the queries above. Each side is limited on its own index
+# and the two are merged, so the keyset cursor keeps working across both.
+GET_ALL_TASKS_WITH_ARCHIVE_SQL = """
+SELECT * FROM (
+    (SELECT id, title, description, assigned_user AS assigned_to_id, due_date, status, created_at, updated_at
+     FROM tasks
+     WHERE ($1::int IS NULL OR id < $1)
+       AND ($2::text IS NULL OR status = $2)
+       AND ($3::int IS NULL OR assigned_user = $3)
+       AND ($4::timestamp IS NULL OR due_date >= $4)
+       AND ($5::timestamp IS NULL OR due_date < $5)
+     ORDER BY id DESC
+     LIMIT $6)
+    UNION ALL
+    (SELECT id, title, description, assigned_user AS assigned_to_id, due_date, status, created_at, updated_at
+     FROM tasks_archive
+     WHERE ($1::int IS NULL OR id < $1)
+       AND ($2::text IS NULL OR status = $2)
+       AND ($3::int IS NULL OR assigned_user = $3)
+       AND ($4::timestamp IS NULL OR due_date >= $4)
+       AND ($5::timestamp IS NULL OR due_date < $5)
+     ORDER BY id DESC
+     LIMIT $6)
+) t
+ORDER BY id DESC
+LIMIT $6;
+"""
+
+GET_TASKS_BY_USER_WITH_ARCHIVE_SQL = """
+SELECT * FROM (
+    (SELECT id, title, description, assigned_user AS assigned_to_id, due_date, status, created_at, updated_at
+     FROM tasks
+     WHERE assigned_user = $1
+       AND ($2::int IS NULL OR id < $2)
+       AND ($3::text IS NULL OR status = $3)
+       AND ($4::timestamp IS NULL OR due_date >= $4)
+       AND ($5::timestamp IS NULL OR due_date < $5)
+     ORDER BY id DESC
+     LIMIT $6)
+    UNION ALL
+    (SELECT id, title, description, assigned_user AS assigned_to_id, due_date, status, created_at, updated_at
+     FROM tasks_archive
+     WHERE assigned_user = $1
+       AND ($2::int IS NULL OR id < $2)
+       AND ($3::text IS NULL OR status = $3)
+       AND ($4::timestamp IS NULL OR due_date >= $4)
+       AND ($5::timestamp IS NULL OR due_date < $5)
+     ORDER BY id DESC
+     LIMIT $6)
+) t
+ORDER BY id DESC
+LIMIT $6;
+"""
+
+GET_TASK_BY_ID_WITH_ARCHIVE_SQL = """
+SELECT id, title, description, assigned_user AS assigned_to_id, due_date, status, created_at, updated_at FROM tasks WHERE id = $1
+UNION ALL
+SELECT id, title, description, assigned_user AS assigned_to_id, due_date, status, created_at, updated_at FROM tasks_archive WHERE id = $1
+LIMIT 1;
+"""
+
+EXPORT_TASKS_WITH_ARCHIVE_SQL = """
+(SELECT id, title, description, assigned_user AS assigned_to_id, due_date, status, created_at, updated_at
+ FROM tasks
+ WHERE ($1::text IS NULL OR status = $1)
+   AND ($2::int IS NULL OR assigned_user = $2)
+   AND ($3::timestamp IS NULL OR due_date >= $3)
+   AND ($4::timestamp IS NULL OR due_date < $4)
+ ORDER BY id)
+UNION ALL
+(SELECT id, title, description, assigned_user AS assigned_to_id, due_date, status, created_at, updated_at
+ FROM tasks_archive
+ WHERE ($1::text IS NULL OR status = $1)
+   AND ($2::int IS NULL OR assigned_user = $2)
+   AND ($3::timestamp IS NULL OR due_date >= $3)
+   AND ($4::timestamp IS NULL OR due_date < $4)
+ ORDER BY id)
+ORDER BY id;
+"""
+
+# Mutations below do their checks inside the statement (one round-trip, no
+# check-then-act race). They always return exactly one row: the task columns
+# are NULL when nothing was written and the extra columns say why.
+
+# Insert only if $3 is an employee; assignee_role is NULL when $3 does not exist
+CREATE_TASK_FOR_EMPLOYEE_SQL = """
+WITH assignee AS (
+    SELECT role FROM users WHERE id = $3
+),
+inserted AS (
+    INSERT INTO tasks (
+        title,
+        description,
+        assigned_user,
+        due_date,
+        status,
+        created_at,
+        updated_at
+    )
+    SELECT $1::text, $2::text, $3::int, $4::timestamp, $5::text, $6::timestamp, $7::timestamp
+    WHERE EXISTS (SELECT 1 FROM assignee WHERE upper(role) = 'EMPLOYEE')
+    RETURNING id, title, description,assigned_user AS assigned_to_id, due_date, status, created_at, updated_at
+)
+SELECT inserted.*, (SELECT role FROM assignee) AS assignee_role
+FROM (SELECT 1) AS one
+LEFT JOIN inserted ON true;
+"""
+
+# Reassignment ($3 not NULL) is only applied when $3 is an employee
 UPDATE_TASK_SQL = """
-UPDATE tasks
-SET
-    title = COALESCE($1, title),
-    description = COALESCE($2, description),
-   assigned_user = COALESCE($3,assigned_user),
-    due_date = COALESCE($4, due_date),
-    status = COALESCE($5, status),
-    updated_at = $6
-WHERE id = $7
-RETURNING id, title, description,assigned_user AS assigned_to_id, due_date, status, created_at, updated_at;
+WITH assignee AS (
+    SELECT role FROM users WHERE id = $3
+),
+updated AS (
+    UPDATE tasks
+    SET
+        title = COALESCE($1, title),
+        description = COALESCE($2, description),
+        assigned_user = COALESCE($3, assigned_user),
+        due_date = COALESCE($4, due_date),
+        status = COALESCE($5, status),
+        updated_at = $6
+    WHERE id = $7
+      AND ($3::int IS NULL OR EXISTS (SELECT 1 FROM assignee WHERE upper(role) = 'EMPLOYEE'))
+    RETURNING id, title, description,assigned_user AS assigned_to_id, due_date, status, created_at, updated_at
+)
+SELECT updated.*,
+       (SELECT role FROM assignee) AS assignee_role,
+       updated.id IS NOT NULL OR EXISTS (SELECT 1 FROM tasks WHERE id = $7) AS task_exists
+FROM (SELECT 1) AS one
+LEFT JOIN updated ON true;
 """
 
-DELETE_TASK_SQL = "DELETE FROM tasks WHERE id = $1;"
+# Status change by the task's assignee ($4) only
+UPDATE_TASK_STATUS_SQL = """
+WITH updated AS (
+    UPDATE tasks
+    SET status = $1, updated_at = $2
+    WHERE id = $3 AND assigned_user = $4
+    RETURNING id, title, description,assigned_user AS assigned_to_id, due_date, status, created_at, updated_at
+)
+SELECT updated.*,
+       updated.id IS NOT NULL OR EXISTS (SELECT 1 FROM tasks WHERE id = $3) AS task_exists
+FROM (SELECT 1) AS one
+LEFT JOIN updated ON true;
+"""
+
+DELETE_TASK_SQL = "DELETE FROM tasks WHERE id = $1 RETURNING id;"
+
+# Bulk status change in one statement; $3 restricts it to one assignee (NULL = any)
+BULK_UPDATE_TASK_STATUS_SQL = """
+UPDATE tasks AS t
+SET status = u.status, updated_at = $4
+FROM unnest($1::int[], $2::text[]) AS u(id, status)
+WHERE t.id = u.id
+  AND ($3::int IS NULL OR t.assigned_user = $3)
+RETURNING t.id;
+"""
+
+# --- AUTO-ASSIGNMENT ---
+# Open-task load of every employee (optionally only the ids in $3): each open
+# task counts 1, plus up to 1 more the closer its due date is to $1, reaching
+# the full extra weight at or past due and none $2 seconds or more ahead.
+# Must match app/services/task_balancer.task_weight.
+GET_EMPLOYEE_LOADS_SQL = """
+SELECT u.id AS employee_id,
+       count(t.id) AS open_tasks,
+       coalesce(sum(
+           1 + CASE WHEN t.due_date IS NULL THEN 0
+                    ELSE greatest(0, least(1, 1 - extract(epoch FROM t.due_date - $1::timestamp) / $2::float8))
+               END
+       ) FILTER (WHERE t.id IS NOT NULL), 0)::float8 AS load
+FROM users u
+LEFT JOIN tasks t ON t.assigned_user = u.id AND t.status <> 'Completed'
+WHERE upper(u.role) = 'EMPLOYEE'
+  AND ($3::int[] IS NULL OR u.id = ANY($3::int[]))
+GROUP BY u.id;
+"""
+
+# One INSERT for a whole batch of Pending tasks. ids come from the serial in
+# the SELECT's order, so the RETURNING ids sorted ascending follow the input.
+CREATE_TASKS_UNNEST_SQL = """
+INSERT INTO tasks (title, description, assigned_user, due_date, status, created_at, updated_at)
+SELECT n.title, n.description, n.assigned_user, n.due_date, 'Pending', $5, $5
+FROM unnest($1::text[], $2::text[], $3::int[], $4::timestamp[]) WITH ORDINALITY
+     AS n(title, description, assigned_user, due_date, ord)
+ORDER BY n.ord
+RETURNING id;
+"""
+
+# --- SEARCH (migration 005) ---
+# $1 query, $2 assignee or NULL, ($3 score, $4 id) keyset cursor or NULLs, $5 limit.
+# Ordered by score then id, both descending.
+SEARCH_TASKS_SQL = """
+SELECT t.id, t.title, t.description, t.assigned_user AS assigned_to_id, t.due_date, t.status,
+       t.created_at, t.updated_at, ts_rank(t.search_vector, q.query) AS score
+FROM tasks t, websearch_to_tsquery('english', $1) AS q(query)
+WHERE t.search_vector @@ q.query
+  AND ($2::int IS NULL OR t.assigned_user = $2)
+  AND ($3::real IS NULL OR (ts_rank(t.search_vector, q.query), t.id) < ($3::real, $4::int))
+ORDER BY score DESC, t.id DESC
+LIMIT $5;
+"""
+
+# Fuzzy title match (pg_trgm): tolerates typos, scored by trigram similarity
+SEARCH_TASKS_FUZZY_SQL = """
+SELECT t.id, t.title, t.description, t.assigned_user AS assigned_to_id, t.due_date, t.status,
+       t.created_at, t.updated_at, similarity(t.title, $1) AS score
+FROM tasks t
+WHERE t.title % $1
+  AND ($2::int IS NULL OR t.assigned_user = $2)
+  AND ($3::real IS NULL OR (similarity(t.title, $1), t.id) < ($3::real, $4::int))
+ORDER BY score DESC, t.id DESC
+LIMIT $5;
+"""
+
+# --- ARCHIVAL (app/services/task_archiver.py, migration 006) ---
+# Oldest archivable task: tells the archiver which monthly partitions it needs
+GET_ARCHIVE_OLDEST_SQL = """
+SELECT min(updated_at) AS oldest
+FROM tasks
+WHERE status = 'Completed' AND updated_at < $1;
+"""
+
+# Move up to $2 Completed tasks last updated before $1 in one statement,
+# maintaining tasks_archive_counts. $3 is archived_at. Returns the moved count.
+ARCHIVE_TASKS_BATCH_SQL = """
+WITH moved AS (
+    DELETE FROM tasks
+    WHERE id IN (
+        SELECT id FROM tasks
+        WHERE status = 'Completed' AND updated_at < $1
+        ORDER BY updated_at
+        LIMIT $2
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING id, title, description, assigned_user, due_date, status, created_at, updated_at
+),
+archived AS (
+    INSERT INTO tasks_archive (id, title, description, assigned_user, due_date, status, created_at, updated_at, archived_at)
+    SELECT id, title, description, assigned_user, due_date, status, created_at, updated_at, $3
+    FROM moved
+    RETURNING assigned_user
+),
+counted AS (
+    INSERT INTO tasks_archive_counts (assigned_user, total)
+    SELECT assigned_user, count(*) FROM archived GROUP BY assigned_user
+    ON CONFLICT (assigned_user) DO UPDATE SET total = tasks_archive_counts.total + EXCLUDED.total
+)
+SELECT count(*) AS moved FROM archived;
+"""
+
+# Transaction-local: the notify trigger stays quiet for rows moved by the archiver
+SET_ARCHIVING_SQL = "SELECT set_config('app.archiving', 'on', true);"
+
+# One summary notification per archiver run (see TaskEventHub.publish)
+NOTIFY_TASKS_ARCHIVED_SQL = """
+SELECT pg_notify('task_changes', json_build_object(
+    'op', 'archive',
+    'count', $1::int,
+    'changed_at', (extract(epoch FROM clock_timestamp()) * 1000000)::bigint
+)::text);
+"""
+
+# Not a *_SQL constant: formatted per month, so neither warmed nor prepared
+ARCHIVE_PARTITION_DDL = (
+    "CREATE TABLE IF NOT EXISTS {name} PARTITION OF tasks_archive "
+    "FOR VALUES FROM ('{start}') TO ('{end}');"
+)
+
+# --- DUE-DATE REMINDERS (migration 008) ---
+# Claim up to $3 reminders from the queue: overdue for tasks due by $1 (now),
+# due soon for tasks due by $2 (now + DUE_SOON_HOURS) not yet reminded. Sent
+# rows move on (due soon -> stage 2) or leave the queue (overdue) in the same
+# statement; run it in a transaction that commits once the batch is delivered.
+CLAIM_DUE_REMINDERS_SQL = """
+WITH due AS (
+    SELECT task_id, due_date <= $1 AS overdue
+    FROM task_due_reminders
+    WHERE due_date <= $2 AND (due_date <= $1 OR stage = 1)
+    ORDER BY due_date
+    LIMIT $3
+    FOR UPDATE SKIP LOCKED
+),
+sent_overdue AS (
+    DELETE FROM task_due_reminders r
+    USING due
+    WHERE r.task_id = due.task_id AND due.overdue
+),
+sent_due_soon AS (
+    UPDATE task_due_reminders r
+    SET stage = 2
+    FROM due
+    WHERE r.task_id = due.task_id AND NOT due.overdue
+)
+SELECT t.id AS task_id, t.title, t.assigned_user AS assigned_to_id, t.due_date, t.status,
+       CASE WHEN due.overdue THEN 'overdue' ELSE 'due_soon' END AS kind
+FROM due
+JOIN tasks t ON t.id = due.task_id
+ORDER BY t.due_date, t.id;
+"""
+
+# Session-level advisory locks: one background job run across all workers
+TRY_ADVISORY_LOCK_SQL = "SELECT pg_try_advisory_lock($1) AS locked;"
+ADVISORY_UNLOCK_SQL = "SELECT pg_advisory_unlock($1);"
+
+# --- VERSION SEEDS (ETags) ---
+# (max(updated_at), count) identifies the current contents of a task set
+GET_TASKS_VERSION_SQL = """
+SELECT max(updated_at) AS max_updated_at, count(*) AS total FROM tasks;
+"""
+
+GET_USER_TASKS_VERSION_SQL = """
+SELECT max(updated_at) AS max_updated_at, count(*) AS total
+FROM tasks WHERE assigned_user = $1;
+"""
+
+# --- TASK STATISTICS ---
+# One row per (assignee, status); overdue uses $1 = current UTC time, due_soon
+# counts open tasks due from $1 up to $2. Archived tasks are all Completed and
+# counted by the archiver (migration 006); they are added to the live
+# Completed row, so each (assignee, status) appears once.
+GET_TASK_COUNTS_SQL = """
+SELECT assigned_to_id, status,
+       sum(total)::bigint AS total,
+       sum(overdue)::bigint AS overdue,
+       sum(due_soon)::bigint AS due_soon
+FROM (
+    SELECT assigned_user AS assigned_to_id, status,
+           count(*) AS total,
+           count(*) FILTER (WHERE due_date < $1 AND status <> 'Completed') AS overdue,
+           count(*) FILTER (WHERE due_date >= $1 AND due_date < $2 AND status <> 'Completed') AS due_soon
+    FROM tasks
+    GROUP BY assigned_user, status
+    UNION ALL
+    SELECT assigned_user, 'Completed', total, 0, 0
+    FROM tasks_archive_counts
+) counts
+GROUP BY assigned_to_id, status;
+"""
+
+# GET_TASK_COUNTS_SQL for one assignee ($3), per status
+GET_USER_TASK_COUNTS_SQL = """
+SELECT status,
+       sum(total)::bigint AS total,
+       sum(overdue)::bigint AS overdue,
+       sum(due_soon)::bigint AS due_soon
+FROM (
+    SELECT status,
+           count(*) AS total,
+           count(*) FILTER (WHERE due_date < $1 AND status <> 'Completed') AS overdue,
+           count(*) FILTER (WHERE due_date >= $1 AND due_date < $2 AND status <> 'Completed') AS due_soon
+    FROM tasks
+    WHERE assigned_user = $3
+    GROUP BY status
+    UNION ALL
+    SELECT 'Completed', total, 0, 0
+    FROM tasks_archive_counts
+    WHERE assigned_user = $3
+) counts
+GROUP BY status;
+"""
+
+# Tasks created per $1 bucket ('day'/'week'/'month') over the last $3 buckets up to $2,
+# and how many of them are completed
+GET_TASK_COMPLETION_BUCKETS_SQL = """
+WITH since AS (
+    SELECT date_trunc($1, $2::timestamp) - ($3::int - 1) * ('1 ' || $1)::interval AS ts
+)
+SELECT date_trunc($1, created_at) AS bucket,
+       count(*) AS total,
+       count(*) FILTER (WHERE status = 'Completed') AS completed
+FROM (
+    SELECT created_at, status FROM tasks, since WHERE created_at >= since.ts
+    UNION ALL
+    -- updated_at >= created_at, so the extra condition only prunes partitions
+    SELECT created_at, status FROM tasks_archive, since
+    WHERE created_at >= since.ts AND updated_at >= since.ts
+) t
+GROUP BY 1
+ORDER BY 1;
+"""
+
+# --- LOGIN RATE LIMITING (migration 007) ---
+# Token bucket: refill at $2 tokens/second up to $3, then take one token if there
+# is one. Returns whether it was taken and the tokens left.
+_REFILLED_TOKENS = "LEAST(EXCLUDED.burst, b.tokens + extract(epoch FROM now() - b.updated_at) * EXCLUDED.rate)"
+
+TAKE_RATE_LIMIT_TOKEN_SQL = f"""
+INSERT INTO rate_limit_buckets AS b (key, tokens, allowed, rate, burst, updated_at)
+VALUES ($1, $3::float8 - 1, true, $2::float8, $3::float8, now())
+ON CONFLICT (key) DO UPDATE SET
+    tokens = CASE WHEN {_REFILLED_TOKENS} >= 1 THEN {_REFILLED_TOKENS} - 1 ELSE {_REFILLED_TOKENS} END,
+    allowed = {_REFILLED_TOKENS} >= 1,
+    rate = EXCLUDED.rate,
+    burst = EXCLUDED.burst,
+    updated_at = now()
+RETURNING allowed, tokens;
+"""
+
+# Buckets that have refilled completely are the same as no bucket
+DELETE_FULL_RATE_LIMIT_BUCKETS_SQL = """
+DELETE FROM rate_limit_buckets
+WHERE tokens + extract(epoch FROM now() - updated_at) * rate >= burst;
+"""
 
 # --- USER QUERIES ---
 CREATE_USER_SQL = """
     INSERT INTO users (email, password_hash, role, created_at, updated_at)
     VALUES ($1, $2, $3, $4, $5)
-    RETURNING id, email, password_hash, role, created_at, updated_at;
+    RETURNING id, email, role, created_at, updated_at;
 """
 
+# Login only: the one user read that needs password_hash
 GET_USER_BY_EMAIL_SQL = """
     SELECT id, email, password_hash, role, created_at, updated_at 
     FROM users WHERE email = $1;
 """
 
 GET_USER_BY_ID_SQL = """
-    SELECT id, email, password_hash, role, created_at, updated_at 
+    SELECT id, email, role, created_at, updated_at
     FROM users WHERE id = $1;
 """
 
-GET_ALL_USERS_SQL = "SELECT id, email, password_hash, role, created_at, updated_at FROM users ORDER BY id;"
\ No newline at end of file
+# Batched GET_USER_BY_ID_SQL (UserDAO's user loader); unknown ids are absent
+GET_USERS_BY_IDS_SQL = """
+    SELECT id, email, role, created_at, updated_at
+    FROM users WHERE id = ANY($1::int[]);
+"""
+
+GET_USER_ROLES_BY_IDS_SQL = """
+    SELECT id, role FROM users WHERE id = ANY($1::int[]);
+"""
+
+UPDATE_USER_PASSWORD_SQL = """
+    UPDATE users SET password_hash = $1, updated_at = $2
+    WHERE id = $3;
+"""
+
+# Keyset-paginated on id (oldest first): $1 is the last id of the previous page.
+GET_ALL_USERS_SQL = """
+    SELECT id, email, role, created_at, updated_at
+    FROM users
+    WHERE ($1::int IS NULL OR id > $1)
+    ORDER BY id
+    LIMIT $2;
+"""
\ No newline at end of file
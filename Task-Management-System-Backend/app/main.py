@@ -1,63 +1,95 @@
 import uvicorn
 from fastapi import FastAPI
-from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 from contextlib import asynccontextmanager
-from starlette.middleware.base import BaseHTTPMiddleware
 
 from app.database.database import db
+from app.database.migrations import run_migrations
+from app.core.config import settings
+from app.core.cors import CORSMiddleware
+from app.core.metrics import MetricsMiddleware, remove_snapshot, write_snapshot
+from app.core.security import password_hasher
+from app.core.tokens import get_key_ring
+from app.services.task_events import task_event_hub, TASK_EVENTS_CHANNEL
+from app.services.task_versions import task_versions
+from app.services.task_archiver import task_archiver
+from app.services.task_reminders import task_reminders
+from app.services.scheduler import Scheduler
+from app.dao.task_dao import DUE_REMINDER_LOCK_ID
+from app.dao.user_dao import (
+    USERS_CREATED_CHANNEL,
+    on_user_created,
+    on_users_created_connect,
+    on_users_created_disconnect,
+)
 from app.controllers.user_controller import router  as user_router
 from app.controllers.task_controller import router as task_router
 from app.controllers.auth_controllers import router as auth_router # <--- IMPORT THIS
+from app.controllers.auth_controllers import jwks_router
+from app.controllers.metrics_controller import router as metrics_router
 from app.exceptions.exception_handler import register_exception_handlers
 
 CORS_ORIGINS = ["http://localhost:5173", "http://127.0.0.1:5173"]
 
 
-class AddCORSHeadersMiddleware(BaseHTTPMiddleware):
-    """Ensure CORS headers are on every response (including errors)."""
-    async def dispatch(self, request, call_next):
-        if request.method == "OPTIONS":
-            return JSONResponse(
-                status_code=200,
-                headers={
-                    "Access-Control-Allow-Origin": request.headers.get("origin") or CORS_ORIGINS[0],
-                    "Access-Control-Allow-Methods": "GET, POST, PUT, PATCH, DELETE, OPTIONS",
-                    "Access-Control-Allow-Headers": "Content-Type, Authorization, Accept",
-                    "Access-Control-Allow-Credentials": "true",
-                    "Access-Control-Max-Age": "86400",
-                },
-            )
-        response = await call_next(request)
-        origin = request.headers.get("origin")
-        if origin in CORS_ORIGINS:
-            response.headers["Access-Control-Allow-Origin"] = origin
-        else:
-            response.headers["Access-Control-Allow-Origin"] = CORS_ORIGINS[0]
-        response.headers["Access-Control-Allow-Credentials"] = "true"
-        response.headers["Access-Control-Allow-Methods"] = "GET, POST, PUT, PATCH, DELETE, OPTIONS"
-        response.headers["Access-Control-Allow-Headers"] = "Content-Type, Authorization, Accept"
-        return response
-
-
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    get_key_ring()   # load signing keys now: bad key config fails startup, not the first login
     await db.connect()
+    if settings.RUN_MIGRATIONS_ON_STARTUP:
+        async with db.pool.acquire() as conn:
+            await run_migrations(conn)
+    if settings.TASK_EVENTS_ENABLED:
+        task_event_hub.add_observer(task_versions)   # ETag versions follow the change feed
+        db.listen(
+            TASK_EVENTS_CHANNEL,
+            task_event_hub.publish,
+            on_connect=task_event_hub.on_connect,
+            on_disconnect=task_event_hub.on_disconnect,
+        )
+    # New accounts leave every worker's unknown-email login cache
+    db.listen(
+        USERS_CREATED_CHANNEL,
+        on_user_created,
+        on_connect=on_users_created_connect,
+        on_disconnect=on_users_created_disconnect,
+    )
+    scheduler = Scheduler()
+    if settings.ARCHIVE_ENABLED:
+        scheduler.add("archive_tasks", settings.ARCHIVE_INTERVAL_SECONDS, task_archiver.run_scheduled)
+    if settings.DUE_REMINDERS_ENABLED:
+        scheduler.add(
+            "due_reminders", settings.DUE_REMINDER_INTERVAL_SECONDS, task_reminders.run,
+            lock_id=DUE_REMINDER_LOCK_ID
+        )
+    if settings.METRICS_ENABLED and settings.METRICS_DIR:
+        scheduler.add("metrics_snapshot", settings.METRICS_SNAPSHOT_SECONDS, write_snapshot)
+    scheduler.start()
     yield
+    await scheduler.stop()
+    if settings.METRICS_ENABLED and settings.METRICS_DIR:
+        remove_snapshot()
     await db.disconnect()
+    password_hasher.shutdown()
 
 
-app = FastAPI(lifespan=lifespan)
+# orjson for every JSON body; list endpoints go further with RowListResponse
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
 
-app.add_middleware(AddCORSHeadersMiddleware)
+# Single pure-ASGI layer: answers OPTIONS itself, adds CORS headers to every
+# response (errors included) for allowed origins
 app.add_middleware(
     CORSMiddleware,
     allow_origins=CORS_ORIGINS,
     allow_credentials=True,
-    allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
 
+# Outermost: times everything, CORS preflights included
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
 # register global exception handlers
 register_exception_handlers(app)
 
@@ -65,9 +97,12 @@ register_exception_handlers(app)
 app.include_router(auth_router, prefix="/auth", tags=["Auth"]) # <--- REGISTER THIS
 app.include_router(task_router, prefix="/tasks", tags=["Tasks"])
 app.include_router(user_router, prefix="/user", tags=["User"])
+app.include_router(jwks_router)
+if settings.METRICS_ENABLED:
+    app.include_router(metrics_router)
 
 
-# RUN SERVER
+# RUN SERVER (development; production: python -m app.serve)
 if __name__ == "__main__":
     uvicorn.run(
         "app.main:app",
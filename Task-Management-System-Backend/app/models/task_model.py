@@ -1,15 +1,39 @@
 from dataclasses import dataclass
 from datetime import datetime
-from app.models.enums.TaskStatus import TaskStatus
+from typing import Optional
 
-@dataclass
+
+@dataclass(frozen=True, slots=True)
 class Task:
+    """
+    One task row as TaskDAO returns it (no per-instance dict). Fields match
+    TaskResponse, which validates it on the way out.
+    """
     id: int
     title: str
-    description: str
-    assigned_user: int  
-    status: TaskStatus
+    description: Optional[str]
+    assigned_to_id: int
+    status: str
+    due_date: Optional[datetime]
+    created_at: datetime
+    updated_at: datetime
+
+    @classmethod
+    def from_row(cls, row) -> "Task":
+        # Extra columns (e.g. assignee_role on checked mutations) are ignored
+        return cls(*[row[name] for name in cls.__match_args__])
+
+
+@dataclass(frozen=True, slots=True)
+class DueReminder:
+    """One claimed reminder (CLAIM_DUE_REMINDERS_SQL); kind is "due_soon" or "overdue"."""
+    task_id: int
+    title: str
+    assigned_to_id: int
     due_date: datetime
+    status: str
+    kind: str
 
-    created_at: datetime
-    updated_at: datetime
\ No newline at end of file
+    @classmethod
+    def from_row(cls, row) -> "DueReminder":
+        return cls(*[row[name] for name in cls.__match_args__])
@@ -1,11 +1,30 @@
 from dataclasses import dataclass
 from datetime import datetime
 
-@dataclass
+
+@dataclass(frozen=True, slots=True)
 class User:
+    """A user row without its password hash (everything but login)."""
     id: int
     email: str
-    password_hash: str 
     role: str
     created_at: datetime
-    updated_at: datetime
\ No newline at end of file
+    updated_at: datetime
+
+    @classmethod
+    def from_row(cls, row) -> "User":
+        # __match_args__ lists every field in order, inherited ones included
+        return cls(*[row[name] for name in cls.__match_args__])
+
+
+@dataclass(frozen=True, slots=True)
+class UserCredentials(User):
+    """User plus bcrypt hash: only read by the login path (GET_USER_BY_EMAIL_SQL)."""
+    password_hash: str
+
+
+@dataclass(frozen=True, slots=True)
+class TokenUser:
+    """Identity taken straight from a verified access token (no DB lookup)."""
+    id: int
+    role: str
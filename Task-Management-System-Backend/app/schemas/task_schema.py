@@ -1,6 +1,6 @@
 from pydantic import BaseModel, Field 
 from datetime import datetime
-from typing import Optional
+from typing import Dict, List, Optional
 from app.models.enums.TaskStatus import TaskStatus
 
 
@@ -29,3 +29,77 @@ class TaskResponse(BaseModel):
     due_date: Optional[datetime]
     created_at: datetime
     updated_at: datetime
+
+
+class TaskFilter(BaseModel):
+    """Optional server-side filters for task listings."""
+    status: Optional[TaskStatus] = None
+    due_after: Optional[datetime] = None    # due_date >= due_after
+    due_before: Optional[datetime] = None   # due_date < due_before
+    include_archived: bool = False          # also read tasks_archive (read-only tasks)
+
+
+class TaskListFilter(TaskFilter):
+    """Filters for listings across all users (admin)."""
+    assigned_to_id: Optional[int] = None
+
+
+# ---------- Bulk operations ----------
+class TaskStatusUpdateItem(BaseModel):
+    id: int
+    status: TaskStatus
+
+
+class BulkItemResult(BaseModel):
+    index: int                   # position of the item in the request
+    id: Optional[int] = None     # task id when the item succeeded
+    error: Optional[str] = None
+
+
+class BulkResult(BaseModel):
+    succeeded: int
+    failed: int
+    results: List[BulkItemResult]
+
+
+# ---------- Auto-assignment ----------
+class TaskAutoAssignItem(BaseModel):
+    """An unassigned task; the assignee is picked by POST /tasks/auto-assign."""
+    title: str
+    description: Optional[str] = None
+    due_date: Optional[datetime] = None
+
+
+class AutoAssignItemResult(BulkItemResult):
+    assigned_to_id: Optional[int] = None
+
+
+class AutoAssignResult(BulkResult):
+    results: List[AutoAssignItemResult]
+    assigned: Dict[int, int]     # employee id -> tasks given in this request
+
+
+# ---------- Statistics ----------
+class AssigneeTaskStats(BaseModel):
+    assigned_to_id: int
+    total: int
+    overdue: int
+    due_soon: int             # open, due within DUE_SOON_HOURS
+    by_status: Dict[str, int]
+
+
+class CompletionBucket(BaseModel):
+    bucket: datetime          # start of the day/week/month
+    total: int                # tasks created in the bucket
+    completed: int            # ... of which are now completed
+    completion_rate: float
+
+
+class TaskStats(BaseModel):
+    total: int
+    overdue: int
+    due_soon: int
+    by_status: Dict[str, int]
+    by_assignee: List[AssigneeTaskStats]
+    completion: List[CompletionBucket]
+
@@ -0,0 +1,110 @@
+"""
+Production entry point.
+
+    python -m app.serve [--workers N] [--host HOST] [--port PORT]
+
+Runs N uvicorn worker processes (default: available CPU cores) on one shared
+socket, using uvloop/httptools when installed. With DB_CONNECTION_BUDGET set,
+each worker's pool gets an even share of that budget (less the one LISTEN
+connection its channels share), so adding workers cannot exceed Postgres
+max_connections. Workers publish their metrics to a shared METRICS_DIR so
+that /metrics covers all of them.
+
+SIGTERM drains: the socket stops accepting, live SSE streams are ended,
+in-flight requests get GRACEFUL_SHUTDOWN_SECONDS to finish, and only then
+does the lifespan shutdown close the database pools.
+"""
+import argparse
+import importlib
+import os
+import shutil
+import tempfile
+from typing import Optional, Tuple
+
+import uvicorn
+from uvicorn.supervisors import Multiprocess
+
+from app.core.config import settings
+
+
+class DrainingServer(uvicorn.Server):
+    """uvicorn Server that ends /tasks/events streams as soon as shutdown starts."""
+
+    async def shutdown(self, sockets=None) -> None:
+        # Imported here: it is the worker's copy of the app's event hub
+        from app.services.task_events import task_event_hub
+
+        task_event_hub.close_all()
+        await super().shutdown(sockets)
+
+
+def default_workers() -> int:
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))   # respects container CPU pinning
+    return os.cpu_count() or 1
+
+
+def pool_sizes(workers: int, budget: Optional[int]) -> Tuple[int, int]:
+    """(min_size, max_size) for each worker's asyncpg pool."""
+    if not budget:
+        return settings.DB_POOL_MIN_SIZE, settings.DB_POOL_MAX_SIZE
+
+    # Every LISTEN channel the lifespan opens (users_created always, task_changes
+    # with TASK_EVENTS_ENABLED) shares one connection per worker outside the pool
+    per_worker = budget // workers - 1
+    if per_worker < 1:
+        raise SystemExit(f"DB_CONNECTION_BUDGET={budget} is too small for {workers} workers")
+    return min(settings.DB_POOL_MIN_SIZE, per_worker), per_worker
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run the API with multiple worker processes")
+    parser.add_argument("--host", default=settings.SERVER_HOST)
+    parser.add_argument("--port", type=int, default=settings.SERVER_PORT)
+    parser.add_argument("--workers", type=int, default=settings.SERVER_WORKERS or default_workers())
+    args = parser.parse_args()
+
+    min_size, max_size = pool_sizes(args.workers, settings.DB_CONNECTION_BUDGET)
+    # Workers are spawned processes that read settings from the environment
+    os.environ["DB_POOL_MIN_SIZE"] = str(min_size)
+    os.environ["DB_POOL_MAX_SIZE"] = str(max_size)
+    settings.DB_POOL_MIN_SIZE, settings.DB_POOL_MAX_SIZE = min_size, max_size
+
+    # Workers share their metrics through files so any one of them can answer /metrics
+    metrics_tmp = None
+    if args.workers > 1 and settings.METRICS_ENABLED and not settings.METRICS_DIR:
+        metrics_tmp = tempfile.mkdtemp(prefix="tms-metrics-")
+        os.environ["METRICS_DIR"] = settings.METRICS_DIR = metrics_tmp
+
+    # Preload once here so import or configuration errors stop the launch
+    # before any worker starts (each spawned worker still imports its own copy)
+    importlib.import_module("app.main")
+
+    config = uvicorn.Config(
+        "app.main:app",
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        loop="auto",        # uvloop if installed
+        http="auto",        # httptools if installed
+        proxy_headers=True,
+        timeout_graceful_shutdown=settings.GRACEFUL_SHUTDOWN_SECONDS,
+    )
+    server = DrainingServer(config)
+
+    print(f"Starting {args.workers} worker(s) on {args.host}:{args.port}, "
+          f"DB pool {min_size}-{max_size} per worker")
+
+    try:
+        if args.workers > 1:
+            sock = config.bind_socket()
+            Multiprocess(config, target=server.run, sockets=[sock]).run()
+        else:
+            server.run()
+    finally:
+        if metrics_tmp:
+            shutil.rmtree(metrics_tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,25 +1,87 @@
+import math
+import secrets
+from typing import Optional
+
 from fastapi import HTTPException, status
+from app.core.config import settings
+from app.core.rate_limit import MemoryRateLimitBackend, RateLimiter
+from app.dao.rate_limit_dao import RateLimitDAO
 from app.dao.user_dao import user_dao
 from app.schemas.user_schema import UserCreate, UserLogin, UserResponse
-from app.core.security import get_password_hash, verify_password, create_access_token
+from app.core.security import password_hasher, create_access_token
 from app.schemas.token_schema import TokenWithUser
 
+login_limiter = RateLimiter(
+    RateLimitDAO() if settings.LOGIN_RATE_LIMIT_BACKEND == "postgres"
+    else MemoryRateLimitBackend(settings.LOGIN_RATE_LIMIT_MAX_KEYS)
+)
+
+
 class AuthService:
+    def __init__(self):
+        # Budget for bcrypt runs spent on logins to unknown emails
+        self._dummy_budget = MemoryRateLimitBackend(1)
+        self._dummy_hash: Optional[str] = None
+        self.dummy_verifies = 0
+        self.dummy_verifies_skipped = 0
+
     async def register(self, user_in: UserCreate) -> UserResponse:
         if await user_dao.get_by_email(user_in.email):
             raise HTTPException(status_code=400, detail="Email already registered")
             
-        hashed_pwd = get_password_hash(user_in.password)
+        hashed_pwd = await password_hasher.hash(user_in.password)
         new_user = await user_dao.create(user_in.email, hashed_pwd, user_in.role)
         return UserResponse.model_validate(new_user)
 
-    async def login(self, user_in: UserLogin) -> TokenWithUser:
-        user = await user_dao.get_by_email(user_in.email)
-        if not user or not verify_password(user_in.password, user.password_hash):
+    async def login(self, user_in: UserLogin, client_ip: str) -> TokenWithUser:
+        if settings.LOGIN_RATE_LIMIT_ENABLED:
+            await self._check_login_rate(client_ip, user_in.email)
+
+        user = await user_dao.get_for_login(user_in.email)
+        if not user:
+            await self._dummy_verify(user_in.password)
             raise HTTPException(status_code=401, detail="Incorrect email or password")
-            
+
+        is_valid, new_hash = await password_hasher.verify_and_update(user_in.password, user.password_hash)
+        if not is_valid:
+            raise HTTPException(status_code=401, detail="Incorrect email or password")
+
+        # Stored hash used an outdated bcrypt cost: upgrade it while we have the plaintext
+        if new_hash:
+            await user_dao.update_password(user.id, new_hash)
+
         access_token = create_access_token(subject=user.id, role=user.role)
         user_response = UserResponse.model_validate(user)
         return TokenWithUser(access_token=access_token, user=user_response)
 
+    async def _check_login_rate(self, client_ip: str, email: str) -> None:
+        """429 before any DB or bcrypt work once the IP or the email is over its limit."""
+        for scope, key, per_minute, burst in (
+            ("login_ip", client_ip, settings.LOGIN_IP_PER_MINUTE, settings.LOGIN_IP_BURST),
+            ("login_email", email.lower(), settings.LOGIN_EMAIL_PER_MINUTE, settings.LOGIN_EMAIL_BURST),
+        ):
+            wait = await login_limiter.hit(scope, key, per_minute, burst)
+            if wait:
+                raise HTTPException(
+                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                    detail="Too many login attempts, please retry later",
+                    headers={"Retry-After": str(math.ceil(wait))},
+                )
+
+    async def _dummy_verify(self, password: str) -> None:
+        """
+        Spend a bcrypt verify on an unknown email so its 401 takes as long as a
+        wrong password's. Capped: past the budget the answer is immediate, so a
+        stuffing run over unknown emails cannot eat the hashing pool.
+        """
+        rate = settings.LOGIN_DUMMY_VERIFY_PER_SECOND
+        if rate <= 0 or self._dummy_budget.take_now("dummy", rate, max(1.0, rate)):
+            self.dummy_verifies_skipped += 1
+            return
+
+        if self._dummy_hash is None:
+            self._dummy_hash = await password_hasher.hash(secrets.token_urlsafe(16))
+        self.dummy_verifies += 1
+        await password_hasher.verify(password, self._dummy_hash)
+
 auth_service = AuthService()
\ No newline at end of file
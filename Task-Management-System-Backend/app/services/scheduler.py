@@ -0,0 +1,69 @@
+"""
+Periodic background jobs, started and stopped by the lifespan in app/main.py.
+
+Every worker process runs the same schedule. A job registered with a lock_id
+runs under that Postgres advisory lock (taken without waiting), so only one
+worker runs it at a time; the others skip that round. Job queries run on the
+connection holding the lock.
+"""
+import asyncio
+import time
+from typing import Awaitable, Callable, List, Optional
+
+from app.core.metrics import scheduled_job_runs
+from app.database.database import db
+
+
+class Job:
+
+    def __init__(self, name: str, interval: float, run: Callable[[], Awaitable], lock_id: Optional[int] = None):
+        self.name, self.interval, self.run, self.lock_id = name, interval, run, lock_id
+        self.last_run: Optional[float] = None   # time.time() of the last completed run
+
+
+class Scheduler:
+
+    def __init__(self):
+        self.jobs: List[Job] = []
+        self._tasks: List[asyncio.Task] = []
+
+    def add(self, name: str, interval: float, run: Callable[[], Awaitable], lock_id: Optional[int] = None) -> Job:
+        job = Job(name, interval, run, lock_id)
+        self.jobs.append(job)
+        return job
+
+    def start(self) -> None:
+        self._tasks = [asyncio.create_task(self._loop(job), name=f"job:{job.name}") for job in self.jobs]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()   # a transaction left open by the job rolls back
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def run_once(self, job: Job) -> bool:
+        """Run `job` now; False when another worker holds its lock."""
+        if job.lock_id is None:
+            await job.run()
+        else:
+            async with db.advisory_lock(job.lock_id) as locked:
+                if not locked:
+                    scheduled_job_runs.inc((job.name, "skipped"))
+                    return False
+                await job.run()
+
+        job.last_run = time.time()
+        scheduled_job_runs.inc((job.name, "ok"))
+        return True
+
+    async def _loop(self, job: Job) -> None:
+        while True:
+            try:
+                await self.run_once(job)
+            except Exception as exc:
+                # Keep the schedule alive whatever the job (or a pluggable
+                # notifier) raised; the next round retries
+                scheduled_job_runs.inc((job.name, "failed"))
+                print(f"Scheduled job {job.name} failed: {exc!r}")
+
+            await asyncio.sleep(job.interval)
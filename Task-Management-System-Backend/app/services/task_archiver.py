@@ -0,0 +1,96 @@
+"""
+Moves Completed tasks older than ARCHIVE_AFTER_DAYS from `tasks` into the
+partitioned `tasks_archive` table (migration 006), in batched transactions.
+
+Runs on the scheduler of every worker (see app/main.py); an advisory lock
+makes sure only one of them archives at a time. To archive existing history
+in one go (e.g. right after deploying migration 006):
+
+    python -m app.services.task_archiver --older-than-days 90
+"""
+import argparse
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Optional
+
+from app.core.config import settings
+from app.dao.task_dao import TaskDAO, task_dao
+from app.database.database import db
+
+
+class TaskArchiver:
+
+    def __init__(self, dao: TaskDAO):
+        self.dao = dao
+        self.archived_total = 0
+
+    async def archive(
+        self,
+        older_than_days: float,
+        batch_size: int,
+        max_batches: Optional[int] = None,
+        on_batch: Optional[Callable[[int], None]] = None,
+    ) -> int:
+        """
+        Archive tasks completed (last updated) more than older_than_days ago.
+        Returns the number moved; 0 when another process holds the archiver lock.
+        """
+        cutoff = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(days=older_than_days)
+        moved_total = 0
+
+        async with self.dao.archive_lock() as locked:
+            if not locked:
+                return 0
+
+            oldest = await self.dao.get_archive_oldest(cutoff)
+            if oldest is None:
+                return 0
+            await self.dao.ensure_archive_partitions(oldest, cutoff)
+
+            batches = 0
+            while max_batches is None or batches < max_batches:
+                moved = await self.dao.archive_batch(cutoff, batch_size)
+                moved_total += moved
+                batches += 1
+                if on_batch:
+                    on_batch(moved_total)
+                if moved < batch_size:
+                    break
+
+            if moved_total:
+                # One change event for the whole run: listings and ETags refresh everywhere
+                await self.dao.notify_archived(moved_total)
+
+        self.archived_total += moved_total
+        return moved_total
+
+    async def run_scheduled(self) -> None:
+        """Scheduler job (every ARCHIVE_INTERVAL_SECONDS); archive() takes its own lock."""
+        moved = await self.archive(settings.ARCHIVE_AFTER_DAYS, settings.ARCHIVE_BATCH_SIZE)
+        if moved:
+            print(f"Archived {moved} completed task(s)")
+
+
+task_archiver = TaskArchiver(task_dao)
+
+
+async def _main(args) -> None:
+    await db.connect()
+    try:
+        moved = await task_archiver.archive(
+            args.older_than_days,
+            args.batch_size,
+            max_batches=args.max_batches,
+            on_batch=lambda total: print(f"\rArchived {total} task(s)", end="", flush=True),
+        )
+        print(f"\rArchived {moved} task(s) older than {args.older_than_days:g} days")
+    finally:
+        await db.disconnect()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Move old completed tasks into tasks_archive")
+    parser.add_argument("--older-than-days", type=float, default=settings.ARCHIVE_AFTER_DAYS)
+    parser.add_argument("--batch-size", type=int, default=settings.ARCHIVE_BATCH_SIZE)
+    parser.add_argument("--max-batches", type=int, default=None, help="stop after this many batches")
+    asyncio.run(_main(parser.parse_args()))
@@ -0,0 +1,35 @@
+"""
+Spreads new tasks over employees for POST /tasks/auto-assign.
+
+An employee's load is the sum of the weights of their open tasks, where a
+task's weight is 1 plus due-date pressure: up to 1 more the closer it is to
+being due (see GET_EMPLOYEE_LOADS_SQL, which computes the same sum in SQL).
+New tasks go heaviest first, each to the employee with the lowest load at
+that moment (a min-heap of (load, employee id), so ties go to the lowest id),
+whose load then grows by the task's weight.
+"""
+import heapq
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence
+
+
+def task_weight(due_date: Optional[datetime], now: datetime, horizon_seconds: float) -> float:
+    if due_date is None:
+        return 1.0
+    if due_date.tzinfo:
+        due_date = due_date.replace(tzinfo=None)   # stored naive, as TaskDAO does
+    pressure = 1 - (due_date - now).total_seconds() / horizon_seconds
+    return 1 + min(1.0, max(0.0, pressure))
+
+
+def assign(loads: Dict[int, float], weights: Sequence[float]) -> List[int]:
+    """Employee id for each task in `weights`; `loads` must not be empty."""
+    heap = [(load, employee_id) for employee_id, load in loads.items()]
+    heapq.heapify(heap)
+
+    assignees = [0] * len(weights)
+    for index in sorted(range(len(weights)), key=weights.__getitem__, reverse=True):
+        load, employee_id = heap[0]
+        assignees[index] = employee_id
+        heapq.heapreplace(heap, (load + weights[index], employee_id))
+    return assignees
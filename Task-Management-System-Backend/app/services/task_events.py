@@ -0,0 +1,159 @@
+import asyncio
+import json
+from typing import Dict, List, Optional, Set
+
+from app.core.config import settings
+
+# NOTIFY channel written by the tasks trigger (migrations/003_task_change_notify.sql)
+TASK_EVENTS_CHANNEL = "task_changes"
+
+RESYNC_EVENT = {"type": "resync"}
+
+# Queued by close(): ends the stream (the client's EventSource reconnects)
+_CLOSE = None
+
+
+class TaskSubscription:
+    """One connected client. Its queue is bounded so a slow reader cannot grow memory."""
+
+    def __init__(self, user_id: int, is_admin: bool):
+        self.user_id = user_id
+        self.is_admin = is_admin
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=settings.TASK_EVENTS_QUEUE_SIZE)
+
+    def push(self, event: dict) -> None:
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Too far behind: drop the backlog and tell the client to refetch once
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESYNC_EVENT)
+
+    def close(self) -> None:
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(_CLOSE)
+
+
+class TaskEventHub:
+    """
+    Fans task change notifications out to subscribers: admins receive every
+    change, employees only changes to tasks assigned (or previously assigned) to them.
+
+    In-process observers (see add_observer) additionally get every change plus
+    the listener's connect/disconnect transitions.
+    """
+
+    def __init__(self):
+        self._admins: Set[TaskSubscription] = set()
+        self._by_user: Dict[int, Set[TaskSubscription]] = {}
+        self._observers: List = []
+        self.published = 0
+
+    def add_observer(self, observer) -> None:
+        """observer must provide on_change(change), on_connect() and on_disconnect()."""
+        self._observers.append(observer)
+
+    def subscribe(self, user_id: int, is_admin: bool) -> TaskSubscription:
+        sub = TaskSubscription(user_id, is_admin)
+        if is_admin:
+            self._admins.add(sub)
+        else:
+            self._by_user.setdefault(user_id, set()).add(sub)
+        return sub
+
+    def unsubscribe(self, sub: TaskSubscription) -> None:
+        if sub.is_admin:
+            self._admins.discard(sub)
+            return
+        subs = self._by_user.get(sub.user_id)
+        if subs is not None:
+            subs.discard(sub)
+            if not subs:
+                del self._by_user[sub.user_id]
+
+    def subscriber_count(self) -> int:
+        return len(self._admins) + sum(len(s) for s in self._by_user.values())
+
+    def publish(self, payload: str) -> None:
+        """NOTIFY callback: route one JSON payload to the interested subscribers."""
+        try:
+            change = json.loads(payload)
+        except ValueError:
+            return
+
+        self.published += 1
+        for observer in self._observers:
+            observer.on_change(change)
+
+        if change.get("op") == "archive":
+            # Bulk move by the archiver: one summary instead of per-task events
+            self.resync_all()
+            return
+
+        event = {"type": "task", **change}
+
+        for sub in self._admins:
+            sub.push(event)
+
+        for user_id in {change.get("assigned_to_id"), change.get("previous_assigned_to_id")}:
+            for sub in self._by_user.get(user_id, ()):
+                sub.push(event)
+
+    def on_connect(self) -> None:
+        # Anything sent while the listener was down is lost
+        self.resync_all()
+        for observer in self._observers:
+            observer.on_connect()
+
+    def on_disconnect(self) -> None:
+        for observer in self._observers:
+            observer.on_disconnect()
+
+    def close_all(self) -> None:
+        """Server shutdown: end every stream so draining does not wait on them."""
+        for sub in self._admins:
+            sub.close()
+        for subs in self._by_user.values():
+            for sub in subs:
+                sub.close()
+
+    def resync_all(self) -> None:
+        """Notifications may have been lost (listener reconnected): everyone refetches."""
+        for sub in self._admins:
+            sub.push(RESYNC_EVENT)
+        for subs in self._by_user.values():
+            for sub in subs:
+                sub.push(RESYNC_EVENT)
+
+
+async def sse_stream(hub: TaskEventHub, user_id: int, is_admin: bool):
+    """
+    Server-Sent Events body for one client. Comment-line heartbeats go out
+    every TASK_EVENTS_HEARTBEAT_SECONDS so clients can detect a dead connection.
+
+    Subscribes on first iteration, so a response that is never sent (client
+    gone before it started) never leaves a subscription behind.
+    """
+    sub = hub.subscribe(user_id, is_admin)
+    try:
+        yield "retry: 3000\n\n"
+        while True:
+            try:
+                event: Optional[dict] = await asyncio.wait_for(
+                    sub.queue.get(), timeout=settings.TASK_EVENTS_HEARTBEAT_SECONDS
+                )
+            except asyncio.TimeoutError:
+                yield ": ping\n\n"
+                continue
+
+            if event is _CLOSE:
+                return
+
+            yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+    finally:
+        hub.unsubscribe(sub)
+
+
+task_event_hub = TaskEventHub()
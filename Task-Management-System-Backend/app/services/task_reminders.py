@@ -0,0 +1,125 @@
+"""
+Due-date reminders: open tasks due within DUE_SOON_HOURS get a "due_soon"
+reminder, and an "overdue" one once their due date has passed.
+
+Pending reminders live in the task_due_reminders queue (migration 008), which
+a trigger keeps in step with task due dates and statuses. Each run claims
+them in batches of DUE_REMINDER_BATCH_SIZE and hands every batch to the
+notifier. A batch is committed only after the notifier returns, so a failed
+delivery is retried on the next run.
+
+The scheduler runs this in the background of every worker (see app/main.py),
+under an advisory lock. To run it once by hand:
+
+    python -m app.services.task_reminders
+"""
+import argparse
+import asyncio
+import importlib
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import List, Optional
+
+import orjson
+
+from app.core.config import BASE_DIR, settings
+from app.core.metrics import due_reminders_sent
+from app.dao.task_dao import TaskDAO, task_dao
+from app.database.database import db
+from app.models.task_model import DueReminder
+
+
+# ================= NOTIFIERS =================
+class ReminderNotifier:
+    """Delivers one batch of reminders. Raising leaves the batch queued."""
+
+    async def notify(self, reminders: List[DueReminder]) -> None:
+        raise NotImplementedError
+
+
+class LogNotifier(ReminderNotifier):
+    """Prints one line per reminder (DUE_REMINDER_NOTIFIER=log)."""
+
+    async def notify(self, reminders: List[DueReminder]) -> None:
+        for r in reminders:
+            print(f"Task {r.task_id} {r.kind} (due {r.due_date:%Y-%m-%d %H:%M}, user {r.assigned_to_id}): {r.title}")
+
+
+class FileNotifier(ReminderNotifier):
+    """Appends one JSON line per reminder to `path` (DUE_REMINDER_NOTIFIER=file)."""
+
+    def __init__(self, path: Path):
+        self.path = path
+
+    def _append(self, data: bytes) -> None:
+        with open(self.path, "ab") as f:
+            f.write(data)
+
+    async def notify(self, reminders: List[DueReminder]) -> None:
+        data = b"".join(orjson.dumps(r) + b"\n" for r in reminders)
+        await asyncio.to_thread(self._append, data)
+
+
+def notifier_from_settings() -> ReminderNotifier:
+    kind = settings.DUE_REMINDER_NOTIFIER
+    if kind == "log":
+        return LogNotifier()
+    if kind == "file":
+        return FileNotifier(BASE_DIR / settings.DUE_REMINDER_FILE)
+    if ":" in kind:
+        # "package.module:factory", called without arguments
+        module, _, name = kind.partition(":")
+        return getattr(importlib.import_module(module), name)()
+    raise ValueError(f"Unknown DUE_REMINDER_NOTIFIER {kind!r}")
+
+
+# ================= JOB =================
+class TaskReminders:
+
+    def __init__(self, dao: TaskDAO, notifier: Optional[ReminderNotifier] = None):
+        self.dao = dao
+        self.notifier = notifier   # None: notifier_from_settings() on first run
+
+    async def run(self, batch_size: Optional[int] = None, max_batches: Optional[int] = None) -> int:
+        """Claim and deliver reminders that are due; returns how many were sent."""
+        batch_size = batch_size or settings.DUE_REMINDER_BATCH_SIZE
+        max_batches = max_batches or settings.DUE_REMINDER_MAX_BATCHES
+        if self.notifier is None:
+            self.notifier = notifier_from_settings()
+
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        due_soon_until = now + timedelta(hours=settings.DUE_SOON_HOURS)
+        sent = 0
+
+        for _ in range(max_batches):
+            async with self.dao.transaction():
+                reminders = await self.dao.claim_due_reminders(now, due_soon_until, batch_size)
+                if reminders:
+                    await self.notifier.notify(reminders)
+
+            for r in reminders:
+                due_reminders_sent.inc((r.kind,))
+            sent += len(reminders)
+            if len(reminders) < batch_size:
+                break
+
+        return sent
+
+
+task_reminders = TaskReminders(task_dao)
+
+
+async def _main(args) -> None:
+    await db.connect()
+    try:
+        sent = await task_reminders.run(args.batch_size, args.max_batches)
+        print(f"Sent {sent} reminder(s)")
+    finally:
+        await db.disconnect()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Send due-soon and overdue task reminders once")
+    parser.add_argument("--batch-size", type=int, default=settings.DUE_REMINDER_BATCH_SIZE)
+    parser.add_argument("--max-batches", type=int, default=settings.DUE_REMINDER_MAX_BATCHES)
+    asyncio.run(_main(parser.parse_args()))
@@ -1,8 +1,52 @@
+from datetime import datetime, timedelta, timezone
+from typing import AsyncIterator, Dict, List, Optional, Tuple, Union
+import asyncpg
+from asyncpg import Record
+from fastapi import HTTPException, status
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.serialization import row_fields, dump_ndjson, dump_csv
 from app.dao.task_dao import TaskDAO
-from app.schemas.task_schema import TaskCreate, TaskUpdate, TaskResponse
+from app.schemas.task_schema import (
+    TaskCreate,
+    TaskUpdate,
+    TaskResponse,
+    TaskFilter,
+    TaskListFilter,
+    TaskStatusUpdateItem,
+    BulkItemResult,
+    BulkResult,
+    TaskAutoAssignItem,
+    AutoAssignItemResult,
+    AutoAssignResult,
+    TaskStats,
+    AssigneeTaskStats,
+    CompletionBucket,
+)
 from app.exceptions.NotFoundExcp import NotFoundError
+from app.models.task_model import Task
 from app.models.enums.TaskStatus import TaskStatus
 from app.services.user_service import user_service
+from app.services.task_versions import task_versions
+from app.services.task_balancer import assign, task_weight
+
+
+# GET /tasks/stats results; cleared by every task mutation below
+task_stats_cache = TTLCache(64, settings.TASK_STATS_CACHE_SECONDS)
+
+
+# Search results are ordered by (score, id); the page cursor carries both
+def search_cursor(row) -> str:
+    return f"{row['score']!r}:{row['id']}"
+
+
+def _parse_search_cursor(after: str) -> Tuple[float, int]:
+    try:
+        score, task_id = after.split(":", 1)
+        return float(score), int(task_id)
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid search cursor")
 
 
 class TaskService:
@@ -12,79 +56,336 @@ class TaskService:
 
 
     # CREATE TASK (ADMIN assigns to employee)
-    async def create_task(self, task_in: TaskCreate) -> TaskResponse:
+    async def create_task(self, task_in: TaskCreate) -> Task:
 
-        # 🔥 Check employee exists
-        user = await user_service.get_user_by_id(task_in.assigned_to_id)
+        # 🔥 Employee check happens inside the insert (single round-trip)
+        task, assignee_role = await self.dao.create(task_in)
 
-        if not user:
-            raise NotFoundError("Assigned employee does not exist")
+        if task is None:
+            self._raise_assignee_error(assignee_role)
+
+        self._after_write([task.assigned_to_id])
+        return task
 
-        if user.role.upper() != "EMPLOYEE":
-            raise NotFoundError("Task can only be assigned to employees")
+    def _after_write(self, user_ids=None):
+        # Invalidate derived read state; user_ids=None when any assignee may be affected
+        task_stats_cache.clear()
+        task_versions.touch(user_ids)
 
-        return await self.dao.create(task_in)
+    def _raise_assignee_error(self, assignee_role):
+        if assignee_role is None:
+            raise NotFoundError("Assigned employee does not exist")
+
+        raise NotFoundError("Task can only be assigned to employees")
 
     # ==================================================
-    async def get_all_tasks(self) -> list[TaskResponse]:
-        return await self.dao.get_all()
+    async def get_all_tasks(
+        self, filters: TaskListFilter, limit: int, after: Optional[int] = None
+    ) -> List[Record]:
+        return await self.dao.get_all(filters, limit, after)
+
+    # SEARCH: ranked full-text (or fuzzy title) matches, keyset-paginated
+    async def search_tasks(
+        self,
+        q: str,
+        fuzzy: bool,
+        assigned_user: Optional[int],
+        limit: int,
+        after: Optional[str] = None
+    ) -> List[Record]:
+        cursor = _parse_search_cursor(after) if after else None
+        try:
+            return await self.dao.search(q, fuzzy, assigned_user, limit, cursor)
+        except asyncpg.UndefinedFunctionError:
+            if not fuzzy:
+                raise
+            # similarity() / % come from pg_trgm, see migrations/005_task_search.sql
+            raise HTTPException(
+                status_code=status.HTTP_501_NOT_IMPLEMENTED,
+                detail="Fuzzy search is not available on this database"
+            )
+
+    # EXPORT: encoded chunks of every matching task, streamed from a cursor
+    async def export_tasks(self, filters: TaskListFilter, fmt: str) -> AsyncIterator[bytes]:
+        fields = row_fields(TaskResponse)
+
+        if fmt == "csv":
+            yield dump_csv((), fields, header=True)
+
+        async for rows in self.dao.iter_all(filters, settings.TASK_EXPORT_PREFETCH):
+            yield dump_csv(rows, fields) if fmt == "csv" else dump_ndjson(rows, fields)
 
     # ==================================================
-    async def get_task(self, task_id: int) -> TaskResponse:
-        task = await self.dao.get_by_id(task_id)
+    async def get_task(self, task_id: int, include_archived: bool = False) -> Task:
+        task = await self.dao.get_by_id(task_id, include_archived)
         if not task:
             raise NotFoundError("Task not found")
         return task
 
-    async def update_task(self, task_id: int, task_update: TaskUpdate) -> TaskResponse:
-        existing_task = await self.dao.get_by_id(task_id)
+    async def update_task(self, task_id: int, task_update: TaskUpdate) -> Task:
+
+        # Existence and employee checks run inside the UPDATE itself
+        updated_task, task_exists, assignee_role = await self.dao.update(task_id, task_update)
 
-        if not existing_task:
+        if not task_exists:
             raise NotFoundError("Task not found")
 
-        # Validate assigned employee only if reassignment requested
-        if task_update.assigned_to_id is not None:
+        # Only a rejected reassignment leaves an existing task untouched
+        if updated_task is None:
+            self._raise_assignee_error(assignee_role)
+
+        # A reassignment also changes the previous assignee's list
+        self._after_write(None if task_update.assigned_to_id is not None else [updated_task.assigned_to_id])
+        return updated_task
+
 
-            assigned_user = await user_service.get_user_by_id(
-                task_update.assigned_to_id
+    # Get User's Task 
+    async def get_user_task(
+        self, user_id: int, filters: TaskFilter, limit: int, after: Optional[int] = None
+    ) -> List[Record]:
+        return await self.dao.get_task_by_user_id(user_id, filters, limit, after)
+
+
+    # EMPLOYEE STATUS UPDATE
+    async def update_status(self, user_id: int, task_id: int, status: TaskStatus) -> Task:
+
+        # Ownership check is part of the UPDATE's WHERE clause
+        updated_task, task_exists = await self.dao.update_status(task_id, user_id, status)
+
+        if not task_exists:
+            raise NotFoundError("Task not found")
+
+        if updated_task is None:
+            raise NotFoundError("This task is not assigned to this user")
+
+        self._after_write([user_id])
+        return updated_task
+
+    #Delete task 
+    async def delete_task(self, task_id: int):
+
+        if not await self.dao.delete(task_id):
+            raise NotFoundError("Task not found")
+
+        self._after_write()
+
+    # ==================================================
+    # STATISTICS (dashboard counters, computed in SQL)
+    # ==================================================
+    async def get_stats(self, bucket: str = "week", periods: int = 12) -> TaskStats:
+
+        key = (bucket, periods)
+        stats = task_stats_cache.get(key)
+        if stats is not None:
+            return stats
+
+        by_status: dict[str, int] = {}
+        by_assignee: dict[int, AssigneeTaskStats] = {}
+
+        for row in await self.dao.get_counts(timedelta(hours=settings.DUE_SOON_HOURS)):
+            by_status[row["status"]] = by_status.get(row["status"], 0) + row["total"]
+
+            assignee = by_assignee.setdefault(
+                row["assigned_to_id"],
+                AssigneeTaskStats(assigned_to_id=row["assigned_to_id"], total=0, overdue=0, due_soon=0, by_status={})
             )
+            assignee.total += row["total"]
+            assignee.overdue += row["overdue"]
+            assignee.due_soon += row["due_soon"]
+            assignee.by_status[row["status"]] = row["total"]
 
-            if not assigned_user:
-                raise NotFoundError("Assigned employee does not exist")
+        completion = [
+            CompletionBucket(
+                bucket=row["bucket"],
+                total=row["total"],
+                completed=row["completed"],
+                completion_rate=row["completed"] / row["total"] if row["total"] else 0.0,
+            )
+            for row in await self.dao.get_completion_buckets(bucket, periods)
+        ]
 
-            if assigned_user.role.upper() != "EMPLOYEE":
-                raise NotFoundError("Task can only be assigned to employees")
+        stats = TaskStats(
+            total=sum(by_status.values()),
+            overdue=sum(a.overdue for a in by_assignee.values()),
+            due_soon=sum(a.due_soon for a in by_assignee.values()),
+            by_status=by_status,
+            by_assignee=sorted(by_assignee.values(), key=lambda a: a.assigned_to_id),
+            completion=completion,
+        )
 
-        updated_task = await self.dao.update(task_id, task_update)
-        return updated_task or existing_task
+        task_stats_cache.set(key, stats)
+        return stats
 
+    async def get_user_stats(self, user_id: int) -> AssigneeTaskStats:
+        # One indexed query over this user's tasks only
+        stats = AssigneeTaskStats(assigned_to_id=user_id, total=0, overdue=0, due_soon=0, by_status={})
 
-    # Get User's Task 
-    async def get_user_task(self, user_id: int) -> list[TaskResponse]:
-        return await self.dao.get_task_by_user_id(user_id)
+        for row in await self.dao.get_user_counts(user_id, timedelta(hours=settings.DUE_SOON_HOURS)):
+            stats.total += row["total"]
+            stats.overdue += row["overdue"]
+            stats.due_soon += row["due_soon"]
+            stats.by_status[row["status"]] = row["total"]
 
+        return stats
 
-    # EMPLOYEE STATUS UPDATE
-    async def update_status(self, user_id: int, task_id: int, status: TaskStatus) -> TaskResponse:
+    # ==================================================
+    # BULK OPERATIONS
+    # Items arrive as an async stream (JSON array or NDJSON). Invalid items are
+    # reported per index as ValueError; valid ones are written in batches of
+    # BULK_BATCH_SIZE, each in its own short transaction opened only once the
+    # batch has been read. The stream is the live request body: a slow
+    # uploader must not hold a pooled connection (or row locks) while it sends.
+    # A failure stops the request but keeps the batches already committed.
+    # ==================================================
+    async def create_tasks_bulk(
+        self, items: AsyncIterator[Union[TaskCreate, ValueError]]
+    ) -> BulkResult:
 
-        task = await self.get_task(task_id)
+        results: List[BulkItemResult] = []
+        batch: List[Tuple[int, TaskCreate]] = []
 
-        #  Handle 
-        if task.assigned_to_id != user_id:
-            raise NotFoundError("This task is not assigned to this user")
+        index = 0
+        async for item in items:
+            if isinstance(item, ValueError):
+                results.append(BulkItemResult(index=index, error=str(item)))
+            else:
+                batch.append((index, item))
+            index += 1
 
-        update_data = TaskUpdate(status=status)
+            if len(batch) >= settings.BULK_BATCH_SIZE:
+                results.extend(await self._create_batch(batch))
+                batch = []
 
-        updated_task = await self.dao.update(task_id, update_data)
+        if batch:
+            results.extend(await self._create_batch(batch))
 
-        return updated_task or task
+        self._after_write()
+        return self._bulk_result(results)
 
-    #Delete task 
-    async def delete_task(self, task_id: int):
+    async def _create_batch(self, batch: List[Tuple[int, TaskCreate]]) -> List[BulkItemResult]:
 
-        task = await self.dao.get_by_id(task_id)
+        results: List[BulkItemResult] = []
+        valid: List[Tuple[int, TaskCreate]] = []
 
-        if not task:
-            raise NotFoundError("Task not found")
+        async with self.dao.transaction():
+            # 🔥 One query validates every assignee in the batch
+            roles = await user_service.get_roles_by_ids({t.assigned_to_id for _, t in batch})
+
+            for index, task in batch:
+                role = roles.get(task.assigned_to_id)
+                if role is None:
+                    results.append(BulkItemResult(index=index, error="Assigned employee does not exist"))
+                elif role.upper() != "EMPLOYEE":
+                    results.append(BulkItemResult(index=index, error="Task can only be assigned to employees"))
+                else:
+                    valid.append((index, task))
+
+            if valid:
+                created = await self.dao.create_many([t for _, t in valid])
+                for (index, _), task in zip(valid, created):
+                    results.append(BulkItemResult(index=index, id=task.id))
+
+        return results
+
+    async def update_status_bulk(
+        self,
+        items: AsyncIterator[Union[TaskStatusUpdateItem, ValueError]],
+        assigned_user: Optional[int] = None
+    ) -> BulkResult:
+        """assigned_user restricts updates to that user's tasks (None = any task)."""
+
+        results: List[BulkItemResult] = []
+        batch: List[Tuple[int, TaskStatusUpdateItem]] = []
+
+        index = 0
+        async for item in items:
+            if isinstance(item, ValueError):
+                results.append(BulkItemResult(index=index, error=str(item)))
+            else:
+                batch.append((index, item))
+            index += 1
+
+            if len(batch) >= settings.BULK_BATCH_SIZE:
+                results.extend(await self._update_status_batch(batch, assigned_user))
+                batch = []
+
+        if batch:
+            results.extend(await self._update_status_batch(batch, assigned_user))
+
+        self._after_write()
+        return self._bulk_result(results)
+
+    async def _update_status_batch(
+        self, batch: List[Tuple[int, TaskStatusUpdateItem]], assigned_user: Optional[int]
+    ) -> List[BulkItemResult]:
+
+        # One statement: atomic without an explicit transaction
+        updated_ids = await self.dao.update_status_many([i for _, i in batch], assigned_user)
+
+        return [
+            BulkItemResult(index=index, id=item.id)
+            if item.id in updated_ids
+            else BulkItemResult(index=index, error="Task not found or not assigned to this user")
+            for index, item in batch
+        ]
+
+    def _bulk_result(self, results: List[BulkItemResult]) -> BulkResult:
+        results.sort(key=lambda r: r.index)
+        failed = sum(1 for r in results if r.error)
+        return BulkResult(succeeded=len(results) - failed, failed=failed, results=results)
+
+    # ==================================================
+    # AUTO-ASSIGNMENT
+    # Collects every item (up to AUTO_ASSIGN_MAX_TASKS), reads all employee
+    # loads with one aggregate query, balances in memory (task_balancer) and
+    # writes the valid items with one INSERT.
+    # ==================================================
+    async def auto_assign_tasks(
+        self,
+        items: AsyncIterator[Union[TaskAutoAssignItem, ValueError]],
+        employee_ids: Optional[List[int]] = None
+    ) -> AutoAssignResult:
+        """employee_ids limits the candidates (None = every employee)."""
+
+        results: List[AutoAssignItemResult] = []
+        valid: List[Tuple[int, TaskAutoAssignItem]] = []
+
+        index = 0
+        async for item in items:
+            if index >= settings.AUTO_ASSIGN_MAX_TASKS:
+                raise HTTPException(
+                    status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                    detail=f"At most {settings.AUTO_ASSIGN_MAX_TASKS} tasks per request"
+                )
+            if isinstance(item, ValueError):
+                results.append(AutoAssignItemResult(index=index, error=str(item)))
+            else:
+                valid.append((index, item))
+            index += 1
+
+        assigned: Dict[int, int] = {}
+        if valid:
+            now = datetime.now(timezone.utc).replace(tzinfo=None)
+            horizon = settings.AUTO_ASSIGN_DUE_HORIZON_DAYS * 86400
+
+            rows = await self.dao.get_employee_loads(now, horizon, employee_ids)
+            if not rows:
+                raise NotFoundError("No employees to assign tasks to")
+
+            tasks = [t for _, t in valid]
+            assignees = assign(
+                {r["employee_id"]: r["load"] for r in rows},
+                [task_weight(t.due_date, now, horizon) for t in tasks]
+            )
+            ids = await self.dao.insert_pending(tasks, assignees, now)
+
+            for (index, _), task_id, employee_id in zip(valid, ids, assignees):
+                results.append(AutoAssignItemResult(index=index, id=task_id, assigned_to_id=employee_id))
+                assigned[employee_id] = assigned.get(employee_id, 0) + 1
+
+            self._after_write(list(assigned))
 
-        await self.dao.delete(task_id)
+        results.sort(key=lambda r: r.index)
+        return AutoAssignResult(
+            succeeded=len(valid), failed=len(results) - len(valid), results=results, assigned=assigned
+        )
@@ -0,0 +1,100 @@
+import time
+from typing import Iterable, Optional
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.dao.task_dao import TaskDAO, task_dao
+
+
+class TaskVersionTracker:
+    """
+    Opaque version tokens for "all tasks" and "tasks of user N", used as ETags.
+
+    Tokens change on every task_changes notification (so every worker agrees)
+    and on local writes (so a client sees its own change immediately). A token
+    missing from memory is seeded from (max(updated_at), count) in the database.
+    While the NOTIFY listener is down changes could go unseen, so no versions
+    are handed out at all.
+    """
+
+    def __init__(self, dao: TaskDAO):
+        self.dao = dao
+        self.enabled = False
+        self._all: Optional[str] = None
+        self._users = TTLCache(100_000, 3600)
+        self._changes = 0
+
+    # ---------- TaskEventHub observer ----------
+    def on_change(self, change: dict) -> None:
+        token = f"n{change.get('changed_at')}-{change.get('id')}"
+        if change.get("op") == "archive":
+            self._set_all(token)   # tasks of any user may have moved
+            return
+        self._bump(token, {change.get("assigned_to_id"), change.get("previous_assigned_to_id")} - {None})
+
+    def on_connect(self) -> None:
+        self._reset()
+        self.enabled = True
+
+    def on_disconnect(self) -> None:
+        self.enabled = False
+        self._reset()
+
+    # ---------- local writes ----------
+    def touch(self, user_ids: Optional[Iterable[int]] = None) -> None:
+        """Record a write made by this process; user_ids=None means any user may be affected."""
+        token = f"l{time.time_ns()}"
+        if user_ids is None:
+            self._set_all(token)
+        else:
+            self._bump(token, user_ids)
+
+    def _set_all(self, token: str) -> None:
+        self._changes += 1
+        self._all = token
+        self._users.clear()
+
+    def _bump(self, token: str, user_ids: Iterable[int]) -> None:
+        self._changes += 1
+        self._all = token
+        for user_id in user_ids:
+            self._users.set(user_id, token)
+
+    def _reset(self) -> None:
+        self._changes += 1
+        self._all = None
+        self._users.clear()
+
+    # ---------- lookups ----------
+    def _available(self) -> bool:
+        return self.enabled and settings.ETAGS_ENABLED
+
+    async def all_tasks(self) -> Optional[str]:
+        if not self._available():
+            return None
+        if self._all is None:
+            self._all = await self._seed(None)
+        return self._all
+
+    async def user_tasks(self, user_id: int) -> Optional[str]:
+        if not self._available():
+            return None
+        version = self._users.get(user_id)
+        if version is None:
+            version = await self._seed(user_id)
+            if version is not None:
+                self._users.set(user_id, version)
+        return version
+
+    async def _seed(self, user_id: Optional[int]) -> Optional[str]:
+        changes_before = self._changes
+        row = await self.dao.get_version_seed(user_id)
+
+        # A change landed while we were querying: the seed may already be stale
+        if self._changes != changes_before or not self.enabled:
+            return None
+
+        return f"s{row['max_updated_at']}-{row['total']}"
+
+
+task_versions = TaskVersionTracker(task_dao)
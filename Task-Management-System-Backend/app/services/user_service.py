@@ -1,24 +1,23 @@
-from passlib.context import CryptContext
+from typing import Dict, Iterable, List, Optional
+from asyncpg import Record
 from fastapi import HTTPException, status
 from app.dao.user_dao import UserDAO , user_dao
 from app.schemas.user_schema import UserCreate, UserResponse
+from app.core.security import password_hasher
 
 
-# Setup Password Hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 class UserService:
 
     def __init__(self, dao: UserDAO):
         self.user_dao = dao
 
     # --- HELPER: Hashing ---
-    def get_password_hash(self, password: str) -> str:
-        return pwd_context.hash(password)
+    async def get_password_hash(self, password: str) -> str:
+        return await password_hasher.hash(password)
 
     # --- HELPER: Verify ---
-    def verify_password(self, plain_password, hashed_password) -> bool:
-        return pwd_context.verify(plain_password, hashed_password)
+    async def verify_password(self, plain_password, hashed_password) -> bool:
+        return await password_hasher.verify(plain_password, hashed_password)
 
     # --- LOGIC ---
     async def register_user(self, user_in: UserCreate) -> UserResponse:
@@ -31,7 +30,7 @@ class UserService:
             )
 
         # 2. Hash the password
-        hashed_pwd = self.get_password_hash(user_in.password)
+        hashed_pwd = await self.get_password_hash(user_in.password)
 
         # 3. Create User
         new_user = await self.user_dao.create(
@@ -42,15 +41,22 @@ class UserService:
 
         return UserResponse.model_validate(new_user)
 
-    async def get_user_by_id(self, user_id: int) -> UserResponse:
-        user = await self.user_dao.get_by_id(user_id)
+    async def get_user_by_id(self, user_id: int, cached: bool = False) -> UserResponse:
+        # cached=True may serve the per-process user cache (see UserDAO.get_cached_by_id)
+        if cached:
+            user = await self.user_dao.get_cached_by_id(user_id)
+        else:
+            user = await self.user_dao.get_by_id(user_id)
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
         return UserResponse.model_validate(user)
     
-    async def get_all_users(self) -> list[UserResponse]:
-        users = await self.user_dao.get_all()
-        return [UserResponse.model_validate(user) for user in users]
+    async def get_roles_by_ids(self, user_ids: Iterable[int]) -> Dict[int, str]:
+        # One set-based lookup instead of get_user_by_id per id; unknown ids are absent
+        return await self.user_dao.get_roles_by_ids(list(user_ids))
+
+    async def get_all_users(self, limit: int, after: Optional[int] = None) -> List[Record]:
+        return await self.user_dao.get_all(limit, after)
 
 # Instantiate Service
 user_service = UserService(user_dao)
\ No newline at end of file
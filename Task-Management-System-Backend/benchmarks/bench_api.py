@@ -0,0 +1,245 @@
+"""
+Latency/throughput benchmark for the API hot paths.
+
+    python -m benchmarks.bench_api                       # in-process ASGI
+    python -m benchmarks.bench_api --transport uvicorn   # real server over HTTP
+    python -m benchmarks.compare old.json new.json
+
+Seeds DATABASE_URL (see benchmarks/seed.py), then drives each scenario with
+--concurrency clients for --requests requests after a short warm-up, and
+writes p50/p95/p99 latency and throughput per scenario to a JSON file
+(benchmarks/results/<commit>-<transport>.json by default). Needs httpx.
+Login rate limiting is off unless LOGIN_RATE_LIMIT_ENABLED is set.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import httpx
+
+# Every benchmark client logs in from the same address; the login throttle
+# would turn most of the login scenario into 429s (the uvicorn child inherits this)
+os.environ.setdefault("LOGIN_RATE_LIMIT_ENABLED", "false")
+
+from app.core.config import BASE_DIR, settings
+from benchmarks.seed import SeedInfo, seed
+
+RESULTS_DIR = BASE_DIR / "benchmarks" / "results"
+
+SCENARIOS = ["login", "list_tasks", "my_tasks", "patch_task", "update_status"]
+
+
+# ================= CLIENTS =================
+@asynccontextmanager
+async def asgi_client():
+    """The real app from app/main.py, called in-process (lifespan included)."""
+    from app.main import app
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            yield client
+
+
+@asynccontextmanager
+async def uvicorn_client(port: int, workers: int):
+    """`uvicorn app.main:app` in a child process, called over HTTP."""
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning", "--no-access-log"],
+        cwd=BASE_DIR,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    limits = httpx.Limits(max_connections=1000, max_keepalive_connections=1000)
+    try:
+        async with httpx.AsyncClient(base_url=base_url, limits=limits) as client:
+            for _ in range(100):
+                if proc.poll() is not None:
+                    raise RuntimeError("uvicorn exited during startup")
+                try:
+                    await client.get("/openapi.json")
+                    break
+                except httpx.TransportError:
+                    await asyncio.sleep(0.1)
+            else:
+                raise RuntimeError("uvicorn did not start")
+            yield client
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+
+
+# ================= SCENARIOS =================
+async def login(client: httpx.AsyncClient, email: str, password: str) -> str:
+    r = await client.post("/auth/login", json={"email": email, "password": password})
+    r.raise_for_status()
+    return r.json()["access_token"]
+
+
+def bearer(token: str) -> dict:
+    return {"Authorization": f"Bearer {token}"}
+
+
+async def build_scenarios(client: httpx.AsyncClient, info: SeedInfo, page_size: int) -> Dict[str, Callable]:
+    """Each scenario is a zero-argument coroutine function issuing one request."""
+    rng = random.Random(7)
+    admin = bearer(await login(client, info.admin_email, info.password))
+    employees = [
+        (bearer(await login(client, email, info.password)), info.task_ids[email])
+        for email in info.employee_emails
+    ]
+    task_ids = info.all_task_ids
+    statuses = ["Pending", "In Progress", "Completed"]
+
+    async def do_login():
+        return await client.post(
+            "/auth/login", json={"email": rng.choice(info.employee_emails), "password": info.password}
+        )
+
+    async def list_tasks():
+        return await client.get("/tasks/", params={"limit": page_size}, headers=admin)
+
+    async def my_tasks():
+        headers, _ = rng.choice(employees)
+        return await client.get("/tasks/my-tasks", params={"limit": page_size}, headers=headers)
+
+    async def patch_task():
+        return await client.patch(
+            f"/tasks/{rng.choice(task_ids)}", json={"title": f"bench {rng.random():.6f}"}, headers=admin
+        )
+
+    async def update_status():
+        headers, ids = rng.choice(employees)
+        return await client.patch(
+            f"/tasks/{rng.choice(ids)}/status", json={"new_status": rng.choice(statuses)}, headers=headers
+        )
+
+    return {
+        "login": do_login,
+        "list_tasks": list_tasks,
+        "my_tasks": my_tasks,
+        "patch_task": patch_task,
+        "update_status": update_status,
+    }
+
+
+# ================= MEASUREMENT =================
+def percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+async def run_scenario(call: Callable, requests: int, concurrency: int, warmup: int) -> dict:
+    for _ in range(warmup):
+        await call()
+
+    latencies: List[float] = []
+    errors = 0
+    remaining = requests
+
+    async def worker():
+        nonlocal remaining, errors
+        while remaining > 0:
+            remaining -= 1
+            start = time.perf_counter()
+            try:
+                response = await call()
+                ok = response.status_code < 400
+            except httpx.TransportError:
+                ok = False
+            latencies.append(time.perf_counter() - start)
+            errors += not ok
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    ms = lambda s: round(s * 1000, 3)
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "seconds": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": ms(percentile(latencies, 50)),
+        "p95_ms": ms(percentile(latencies, 95)),
+        "p99_ms": ms(percentile(latencies, 99)),
+        "max_ms": ms(latencies[-1]) if latencies else 0.0,
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BASE_DIR, text=True, stderr=subprocess.DEVNULL
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+async def main(args) -> dict:
+    info = await seed(args.users, args.tasks_per_user)
+    print(f"Seeded {args.users} employees, {len(info.all_task_ids)} tasks")
+
+    client_cm = asgi_client() if args.transport == "asgi" else uvicorn_client(args.port, args.workers)
+    results = {}
+    async with client_cm as client:
+        scenarios = await build_scenarios(client, info, args.page_size)
+        for name in args.scenarios:
+            results[name] = await run_scenario(scenarios[name], args.requests, args.concurrency, args.warmup)
+            r = results[name]
+            print(f"{name:14} {r['throughput_rps']:9.1f} req/s  p50 {r['p50_ms']:8.2f}  "
+                  f"p95 {r['p95_ms']:8.2f}  p99 {r['p99_ms']:8.2f} ms  errors {r['errors']}")
+
+    return {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "config": {
+            "transport": args.transport,
+            "workers": args.workers if args.transport == "uvicorn" else 1,
+            "users": args.users,
+            "tasks_per_user": args.tasks_per_user,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "page_size": args.page_size,
+            "bcrypt_rounds": settings.BCRYPT_ROUNDS,
+            "db_pool_max_size": settings.DB_POOL_MAX_SIZE,
+        },
+        "scenarios": results,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the API hot paths")
+    parser.add_argument("--transport", choices=["asgi", "uvicorn"], default="asgi")
+    parser.add_argument("--port", type=int, default=8799)
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--tasks-per-user", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=1000, help="measured requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=SCENARIOS)
+    parser.add_argument("--out", type=Path, help="result file (default: benchmarks/results/<commit>-<transport>.json)")
+    args = parser.parse_args()
+
+    report = asyncio.run(main(args))
+
+    out = args.out or RESULTS_DIR / f"{report['commit']}-{args.transport}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, indent=2) + "\n")
+    print(f"Results written to {out}")
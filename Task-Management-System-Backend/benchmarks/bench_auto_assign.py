@@ -0,0 +1,56 @@
+"""
+CPU cost of balancing a POST /tasks/auto-assign batch.
+
+    python -m benchmarks.bench_auto_assign [--tasks 50000] [--employees 5000] [--rounds 5]
+
+Employees start with random open-task loads (0-20 tasks, some due soon), as
+GET_EMPLOYEE_LOADS_SQL would return them. New tasks get random due dates: a
+third without one, the rest within the next 30 days. Each round computes
+every task's weight and runs task_balancer.assign, timed with process_time.
+Also prints the spread of final loads. No database needed.
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+
+from app.services.task_balancer import assign, task_weight
+
+HORIZON_SECONDS = 7 * 86400
+
+
+def make_input(tasks: int, employees: int, seed: int = 7):
+    rng = random.Random(seed)
+    now = datetime(2026, 1, 1)
+    loads = {employee_id: rng.randint(0, 20) * rng.uniform(1.0, 1.5) for employee_id in range(1, employees + 1)}
+    due_dates = [
+        None if rng.random() < 1 / 3 else now + timedelta(minutes=rng.randint(0, 30 * 24 * 60))
+        for _ in range(tasks)
+    ]
+    return now, loads, due_dates
+
+
+def main(args) -> None:
+    now, loads, due_dates = make_input(args.tasks, args.employees)
+
+    best = float("inf")
+    for _ in range(args.rounds):
+        start = time.process_time()
+        weights = [task_weight(d, now, HORIZON_SECONDS) for d in due_dates]
+        assignees = assign(loads, weights)
+        best = min(best, time.process_time() - start)
+
+    final = dict(loads)
+    for employee_id, weight in zip(assignees, weights):
+        final[employee_id] += weight
+    print(f"{args.tasks} tasks over {args.employees} employees: {best * 1000:.1f} ms CPU (best of {args.rounds})")
+    print(f"load before: min {min(loads.values()):.1f} max {max(loads.values()):.1f}   "
+          f"after: min {min(final.values()):.1f} max {max(final.values()):.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the auto-assign balancer")
+    parser.add_argument("--tasks", type=int, default=50_000)
+    parser.add_argument("--employees", type=int, default=5_000)
+    parser.add_argument("--rounds", type=int, default=5)
+    main(parser.parse_args())
@@ -0,0 +1,119 @@
+"""
+Per-request overhead of the CORS middleware stack.
+
+    python -m benchmarks.bench_middleware [--requests 20000]
+
+"before" is the old stack from app/main.py: a BaseHTTPMiddleware wrapper
+under Starlette's CORSMiddleware. "after" is app.core.cors.CORSMiddleware.
+Both wrap the same trivial FastAPI app and are called directly through ASGI
+(no network), so the difference is middleware cost alone.
+"""
+import argparse
+import asyncio
+import time
+
+from fastapi import FastAPI
+from fastapi.middleware.cors import CORSMiddleware as StarletteCORSMiddleware
+from fastapi.responses import JSONResponse
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from app.core.cors import CORSMiddleware
+
+ORIGINS = ["http://localhost:5173", "http://127.0.0.1:5173"]
+ORIGIN = ORIGINS[0].encode()
+
+
+class OldAddCORSHeadersMiddleware(BaseHTTPMiddleware):
+    """The wrapper removed from app/main.py, kept here as the baseline."""
+    async def dispatch(self, request, call_next):
+        if request.method == "OPTIONS":
+            return JSONResponse(status_code=200, headers={
+                "Access-Control-Allow-Origin": request.headers.get("origin") or ORIGINS[0],
+                "Access-Control-Allow-Methods": "GET, POST, PUT, PATCH, DELETE, OPTIONS",
+                "Access-Control-Allow-Headers": "Content-Type, Authorization, Accept",
+                "Access-Control-Allow-Credentials": "true",
+                "Access-Control-Max-Age": "86400",
+            })
+        response = await call_next(request)
+        origin = request.headers.get("origin")
+        response.headers["Access-Control-Allow-Origin"] = origin if origin in ORIGINS else ORIGINS[0]
+        response.headers["Access-Control-Allow-Credentials"] = "true"
+        response.headers["Access-Control-Allow-Methods"] = "GET, POST, PUT, PATCH, DELETE, OPTIONS"
+        response.headers["Access-Control-Allow-Headers"] = "Content-Type, Authorization, Accept"
+        return response
+
+
+def make_app(stack: str) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    if stack == "before":
+        app.add_middleware(OldAddCORSHeadersMiddleware)
+        app.add_middleware(
+            StarletteCORSMiddleware, allow_origins=ORIGINS, allow_credentials=True,
+            allow_methods=["*"], allow_headers=["*"], expose_headers=["X-Next-Cursor", "ETag"],
+        )
+    else:
+        app.add_middleware(
+            CORSMiddleware, allow_origins=ORIGINS, allow_credentials=True,
+            allow_headers=["*"], expose_headers=["X-Next-Cursor", "ETag"],
+        )
+    return app
+
+
+def make_scope(method: str, headers) -> dict:
+    return {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": method,
+        "scheme": "http", "path": "/ping", "raw_path": b"/ping", "root_path": "", "query_string": b"",
+        "headers": headers, "client": ("127.0.0.1", 1), "server": ("bench", 80),
+    }
+
+
+async def call(app, scope) -> int:
+    status = 0
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await app(scope, receive, send)
+    return status
+
+
+async def per_request_us(app, scope, requests: int) -> float:
+    assert await call(app, scope) == 200
+    start = time.perf_counter()
+    for _ in range(requests):
+        await call(app, scope)
+    return (time.perf_counter() - start) / requests * 1e6
+
+
+async def main(requests: int) -> None:
+    cases = {
+        "GET with Origin": make_scope("GET", [(b"origin", ORIGIN)]),
+        "preflight": make_scope("OPTIONS", [
+            (b"origin", ORIGIN),
+            (b"access-control-request-method", b"PATCH"),
+            (b"access-control-request-headers", b"authorization, content-type"),
+        ]),
+    }
+    apps = {stack: make_app(stack) for stack in ("before", "after")}
+
+    print(f"requests={requests}")
+    for name, scope in cases.items():
+        old = await per_request_us(apps["before"], scope, requests)
+        new = await per_request_us(apps["after"], scope, requests)
+        print(f"{name:16} before {old:7.1f} us  after {new:7.1f} us  ({old / new:.1f}x)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="CORS middleware overhead")
+    parser.add_argument("--requests", type=int, default=20000)
+    asyncio.run(main(parser.parse_args().requests))
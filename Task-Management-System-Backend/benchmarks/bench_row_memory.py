@@ -0,0 +1,96 @@
+"""
+Memory held per row by a fetched list, old row models vs new.
+
+    python -m benchmarks.bench_row_memory [--rows 100000]
+
+Rows come from generate_series with the shape of the task and user queries,
+so no seeded tables are needed. For each variant the rows are fetched, turned
+into the DAO's return type and kept alive. tracemalloc reports the bytes
+still allocated per row (Records and decoded values included).
+
+- tasks, before: TaskResponse(**dict(row)), the old DAO conversion
+- tasks, after:  Task.from_row(row) (slotted, frozen dataclass)
+- tasks, records: the raw Records that list endpoints now return
+- users, before: the old @dataclass User, with password_hash selected
+- users, after:  slotted User, password_hash not selected
+Needs DATABASE_URL.
+"""
+import argparse
+import asyncio
+import gc
+import tracemalloc
+from dataclasses import dataclass
+from datetime import datetime
+
+import asyncpg
+
+from app.core.config import settings
+from app.models.task_model import Task
+from app.models.user_model import User
+from app.schemas.task_schema import TaskResponse
+
+TASK_ROWS_SQL = """
+SELECT i AS id, 'Task ' || i AS title,
+       CASE WHEN i % 2 = 0 THEN 'Prepare the quarterly report' END AS description,
+       1 + i % 50 AS assigned_to_id,
+       (ARRAY['Pending', 'In Progress', 'Completed'])[1 + i % 3] AS status,
+       CASE WHEN i % 3 > 0 THEN now()::timestamp + i * interval '1 minute' END AS due_date,
+       now()::timestamp AS created_at, now()::timestamp AS updated_at
+FROM generate_series(1, $1) AS i;
+"""
+
+USER_ROWS_SQL = """
+SELECT i AS id, 'user' || i || '@example.com' AS email, {password_hash}
+       'EMPLOYEE' AS role, now()::timestamp AS created_at, now()::timestamp AS updated_at
+FROM generate_series(1, $1) AS i;
+"""
+BCRYPT_HASH = "'$2b$12$' || repeat('x', 53) AS password_hash,"
+
+
+@dataclass
+class OldUser:
+    """app/models/user_model.User before slots (and with password_hash)."""
+    id: int
+    email: str
+    password_hash: str
+    role: str
+    created_at: datetime
+    updated_at: datetime
+
+
+async def measure(conn, query: str, rows: int, convert) -> float:
+    gc.collect()
+    tracemalloc.start()
+    try:
+        records = await conn.fetch(query, rows)
+        kept = [convert(r) for r in records] if convert else records
+        del records
+        gc.collect()
+        size, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del kept
+    return size / rows
+
+
+async def main(rows: int) -> None:
+    conn = await asyncpg.connect(dsn=settings.DATABASE_URL)
+    try:
+        variants = [
+            ("tasks, before", TASK_ROWS_SQL, lambda r: TaskResponse(**dict(r))),
+            ("tasks, after", TASK_ROWS_SQL, Task.from_row),
+            ("tasks, records", TASK_ROWS_SQL, None),
+            ("users, before", USER_ROWS_SQL.format(password_hash=BCRYPT_HASH), lambda r: OldUser(**dict(r))),
+            ("users, after", USER_ROWS_SQL.format(password_hash=""), User.from_row),
+        ]
+        for name, query, convert in variants:
+            per_row = await measure(conn, query, rows, convert)
+            print(f"{name:15} {per_row:7.0f} bytes/row  ({per_row * rows / 2**20:6.1f} MiB for {rows} rows)")
+    finally:
+        await conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure memory per fetched row")
+    parser.add_argument("--rows", type=int, default=100_000)
+    asyncio.run(main(parser.parse_args().rows))
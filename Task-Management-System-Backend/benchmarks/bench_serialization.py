@@ -0,0 +1,81 @@
+"""
+Per-row cost of serializing a task list response.
+
+    python -m benchmarks.bench_serialization [--rows 500] [--repeat 50]
+
+"before" is the old path: TaskResponse(**dict(row)) in the DAO, then FastAPI's
+response_model validation + JSON-mode dump and the stdlib JSONResponse.
+"after" is RowListResponse: rows go straight to orjson. Rows are plain dicts
+here (asyncpg Records behave the same for this purpose), so no database is needed.
+"""
+import argparse
+import json
+import time
+from datetime import datetime, timedelta
+from typing import List
+
+from pydantic import TypeAdapter
+
+from app.core.serialization import dump_rows, row_fields
+from app.schemas.task_schema import TaskResponse
+
+TASK_LIST = TypeAdapter(List[TaskResponse])
+
+
+def make_rows(n: int) -> List[dict]:
+    base = datetime(2026, 1, 1, 9, 30, 0, 123456)
+    statuses = ["Pending", "In Progress", "Completed"]
+    return [
+        {
+            "id": n - i,
+            "title": f"Task {i}",
+            "description": "Prepare the quarterly report" if i % 2 else None,
+            "assigned_to_id": 1 + i % 50,
+            "due_date": base + timedelta(days=i % 30) if i % 3 else None,
+            "status": statuses[i % 3],
+            "created_at": base + timedelta(minutes=i),
+            "updated_at": base + timedelta(minutes=i, seconds=7),
+        }
+        for i in range(n)
+    ]
+
+
+def before(rows: List[dict]) -> bytes:
+    tasks = [TaskResponse(**dict(r)) for r in rows]
+    validated = TASK_LIST.validate_python(tasks)
+    content = TASK_LIST.dump_python(validated, mode="json")
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode()
+
+
+def after(rows: List[dict]) -> bytes:
+    return dump_rows(rows, row_fields(TaskResponse))
+
+
+def per_row_us(fn, rows: List[dict], repeat: int) -> float:
+    fn(rows)   # warm up
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(rows)
+    return (time.perf_counter() - start) / (repeat * len(rows)) * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+
+    # Wire compatibility: both paths must produce the same JSON
+    assert json.loads(before(rows)) == json.loads(after(rows))
+
+    old = per_row_us(before, rows, args.repeat)
+    new = per_row_us(after, rows, args.repeat)
+    print(f"rows={args.rows} repeat={args.repeat}")
+    print(f"before: {old:8.2f} us/row")
+    print(f"after:  {new:8.2f} us/row  ({old / new:.1f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
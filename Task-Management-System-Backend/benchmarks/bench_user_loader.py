@@ -0,0 +1,69 @@
+"""
+User lookups issued by a burst of concurrent requests, with and without the
+batching user loader.
+
+    python -m benchmarks.bench_user_loader [--lookups 500] [--distinct 100] [--rounds 20]
+
+Each round clears the user cache, then starts --lookups concurrent
+UserDAO.get_cached_by_id calls over --distinct existing user ids. That is the
+cold-cache burst after a deploy or a TTL expiry. "before" runs one
+GET_USER_BY_ID_SQL per call, the old get_by_id. "after" goes through the
+loader. Needs a migrated database with at least --distinct users (DATABASE_URL).
+"""
+import argparse
+import asyncio
+import random
+import time
+
+from app.core.metrics import db_query_duration
+from app.dao import user_dao as user_dao_module
+from app.dao.user_dao import UserDAO, user_cache
+from app.database.database import db
+from app.database.queries import GET_USER_BY_ID_SQL
+from app.models.user_model import User
+
+
+class OldUserDAO(UserDAO):
+    """get_by_id as it was: one query per call."""
+
+    async def get_by_id(self, user_id: int):
+        row = await db.read_one(GET_USER_BY_ID_SQL, user_id)
+        return User(**dict(row)) if row else None
+
+
+def queries_run() -> int:
+    return sum(sum(counts) for counts, _ in db_query_duration.values.values())
+
+
+async def run(dao: UserDAO, ids, rounds: int):
+    queries_before = queries_run()
+    elapsed = 0.0
+    for _ in range(rounds):
+        user_cache.clear()
+        start = time.perf_counter()
+        await asyncio.gather(*(dao.get_cached_by_id(i) for i in ids))
+        elapsed += time.perf_counter() - start
+    return (queries_run() - queries_before) / rounds, elapsed / rounds * 1000
+
+
+async def main(args) -> None:
+    await db.connect()
+    try:
+        rows = await db.read_all("SELECT id FROM users ORDER BY id LIMIT $1", args.distinct)
+        rng = random.Random(3)
+        ids = [rng.choice(rows)["id"] for _ in range(args.lookups)]
+
+        for name, dao in (("before", OldUserDAO()), ("after", UserDAO())):
+            queries, ms = await run(dao, ids, args.rounds)
+            print(f"{name:6}  {queries:7.1f} queries/burst  {ms:7.2f} ms/burst")
+        print(f"loader: {user_dao_module.user_loader.stats()}  primary: {user_dao_module.user_loader_primary.stats()}")
+    finally:
+        await db.disconnect()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark coalesced user lookups")
+    parser.add_argument("--lookups", type=int, default=500, help="concurrent lookups per burst")
+    parser.add_argument("--distinct", type=int, default=100, help="distinct user ids among them")
+    parser.add_argument("--rounds", type=int, default=20)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,45 @@
+"""
+Compare two bench_api result files.
+
+    python -m benchmarks.compare benchmarks/results/abc123-asgi.json benchmarks/results/def456-asgi.json
+
+Prints the change per scenario and exits with status 1 if any scenario's p95
+latency grew by more than --threshold percent.
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+METRICS = ["throughput_rps", "p50_ms", "p95_ms", "p99_ms"]
+
+
+def pct_change(old: float, new: float) -> float:
+    return (new - old) / old * 100 if old else 0.0
+
+
+def compare(base: dict, head: dict, threshold: float) -> int:
+    if base["config"] != head["config"]:
+        print("warning: runs used different configurations, numbers may not be comparable")
+
+    print(f"{'scenario':14} " + " ".join(f"{m:>22}" for m in METRICS))
+    regressions = 0
+    for name, new in head["scenarios"].items():
+        old = base["scenarios"].get(name)
+        if old is None:
+            continue
+        cells = [f"{old[m]:>9} → {new[m]:<9}{pct_change(old[m], new[m]):+5.0f}%" for m in METRICS]
+        print(f"{name:14} " + " ".join(cells))
+        regressions += pct_change(old["p95_ms"], new["p95_ms"]) > threshold
+
+    print(f"{base['commit']} → {head['commit']}: {regressions} p95 regression(s) over {threshold:g}%")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files")
+    parser.add_argument("base", type=Path)
+    parser.add_argument("head", type=Path)
+    parser.add_argument("--threshold", type=float, default=10.0, help="allowed p95 growth in percent")
+    args = parser.parse_args()
+    sys.exit(compare(json.loads(args.base.read_text()), json.loads(args.head.read_text()), args.threshold))
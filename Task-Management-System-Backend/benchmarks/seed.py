@@ -0,0 +1,114 @@
+"""
+Seed the database in DATABASE_URL with benchmark users and tasks.
+
+    python -m benchmarks.seed --users 100 --tasks-per-user 50
+
+Benchmark rows are recognisable by their @bench.example.com emails and are replaced
+on every run; other data is left alone. The schema must be migrated first.
+"""
+import argparse
+import asyncio
+import random
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+import asyncpg
+
+from app.core.config import settings
+from app.core.security import get_password_hash
+
+BENCH_DOMAIN = "bench.example.com"
+BENCH_PASSWORD = "bench-password"
+ADMIN_EMAIL = f"admin@{BENCH_DOMAIN}"
+
+STATUSES = ["Pending", "In Progress", "Completed"]
+WORDS = ["report", "review", "deploy", "invoice", "meeting", "design", "audit", "backup", "client", "budget"]
+
+DELETE_BENCH_TASKS_SQL = """
+DELETE FROM tasks WHERE assigned_user IN (SELECT id FROM users WHERE email LIKE '%@' || $1);
+"""
+
+DELETE_BENCH_USERS_SQL = "DELETE FROM users WHERE email LIKE '%@' || $1;"
+
+GET_BENCH_TASKS_SQL = """
+SELECT t.id, t.assigned_user FROM tasks t
+JOIN users u ON u.id = t.assigned_user
+WHERE u.email LIKE '%@' || $1;
+"""
+
+
+@dataclass
+class SeedInfo:
+    admin_email: str
+    employee_emails: List[str]
+    password: str
+    task_ids: Dict[str, List[int]] = field(default_factory=dict)   # employee email -> task ids
+
+    @property
+    def all_task_ids(self) -> List[int]:
+        return [i for ids in self.task_ids.values() for i in ids]
+
+
+async def seed(users: int, tasks_per_user: int, dsn: str = None, rng_seed: int = 42) -> SeedInfo:
+    rng = random.Random(rng_seed)
+    now = datetime.now().replace(microsecond=0)
+    # One hash for everyone: seeding must not take minutes of bcrypt
+    password_hash = get_password_hash(BENCH_PASSWORD)
+    employees = [f"user{i}@{BENCH_DOMAIN}" for i in range(users)]
+
+    conn = await asyncpg.connect(dsn=dsn or settings.DATABASE_URL)
+    try:
+        async with conn.transaction():
+            await conn.execute(DELETE_BENCH_TASKS_SQL, BENCH_DOMAIN)
+            await conn.execute(DELETE_BENCH_USERS_SQL, BENCH_DOMAIN)
+
+            await conn.copy_records_to_table(
+                "users",
+                columns=["email", "password_hash", "role", "created_at", "updated_at"],
+                records=[(email, password_hash, role, now, now) for email, role in
+                         [(ADMIN_EMAIL, "ADMIN")] + [(e, "EMPLOYEE") for e in employees]],
+            )
+            ids = {r["email"]: r["id"] for r in await conn.fetch(
+                "SELECT id, email FROM users WHERE email LIKE '%@' || $1;", BENCH_DOMAIN
+            )}
+
+            records = []
+            for email in employees:
+                for n in range(tasks_per_user):
+                    created = now - timedelta(minutes=rng.randint(0, 60 * 24 * 90))
+                    records.append((
+                        f"{rng.choice(WORDS)} {rng.choice(WORDS)} #{n}",
+                        " ".join(rng.choices(WORDS, k=8)),
+                        ids[email],
+                        created + timedelta(days=rng.randint(-10, 30)),
+                        rng.choice(STATUSES),
+                        created,
+                        created,
+                    ))
+            await conn.copy_records_to_table(
+                "tasks",
+                columns=["title", "description", "assigned_user", "due_date", "status", "created_at", "updated_at"],
+                records=records,
+            )
+
+        await conn.execute("ANALYZE users; ANALYZE tasks;")
+
+        by_id = {v: k for k, v in ids.items()}
+        info = SeedInfo(ADMIN_EMAIL, employees, BENCH_PASSWORD, {e: [] for e in employees})
+        for row in await conn.fetch(GET_BENCH_TASKS_SQL, BENCH_DOMAIN):
+            info.task_ids[by_id[row["assigned_user"]]].append(row["id"])
+        return info
+
+    finally:
+        await conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Seed benchmark users and tasks")
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--tasks-per-user", type=int, default=50)
+    args = parser.parse_args()
+
+    info = asyncio.run(seed(args.users, args.tasks_per_user))
+    print(f"Seeded {len(info.employee_emails)} employees + 1 admin, {len(info.all_task_ids)} tasks")
@@ -0,0 +1,25 @@
+-- Migration 001: base schema
+-- Column names match app/database/queries.py (tasks.assigned_user is exposed
+-- to the API as assigned_to_id). Safe to run against a database whose tables
+-- were created by hand: existing tables are left as they are.
+
+CREATE TABLE IF NOT EXISTS users (
+    id            SERIAL PRIMARY KEY,
+    email         VARCHAR(255) NOT NULL UNIQUE,
+    password_hash VARCHAR(255) NOT NULL,
+    role          VARCHAR(50)  NOT NULL DEFAULT 'EMPLOYEE',
+    created_at    TIMESTAMP    NOT NULL DEFAULT now(),
+    updated_at    TIMESTAMP    NOT NULL DEFAULT now()
+);
+
+CREATE TABLE IF NOT EXISTS tasks (
+    id            SERIAL PRIMARY KEY,
+    title         VARCHAR(255) NOT NULL,
+    description   TEXT,
+    assigned_user INTEGER      NOT NULL REFERENCES users (id),
+    due_date      TIMESTAMP,
+    status        VARCHAR(20)  NOT NULL DEFAULT 'Pending'
+                  CHECK (status IN ('Pending', 'In Progress', 'Completed')),
+    created_at    TIMESTAMP    NOT NULL DEFAULT now(),
+    updated_at    TIMESTAMP    NOT NULL DEFAULT now()
+);
@@ -0,0 +1,26 @@
+-- Migration 002: indexes for the hot query paths
+-- Runs inside the migration transaction, so no CREATE INDEX CONCURRENTLY here.
+-- On a large live table create these by hand with CONCURRENTLY first; the
+-- IF NOT EXISTS guards then make this migration a no-op.
+
+-- GET_TASKS_BY_USER_SQL: employee dashboard, keyset-paginated on id DESC
+CREATE INDEX IF NOT EXISTS ix_tasks_assigned_user_id
+    ON tasks (assigned_user, id DESC);
+
+-- Status filters and due-date range scans (overdue / due-soon)
+CREATE INDEX IF NOT EXISTS ix_tasks_status_due_date
+    ON tasks (status, due_date);
+
+-- GET_USER_BY_EMAIL_SQL: every login. 001 declares email UNIQUE; databases
+-- created before it may not have any index on users.email at all.
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1
+        FROM pg_index i
+        JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = i.indkey[0]
+        WHERE i.indrelid = 'users'::regclass AND a.attname = 'email'
+    ) THEN
+        CREATE UNIQUE INDEX users_email_key ON users (email);
+    END IF;
+END $$;
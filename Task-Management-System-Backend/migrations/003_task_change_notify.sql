@@ -0,0 +1,37 @@
+-- Migration 003: publish task changes on the task_changes NOTIFY channel
+-- Consumed by the API's listener connection and fanned out to /tasks/events
+-- subscribers. The payload stays small (well under NOTIFY's 8000-byte limit):
+-- clients fetch the full task if they need the description.
+
+CREATE OR REPLACE FUNCTION notify_task_change() RETURNS trigger AS $$
+DECLARE
+    task RECORD;
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        task := OLD;
+    ELSE
+        task := NEW;
+    END IF;
+
+    PERFORM pg_notify('task_changes', json_build_object(
+        'op', lower(TG_OP),
+        'id', task.id,
+        'title', task.title,
+        'status', task.status,
+        'due_date', task.due_date,
+        'assigned_to_id', task.assigned_user,
+        'previous_assigned_to_id',
+            CASE WHEN TG_OP = 'UPDATE' AND OLD.assigned_user IS DISTINCT FROM NEW.assigned_user
+                 THEN OLD.assigned_user END,
+        'updated_at', task.updated_at
+    )::text);
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS tasks_notify_change ON tasks;
+
+CREATE TRIGGER tasks_notify_change
+    AFTER INSERT OR UPDATE OR DELETE ON tasks
+    FOR EACH ROW EXECUTE FUNCTION notify_task_change();
@@ -0,0 +1,31 @@
+-- Migration 004: add changed_at (epoch microseconds) to task_changes payloads
+-- Every API worker receives the same notifications, so versions derived from
+-- changed_at (used for ETags) agree across workers.
+
+CREATE OR REPLACE FUNCTION notify_task_change() RETURNS trigger AS $$
+DECLARE
+    task RECORD;
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        task := OLD;
+    ELSE
+        task := NEW;
+    END IF;
+
+    PERFORM pg_notify('task_changes', json_build_object(
+        'op', lower(TG_OP),
+        'id', task.id,
+        'title', task.title,
+        'status', task.status,
+        'due_date', task.due_date,
+        'assigned_to_id', task.assigned_user,
+        'previous_assigned_to_id',
+            CASE WHEN TG_OP = 'UPDATE' AND OLD.assigned_user IS DISTINCT FROM NEW.assigned_user
+                 THEN OLD.assigned_user END,
+        'updated_at', task.updated_at,
+        'changed_at', (extract(epoch FROM clock_timestamp()) * 1000000)::bigint
+    )::text);
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
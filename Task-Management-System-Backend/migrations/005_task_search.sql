@@ -0,0 +1,26 @@
+-- Migration 005: full-text and fuzzy search over tasks (GET /tasks/search)
+-- Adding a STORED generated column rewrites the table; on a large live table
+-- schedule it for a quiet period.
+
+-- SEARCH_TASKS_SQL: title weighted above description, kept current by Postgres
+ALTER TABLE tasks ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('english'::regconfig, coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('english'::regconfig, coalesce(description, '')), 'B')
+    ) STORED;
+
+CREATE INDEX IF NOT EXISTS ix_tasks_search_vector
+    ON tasks USING GIN (search_vector);
+
+-- SEARCH_TASKS_FUZZY_SQL: trigram similarity on title. pg_trgm ships with
+-- Postgres contrib; where it is missing only mode=fuzzy is unavailable. After
+-- installing it, run the two statements below by hand.
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm') THEN
+        CREATE EXTENSION IF NOT EXISTS pg_trgm;
+        CREATE INDEX IF NOT EXISTS ix_tasks_title_trgm ON tasks USING GIN (title gin_trgm_ops);
+    ELSE
+        RAISE NOTICE 'pg_trgm is not available: fuzzy task search disabled';
+    END IF;
+END $$;
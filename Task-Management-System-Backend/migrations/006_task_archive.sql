@@ -0,0 +1,68 @@
+-- Migration 006: archive table for old completed tasks
+-- The archiver (app/services/task_archiver.py) moves Completed tasks whose
+-- updated_at is older than ARCHIVE_AFTER_DAYS out of `tasks`, keeping the hot
+-- table small. Archived tasks keep their ids and are read-only.
+
+-- Range-partitioned by month of updated_at (≈ completion time); the archiver
+-- creates partitions as needed, and old months can be detached or dropped whole.
+CREATE TABLE IF NOT EXISTS tasks_archive (
+    id            INTEGER      NOT NULL,
+    title         VARCHAR(255) NOT NULL,
+    description   TEXT,
+    assigned_user INTEGER      NOT NULL,
+    due_date      TIMESTAMP,
+    status        VARCHAR(20)  NOT NULL,
+    created_at    TIMESTAMP    NOT NULL,
+    updated_at    TIMESTAMP    NOT NULL,
+    archived_at   TIMESTAMP    NOT NULL DEFAULT now(),
+    PRIMARY KEY (id, updated_at)
+) PARTITION BY RANGE (updated_at);
+
+-- include_archived listings: same keyset shape as ix_tasks_assigned_user_id
+CREATE INDEX IF NOT EXISTS ix_tasks_archive_assigned_user_id
+    ON tasks_archive (assigned_user, id DESC);
+
+-- Archived task count per assignee, kept by the archiver so /tasks/stats
+-- does not have to scan the archive
+CREATE TABLE IF NOT EXISTS tasks_archive_counts (
+    assigned_user INTEGER PRIMARY KEY,
+    total         BIGINT  NOT NULL
+);
+
+-- ARCHIVE_TASKS_BATCH_SQL: find candidates without scanning active tasks
+CREATE INDEX IF NOT EXISTS ix_tasks_completed_updated_at
+    ON tasks (updated_at) WHERE status = 'Completed';
+
+-- Archiving deletes rows from tasks; the archiver sends one summary
+-- notification per run instead of one per task
+CREATE OR REPLACE FUNCTION notify_task_change() RETURNS trigger AS $$
+DECLARE
+    task RECORD;
+BEGIN
+    IF current_setting('app.archiving', true) = 'on' THEN
+        RETURN NULL;
+    END IF;
+
+    IF TG_OP = 'DELETE' THEN
+        task := OLD;
+    ELSE
+        task := NEW;
+    END IF;
+
+    PERFORM pg_notify('task_changes', json_build_object(
+        'op', lower(TG_OP),
+        'id', task.id,
+        'title', task.title,
+        'status', task.status,
+        'due_date', task.due_date,
+        'assigned_to_id', task.assigned_user,
+        'previous_assigned_to_id',
+            CASE WHEN TG_OP = 'UPDATE' AND OLD.assigned_user IS DISTINCT FROM NEW.assigned_user
+                 THEN OLD.assigned_user END,
+        'updated_at', task.updated_at,
+        'changed_at', (extract(epoch FROM clock_timestamp()) * 1000000)::bigint
+    )::text);
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
@@ -0,0 +1,13 @@
+-- Migration 007: shared token buckets for login rate limiting
+-- Used when LOGIN_RATE_LIMIT_BACKEND=postgres, so every worker and instance
+-- counts attempts against the same buckets. UNLOGGED: buckets are cheap to
+-- lose on a crash (everyone just gets a full bucket) and skip WAL writes.
+
+CREATE UNLOGGED TABLE IF NOT EXISTS rate_limit_buckets (
+    key        TEXT             PRIMARY KEY,      -- "<scope>:<ip or email>"
+    tokens     DOUBLE PRECISION NOT NULL,         -- left after the last take
+    allowed    BOOLEAN          NOT NULL,         -- outcome of the last take
+    rate       DOUBLE PRECISION NOT NULL,         -- refill, tokens per second
+    burst      DOUBLE PRECISION NOT NULL,         -- capacity
+    updated_at TIMESTAMPTZ      NOT NULL
+);
@@ -0,0 +1,49 @@
+-- Migration 008: queue of pending due-date reminders
+-- One row per open task with a due date. `stage` is the next reminder to
+-- send: 1 = due soon (due within DUE_SOON_HOURS), 2 = overdue. The reminder
+-- job (app/services/task_reminders.py) claims rows by due_date, moves them to
+-- stage 2 after the due-soon reminder and deletes them after the overdue one.
+-- A trigger keeps the queue in step with tasks, so the job never scans them.
+CREATE TABLE IF NOT EXISTS task_due_reminders (
+    task_id  INTEGER   PRIMARY KEY REFERENCES tasks (id) ON DELETE CASCADE,
+    due_date TIMESTAMP NOT NULL,
+    stage    SMALLINT  NOT NULL DEFAULT 1
+);
+
+-- CLAIM_DUE_REMINDERS_SQL: rows due before now + DUE_SOON_HOURS
+CREATE INDEX IF NOT EXISTS ix_task_due_reminders_due_date
+    ON task_due_reminders (due_date);
+
+-- Completing a task or clearing its due date drops its reminders; a new due
+-- date, or reopening a completed task, re-arms them from stage 1
+CREATE OR REPLACE FUNCTION sync_task_due_reminder() RETURNS trigger AS $$
+BEGIN
+    IF NEW.status = 'Completed' OR NEW.due_date IS NULL THEN
+        IF TG_OP = 'UPDATE' THEN
+            DELETE FROM task_due_reminders WHERE task_id = NEW.id;
+        END IF;
+    ELSIF TG_OP = 'INSERT'
+       OR NEW.due_date IS DISTINCT FROM OLD.due_date
+       OR OLD.status = 'Completed' THEN
+        INSERT INTO task_due_reminders (task_id, due_date, stage)
+        VALUES (NEW.id, NEW.due_date, 1)
+        ON CONFLICT (task_id) DO UPDATE SET due_date = EXCLUDED.due_date, stage = 1;
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS tasks_sync_due_reminder ON tasks;
+
+CREATE TRIGGER tasks_sync_due_reminder
+    AFTER INSERT OR UPDATE OF due_date, status ON tasks
+    FOR EACH ROW EXECUTE FUNCTION sync_task_due_reminder();
+
+-- Existing open tasks that are not yet due; tasks already overdue when this
+-- runs are not reminded about (they still count in /tasks/stats)
+INSERT INTO task_due_reminders (task_id, due_date)
+SELECT id, due_date
+FROM tasks
+WHERE status <> 'Completed' AND due_date > (now() AT TIME ZONE 'UTC')   -- due dates are naive UTC
+ON CONFLICT (task_id) DO NOTHING;
@@ -0,0 +1,16 @@
+-- Migration 009: publish new account emails on the users_created NOTIFY channel
+-- Every API worker listens and drops the email from its unknown-email login
+-- cache (app/dao/user_dao.py), whichever worker or tool created the account.
+
+CREATE OR REPLACE FUNCTION notify_user_created() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('users_created', NEW.email);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS users_notify_created ON users;
+
+CREATE TRIGGER users_notify_created
+    AFTER INSERT OR UPDATE OF email ON users
+    FOR EACH ROW EXECUTE FUNCTION notify_user_created();
@@ -0,0 +1,9 @@
+import os
+import sys
+from pathlib import Path
+
+# Settings are read at import time; the unit tests never open a real connection
+os.environ.setdefault("DATABASE_URL", "postgresql://postgres@127.0.0.1/tms")
+os.environ.setdefault("SECRET_KEY", "test-secret")
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
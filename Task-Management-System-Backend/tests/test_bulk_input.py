@@ -0,0 +1,55 @@
+"""
+NDJSON decoding of bulk request bodies (app.controllers.bulk_input), fed
+chunk by chunk like a streamed upload.
+"""
+import asyncio
+
+from pydantic import BaseModel
+
+from app.controllers.bulk_input import _ndjson_lines, iter_bulk_items
+from app.core.config import settings
+
+
+class FakeRequest:
+
+    def __init__(self, *chunks: bytes, content_type: str = "application/x-ndjson"):
+        self.chunks = chunks
+        self.headers = {"content-type": content_type}
+
+    async def stream(self):
+        for chunk in self.chunks:
+            yield chunk
+
+
+class Item(BaseModel):
+    n: int
+
+
+def lines(*chunks: bytes, max_line: int = 100):
+    async def collect():
+        return [line async for line in _ndjson_lines(FakeRequest(*chunks), max_line)]
+    return [str(x) if isinstance(x, ValueError) else x for x in asyncio.run(collect())]
+
+
+def test_lines_split_across_chunks():
+    assert lines(b'{"n"', b': 1}\n{"n": 2}\n\n{"n":', b" 3}") == [b'{"n": 1}', b'{"n": 2}', b'{"n": 3}']
+
+
+def test_long_line_is_reported_once_and_skipped_without_buffering():
+    too_long = "Line longer than 10 bytes"
+    assert lines(b"a" * 8, b"b" * 8, b"c" * 50, b"c\nok\n", max_line=10) == [too_long, b"ok"]
+    assert lines(b"x" * 20 + b"\nok", max_line=10) == [too_long, b"ok"]
+    assert lines(b"x" * 30, max_line=10) == [too_long]
+
+
+def test_items_keep_their_positions(monkeypatch):
+    monkeypatch.setattr(settings, "BULK_MAX_LINE_BYTES", 20)
+
+    async def collect():
+        request = FakeRequest(b'{"n": 1}\n', b'{"n": "' + b"9" * 30 + b'"}\n{"n": "x"}\n{"n": 4}\n')
+        return [item async for item in iter_bulk_items(request, Item)]
+
+    items = asyncio.run(collect())
+
+    assert [i.n if isinstance(i, Item) else "error" for i in items] == [1, "error", "error", 4]
+    assert str(items[1]) == "Line longer than 20 bytes"
@@ -0,0 +1,173 @@
+"""
+Database.listen keeps its LISTEN connection alive through failures, against a
+stand-in for asyncpg.connect.
+"""
+import asyncio
+
+import asyncpg
+import pytest
+
+from app.core.config import settings
+from app.core.metrics import db_listener_callback_errors, db_listener_restarts
+from app.database import database
+from app.database.database import Database
+
+REAL_SLEEP = asyncio.sleep
+
+
+class FakeListenConnection:
+
+    def __init__(self, fail_ping: Exception = None):
+        self.fail_ping = fail_ping
+        self.listeners = {}
+        self.closed = False
+
+    async def add_listener(self, channel, callback):
+        self.listeners[channel] = callback
+
+    def notify(self, channel, payload):
+        self.listeners[channel](self, 1, channel, payload)
+
+    async def execute(self, query):
+        if self.fail_ping is not None:
+            raise self.fail_ping
+
+    def is_closed(self):
+        return self.closed
+
+    async def close(self):
+        self.closed = True
+
+    def terminate(self):
+        self.closed = True
+
+
+class Outcomes(list):
+    """Scripted connect() outcomes, plus the connections handed out so far."""
+
+    def __init__(self):
+        super().__init__()
+        self.connected = []
+
+
+@pytest.fixture
+def connect(monkeypatch):
+    """Each asyncpg.connect() returns (or raises) the next scripted outcome."""
+    outcomes = Outcomes()
+
+    async def fake_connect(dsn):
+        outcome = outcomes.pop(0) if outcomes else FakeListenConnection()
+        if isinstance(outcome, Exception):
+            raise outcome
+        outcomes.connected.append(outcome)
+        return outcome
+
+    async def fast_sleep(delay):
+        await REAL_SLEEP(0)
+
+    monkeypatch.setattr(database.asyncpg, "connect", fake_connect)
+    monkeypatch.setattr(database.asyncio, "sleep", fast_sleep)
+    monkeypatch.setattr(settings, "DB_LISTENER_PING_SECONDS", 0)
+    return outcomes
+
+
+async def run_listener(db: Database, until, **callbacks):
+    db.listen("chan", **callbacks)
+    for _ in range(200):
+        if until():
+            break
+        await REAL_SLEEP(0)
+    await db.disconnect()
+
+
+def restarts() -> float:
+    return db_listener_restarts.values.get(("chan",), 0)
+
+
+@pytest.mark.parametrize("error", [
+    OSError("connection refused"),
+    asyncpg.InternalServerError("boom"),   # a PostgresError, not a connection error
+    RuntimeError("bug"),
+])
+def test_listener_reconnects_after_any_error(connect, error):
+    connect.extend([error, FakeListenConnection(fail_ping=error), FakeListenConnection()])
+    connected, disconnected = [], []
+    before = restarts()
+
+    asyncio.run(run_listener(
+        Database(),
+        until=lambda: len(connected) == 2,
+        on_notify=lambda payload: None,
+        on_connect=lambda: connected.append(1),
+        on_disconnect=lambda: disconnected.append(1),
+    ))
+
+    assert len(connected) == 2
+    assert len(disconnected) == 2
+    assert restarts() - before == 2
+
+
+def test_failing_handler_does_not_stop_the_listener(connect):
+    conn = FakeListenConnection()
+    connect.append(conn)
+    received = []
+
+    def on_notify(payload):
+        if payload == "bad":
+            raise ValueError(payload)
+        received.append(payload)
+
+    async def scenario():
+        db = Database()
+        db.listen("chan", on_notify)
+        while "chan" not in conn.listeners:
+            await REAL_SLEEP(0)
+        conn.notify("chan", "bad")
+        conn.notify("chan", "good")
+        await db.disconnect()
+
+    before = db_listener_callback_errors.values.get(("chan",), 0)
+    asyncio.run(scenario())
+
+    assert received == ["good"]
+    assert db_listener_callback_errors.values[("chan",)] - before == 1
+
+
+def test_failing_on_disconnect_does_not_stop_the_listener(connect):
+    connect.extend([OSError("down"), FakeListenConnection()])
+    connected = []
+
+    def on_disconnect():
+        raise RuntimeError("bug")
+
+    asyncio.run(run_listener(
+        Database(),
+        until=lambda: connected,
+        on_notify=lambda payload: None,
+        on_connect=lambda: connected.append(1),
+        on_disconnect=on_disconnect,
+    ))
+
+    assert connected == [1]
+
+
+def test_channels_share_one_connection(connect):
+    conns = []
+
+    async def scenario():
+        db = Database()
+        db.listen("chan", lambda payload: None)
+        db.listen("other", lambda payload: None)
+        while not connect.connected:
+            await REAL_SLEEP(0)
+        conns.extend(connect.connected)
+        # A channel added once listening joins the same connection
+        db.listen("late", lambda payload: None)
+        for _ in range(10):
+            await REAL_SLEEP(0)
+        await db.disconnect()
+
+    asyncio.run(scenario())
+
+    [conn] = conns
+    assert set(conn.listeners) == {"chan", "other", "late"}
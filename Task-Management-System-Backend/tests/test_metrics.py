@@ -0,0 +1,72 @@
+"""
+/metrics across worker processes: snapshots written to METRICS_DIR are summed
+into the answering worker's own numbers.
+"""
+import asyncio
+import os
+import time
+
+import pytest
+
+from app.core import metrics
+from app.core.config import settings
+from app.core.metrics import Counter, GaugeFunc, Histogram, Registry
+
+
+@pytest.fixture
+def registry(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "METRICS_DIR", str(tmp_path))
+    registry = Registry()
+    monkeypatch.setattr(metrics, "registry", registry)
+    return registry
+
+
+def worker(registry: Registry, requests: float, latency: float, in_use: float):
+    """Fill `registry` the way one worker's traffic would."""
+    registry.metrics.clear()
+    c = registry.register(Counter("requests_total", "", ("route",)))
+    h = registry.register(Histogram("latency_seconds", "", (), (0.1, 1.0)))
+    registry.register(GaugeFunc("in_use", "", lambda: in_use))
+    c.inc(("/tasks",), requests)
+    h.observe((), latency)
+
+
+def test_render_sums_other_workers_snapshots(registry):
+    worker(registry, 3, 0.05, 2)
+    other = registry.snapshot()
+    worker(registry, 4, 0.5, 1)
+
+    text = registry.render([other])
+
+    assert 'requests_total{route="/tasks"} 7' in text
+    assert 'latency_seconds_bucket{le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{le="1.0"} 2' in text
+    assert "latency_seconds_count 2" in text
+    assert "latency_seconds_sum 0.55" in text
+    assert "in_use 3" in text
+
+
+def test_labels_seen_only_by_another_worker_are_included(registry):
+    worker(registry, 1, 0.05, 0)
+    other = {"requests_total": [[["/user"], 5]]}
+
+    assert 'requests_total{route="/user"} 5' in registry.render([other])
+
+
+def test_snapshot_files_round_trip_without_the_own_or_stale_ones(registry, tmp_path, monkeypatch):
+    worker(registry, 2, 0.05, 0)
+    asyncio.run(metrics.write_snapshot())            # this worker's own file
+    for pid in (1, 2):                               # two other workers...
+        with monkeypatch.context() as m:
+            m.setattr(os, "getpid", lambda: pid)
+            asyncio.run(metrics.write_snapshot())
+    stale = time.time() - 10 * settings.METRICS_SNAPSHOT_SECONDS
+    os.utime(tmp_path / "2.json", (stale, stale))    # ...one of which died
+
+    snapshots = metrics.read_snapshots()
+
+    assert len(snapshots) == 1
+    assert 'requests_total{route="/tasks"} 4' in registry.render(snapshots)
+
+    metrics.remove_snapshot()
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["1.json", "2.json"]
@@ -0,0 +1,199 @@
+"""
+Read routing in app.database.database.Database, against stand-in pools: one
+primary and replicas that either answer with their name or fail like a dead
+server would.
+"""
+import asyncio
+from contextlib import asynccontextmanager
+
+import asyncpg
+import pytest
+
+from app.core.config import settings
+from app.database.database import Database
+
+
+class FakeConnection:
+
+    def __init__(self, pool: "FakePool"):
+        self.pool = pool
+
+    async def _answer(self):
+        if self.pool.error is not None:
+            raise self.pool.error
+        self.pool.queries += 1
+        return self.pool.name
+
+    async def fetch(self, query, *args):
+        return [await self._answer()]
+
+    async def fetchrow(self, query, *args):
+        return await self._answer()
+
+    async def execute(self, query, *args):
+        await self._answer()
+        return "UPDATE 1"
+
+
+class FakePool:
+    """The part of asyncpg.Pool that Database uses for routing."""
+
+    def __init__(self, name: str, busy: int = 0, error: Exception = None):
+        self.name, self.busy, self.error = name, busy, error
+        self.queries = 0
+
+    @asynccontextmanager
+    async def acquire(self):
+        yield FakeConnection(self)
+
+    def get_size(self) -> int:
+        return self.busy + 2
+
+    def get_idle_size(self) -> int:
+        return 2
+
+
+def make_db(*replicas: FakePool) -> Database:
+    db = Database()
+    db.pool = FakePool("primary")
+    db.replicas = list(replicas)
+    return db
+
+
+def read(db: Database, n: int = 1):
+    async def reads():
+        return [await db.read_one("SELECT 1") for _ in range(n)]
+    return asyncio.run(reads())
+
+
+@pytest.fixture(autouse=True)
+def routing(monkeypatch):
+    monkeypatch.setattr(settings, "DB_REPLICA_ROUTING", "round_robin")
+
+
+def test_round_robin_spreads_reads_over_replicas():
+    db = make_db(FakePool("r0"), FakePool("r1"))
+
+    served = read(db, 4)
+
+    assert sorted(served) == ["r0", "r0", "r1", "r1"]
+    assert served[0] != served[1]
+    assert (db.replica_reads, db.primary_reads) == (4, 0)
+
+
+def test_least_busy_picks_the_replica_with_fewest_connections_in_use(monkeypatch):
+    monkeypatch.setattr(settings, "DB_REPLICA_ROUTING", "least_busy")
+    db = make_db(FakePool("r0", busy=5), FakePool("r1", busy=1), FakePool("r2", busy=3))
+
+    assert read(db, 3) == ["r1", "r1", "r1"]
+
+
+def test_without_replicas_reads_use_the_primary():
+    db = make_db()
+
+    assert read(db) == ["primary"]
+    assert db.primary_reads == 1
+
+
+@pytest.mark.parametrize("error", [OSError("connection refused"), asyncpg.ConnectionDoesNotExistError()])
+def test_failed_replica_falls_over_to_the_next_one_and_is_skipped(error):
+    broken = FakePool("r0", error=error)
+    db = make_db(broken, FakePool("r1"))
+
+    assert read(db, 3) == ["r1", "r1", "r1"]
+    assert db.replica_failovers == 1     # marked down after the first failure
+    assert broken.queries == 0
+
+
+def test_all_replicas_failing_falls_back_to_the_primary():
+    db = make_db(FakePool("r0", error=OSError()), FakePool("r1", error=asyncpg.ConnectionDoesNotExistError()))
+
+    assert read(db, 2) == ["primary", "primary"]
+    assert db.replica_failovers == 2
+    assert db.primary_reads == 2
+
+
+def test_replica_is_tried_again_after_the_retry_window(monkeypatch):
+    monkeypatch.setattr(settings, "DB_REPLICA_RETRY_SECONDS", 0)
+    replica = FakePool("r0", error=OSError())
+    db = make_db(replica)
+
+    assert read(db) == ["primary"]
+    replica.error = None
+    assert read(db) == ["r0"]
+
+
+def test_query_errors_are_not_failed_over():
+    db = make_db(FakePool("r0", error=asyncpg.UndefinedTableError()))
+
+    with pytest.raises(asyncpg.UndefinedTableError):
+        read(db)
+    assert db.replica_failovers == 0
+
+
+def test_write_sends_the_rest_of_the_request_to_the_primary():
+    db = make_db(FakePool("r0"))
+
+    async def request():
+        db.bind_session("user:1")
+        before = await db.read_one("SELECT 1")
+        await db.execute("UPDATE tasks SET title = $1", "x")
+        after = await db.read_one("SELECT 1")
+        return before, after
+
+    assert asyncio.run(request()) == ("r0", "primary")
+
+
+def test_read_your_writes_follows_the_session_into_later_requests():
+    db = make_db(FakePool("r0"))
+
+    async def write(session):
+        db.bind_session(session)
+        await db.execute("UPDATE tasks SET title = $1", "x")
+
+    async def read_as(session):
+        db.bind_session(session)
+        return await db.read_one("SELECT 1")
+
+    async def requests():
+        # Each request runs in its own task, so its context starts clean
+        await asyncio.create_task(write("user:1"))
+        return (
+            await asyncio.create_task(read_as("user:1")),
+            await asyncio.create_task(read_as("user:2")),
+        )
+
+    assert asyncio.run(requests()) == ("primary", "r0")
+
+
+def test_reads_inside_a_connection_block_stay_on_it():
+    db = make_db(FakePool("r0"))
+
+    async def block():
+        async with db.connection():
+            return await db.read_one("SELECT 1")
+
+    assert asyncio.run(block()) == "primary"
+
+
+def test_read_one_primary_skips_replicas_without_counting_as_a_write():
+    db = make_db(FakePool("r0"))
+
+    async def request():
+        db.bind_session("user:1")
+        seed = await db.read_one_primary("SELECT 1")
+        return seed, await db.read_one("SELECT 1")
+
+    assert asyncio.run(request()) == ("primary", "r0")
+
+
+def test_read_all_primary_does_not_renew_read_your_writes():
+    db = make_db(FakePool("r0"))
+
+    async def request():
+        db.bind_session("user:1")
+        rows = await db.read_all_primary("SELECT 1")
+        return rows, db.must_read_primary()
+
+    assert asyncio.run(request()) == (["primary"], False)
+    assert db._recent_writers.get("user:1") is None
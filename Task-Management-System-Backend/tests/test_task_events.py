@@ -0,0 +1,35 @@
+"""
+Subscription lifetime of /tasks/events streams (app.services.task_events).
+"""
+import asyncio
+
+from app.services.task_events import TaskEventHub, sse_stream
+
+
+def test_stream_that_is_never_sent_leaves_no_subscription():
+    hub = TaskEventHub()
+
+    stream = sse_stream(hub, 1, is_admin=False)
+    asyncio.run(stream.aclose())    # e.g. the client left before the response started
+
+    assert hub.subscriber_count() == 0
+
+
+def test_subscription_lasts_as_long_as_the_stream():
+    hub = TaskEventHub()
+
+    async def scenario():
+        stream = sse_stream(hub, 1, is_admin=False)
+        assert await stream.__anext__() == "retry: 3000\n\n"
+        during = hub.subscriber_count()
+
+        hub.publish('{"op": "update", "id": 7, "assigned_to_id": 1}')
+        event = await stream.__anext__()
+        await stream.aclose()
+        return during, event
+
+    during, event = asyncio.run(scenario())
+
+    assert during == 1
+    assert event.startswith("event: task\n")
+    assert hub.subscriber_count() == 0
@@ -0,0 +1,275 @@
+"""
+Access-token signing and verification (app.core.tokens) with throwaway keys.
+"""
+import base64
+
+import orjson
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ed25519, rsa
+
+from app.core import cache, tokens
+from app.core.config import settings
+from app.core.tokens import TokenError, decode_token, encode_token, get_key_ring
+
+
+class Clock:
+    """Stands in for the time module in tokens (exp) and cache (TTL)."""
+
+    def __init__(self, now: float = 1_000_000.0):
+        self.now = now
+
+    def time(self) -> float:
+        return self.now
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+def b64(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def forge(key, header: dict, claims: dict) -> str:
+    """A token with any header, signed by `key` as the app would sign it."""
+    signing_input = f"{b64(orjson.dumps(header))}.{b64(orjson.dumps(claims))}"
+    return f"{signing_input}.{b64(key.sign(signing_input.encode()))}"
+
+
+def write_key(directory, kid: str, private_key) -> None:
+    pem = private_key.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    )
+    (directory / f"{kid}.pem").write_bytes(pem)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(tokens, "time", clock)
+    monkeypatch.setattr(cache, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def configure(monkeypatch, clock):
+    """Point the key ring at ALGORITHM / JWT_KEYS_DIR / JWT_ACTIVE_KID."""
+
+    def configure(alg: str, keys_dir=None, active_kid=None):
+        monkeypatch.setattr(settings, "ALGORITHM", alg)
+        monkeypatch.setattr(settings, "JWT_KEYS_DIR", str(keys_dir) if keys_dir else None)
+        monkeypatch.setattr(settings, "JWT_ACTIVE_KID", active_kid)
+        get_key_ring.cache_clear()
+        tokens.verified_tokens.clear()
+
+    yield configure
+    get_key_ring.cache_clear()
+    tokens.verified_tokens.clear()
+
+
+@pytest.fixture
+def ed_keys(tmp_path):
+    write_key(tmp_path, "ed-1", ed25519.Ed25519PrivateKey.generate())
+    return tmp_path
+
+
+def claims(clock, ttl: float = 60) -> dict:
+    return {"sub": "42", "role": "EMPLOYEE", "exp": int(clock.now + ttl)}
+
+
+# ================= ROUND TRIPS =================
+@pytest.mark.parametrize("alg", ["HS256", "HS384", "HS512"])
+def test_hmac_round_trip(configure, clock, alg):
+    configure(alg)
+    token = encode_token(claims(clock))
+
+    assert decode_token(token)["sub"] == "42"
+    assert "kid" not in orjson.loads(base64.urlsafe_b64decode(token.split(".")[0] + "=="))
+
+
+def test_rs256_round_trip_and_jwks(configure, clock, tmp_path):
+    write_key(tmp_path, "rsa-1", rsa.generate_private_key(public_exponent=65537, key_size=2048))
+    configure("RS256", tmp_path)
+
+    assert decode_token(encode_token(claims(clock)))["sub"] == "42"
+    [jwk] = get_key_ring().jwks["keys"]
+    assert (jwk["kty"], jwk["kid"], jwk["alg"], jwk["use"]) == ("RSA", "rsa-1", "RS256", "sig")
+    assert "d" not in jwk
+
+
+def test_eddsa_round_trip_and_jwks(configure, clock, ed_keys):
+    configure("EdDSA", ed_keys)
+
+    assert decode_token(encode_token(claims(clock)))["sub"] == "42"
+    [jwk] = get_key_ring().jwks["keys"]
+    assert (jwk["kty"], jwk["crv"], jwk["kid"]) == ("OKP", "Ed25519", "ed-1")
+    assert "d" not in jwk
+
+
+def test_hmac_keys_are_never_published(configure):
+    configure("HS256")
+    assert get_key_ring().jwks == {"keys": []}
+
+
+# ================= REJECTED TOKENS =================
+def test_tampered_payload_is_rejected(configure, clock, ed_keys):
+    configure("EdDSA", ed_keys)
+    header, _, signature = encode_token(claims(clock)).split(".")
+    admin = b64(orjson.dumps({**claims(clock), "role": "ADMIN"}))
+
+    with pytest.raises(TokenError, match="Bad signature"):
+        decode_token(f"{header}.{admin}.{signature}")
+
+
+def test_signature_from_another_secret_is_rejected(configure, clock, monkeypatch):
+    configure("HS256")
+    token = encode_token(claims(clock))
+
+    monkeypatch.setattr(settings, "SECRET_KEY", "another-secret")
+    configure("HS256")
+    with pytest.raises(TokenError, match="Bad signature"):
+        decode_token(token)
+
+
+def test_unknown_kid_is_rejected(configure, clock, ed_keys):
+    configure("EdDSA", ed_keys)
+    key = get_key_ring().active
+
+    with pytest.raises(TokenError, match="Unknown signing key"):
+        decode_token(forge(key, {"alg": "EdDSA", "kid": "ed-2"}, claims(clock)))
+
+
+@pytest.mark.parametrize("alg", ["HS256", "none", "RS256", None])
+def test_alg_must_be_the_keys_own(configure, clock, ed_keys, alg):
+    configure("EdDSA", ed_keys)
+    key = get_key_ring().active
+    header = {"kid": "ed-1"} if alg is None else {"alg": alg, "kid": "ed-1"}
+
+    with pytest.raises(TokenError, match="Unknown signing key"):
+        decode_token(forge(key, header, claims(clock)))
+
+
+def test_hmac_token_using_the_public_key_as_secret_is_rejected(configure, clock, ed_keys):
+    # Classic alg confusion: HS256 "signed" with the published public key
+    configure("EdDSA", ed_keys)
+    public_pem = get_key_ring().active.public.public_bytes(
+        serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+    )
+    forged = tokens.SigningKey("ed-1", "HS256", secret=public_pem)
+
+    with pytest.raises(TokenError, match="Unknown signing key"):
+        decode_token(forge(forged, {"alg": "HS256", "kid": "ed-1"}, claims(clock)))
+
+
+def test_expired_token_is_rejected(configure, clock):
+    configure("HS256")
+    token = encode_token(claims(clock, ttl=-1))
+
+    with pytest.raises(TokenError, match="Token expired"):
+        decode_token(token)
+
+
+@pytest.mark.parametrize("token", [
+    "",
+    "abc",
+    "a.b",
+    "a.b.c.d",
+    "!!!.???.***",
+    f"{b64(b'not json')}.{b64(b'{}')}.{b64(b'sig')}",
+    f"{b64(b'[1, 2]')}.{b64(b'{}')}.{b64(b'sig')}",                      # header not an object
+    f"{b64(orjson.dumps({'alg': 'HS256', 'kid': ['x']}))}.{b64(b'{}')}.{b64(b'sig')}",   # unhashable kid
+])
+def test_malformed_tokens_are_rejected(configure, token):
+    configure("HS256")
+
+    with pytest.raises(TokenError):
+        decode_token(token)
+
+
+@pytest.mark.parametrize("payload", [b"not json", b"{}", b'{"exp": "soon"}', b"[1]"])
+def test_malformed_claims_are_rejected(configure, payload):
+    configure("HS256")
+    key = get_key_ring().active
+    signing_input = f"{key.encoded_header.decode()}.{b64(payload)}"
+    token = f"{signing_input}.{b64(key.sign(signing_input.encode()))}"
+
+    with pytest.raises(TokenError, match="Malformed claims"):
+        decode_token(token)
+
+
+# ================= VERIFIED-TOKEN CACHE =================
+def test_cached_token_still_expires_at_exp(configure, clock):
+    configure("HS256")
+    token = encode_token(claims(clock, ttl=60))
+
+    decode_token(token)
+    clock.now += 30
+    assert decode_token(token)["sub"] == "42"
+    assert tokens.verified_tokens.hits == 1
+
+    clock.now += 31
+    with pytest.raises(TokenError, match="Token expired"):
+        decode_token(token)
+
+
+def test_rejected_tokens_are_not_cached(configure, clock, ed_keys):
+    configure("EdDSA", ed_keys)
+    header, payload, _ = encode_token(claims(clock)).split(".")
+    bad = f"{header}.{payload}.{b64(b'x' * 64)}"
+
+    for _ in range(2):
+        with pytest.raises(TokenError):
+            decode_token(bad)
+    assert len(tokens.verified_tokens) == 0
+
+
+# ================= KEY RING =================
+def test_several_signing_keys_need_an_active_kid(configure, ed_keys):
+    write_key(ed_keys, "ed-2", ed25519.Ed25519PrivateKey.generate())
+    configure("EdDSA", ed_keys)
+
+    with pytest.raises(ValueError, match="JWT_ACTIVE_KID"):
+        get_key_ring()
+
+
+def test_rotation_publish_first_activate_later(configure, clock, ed_keys):
+    configure("EdDSA", ed_keys)
+    old_token = encode_token(claims(clock))
+
+    # Step 1: the new key is published and verifies, the old one still signs
+    write_key(ed_keys, "ed-2", ed25519.Ed25519PrivateKey.generate())
+    configure("EdDSA", ed_keys, active_kid="ed-1")
+    assert get_key_ring().active.kid == "ed-1"
+    assert {k["kid"] for k in get_key_ring().jwks["keys"]} == {"ed-1", "ed-2"}
+
+    # Step 2: activate it; tokens signed with the old key keep working
+    configure("EdDSA", ed_keys, active_kid="ed-2")
+    new_token = encode_token(claims(clock))
+    assert orjson.loads(base64.urlsafe_b64decode(new_token.split(".")[0] + "=="))["kid"] == "ed-2"
+    assert decode_token(old_token)["sub"] == decode_token(new_token)["sub"] == "42"
+
+
+def test_unknown_active_kid_fails_at_load(configure, ed_keys):
+    configure("EdDSA", ed_keys, active_kid="ed-9")
+
+    with pytest.raises(ValueError, match="No EdDSA private key ed-9"):
+        get_key_ring()
+
+
+def test_public_key_file_verifies_but_cannot_sign(configure, clock, ed_keys):
+    other = ed25519.Ed25519PrivateKey.generate()
+    (ed_keys / "ed-0.pem").write_bytes(other.public_key().public_bytes(
+        serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+    ))
+    configure("EdDSA", ed_keys)
+
+    assert get_key_ring().active.kid == "ed-1"
+    signer = tokens.SigningKey("ed-0", "EdDSA", private=other)
+    assert decode_token(forge(signer, {"alg": "EdDSA", "kid": "ed-0"}, claims(clock)))["sub"] == "42"
+
+
+def test_asymmetric_algorithm_needs_a_keys_dir(configure):
+    configure("EdDSA")
+
+    with pytest.raises(ValueError, match="JWT_KEYS_DIR"):
+        get_key_ring()